@@ -1,38 +1,378 @@
-from flask import Flask, render_template, request, jsonify, redirect
-import webbrowser
-import speech_recognition as sr
-import visually  # Import visually.py
-import hearing  # Import hearing.py
+from flask import Blueprint, Flask, Response, abort, current_app, g, render_template, request, jsonify, redirect, send_from_directory, session, url_for
+from werkzeug.local import LocalProxy
+import importlib
+import json
+import os
+import secrets
 import threading
 import time
-import random
+import metrics
+from assets import ASSET_CACHE_CONTROL, PLAIN_ASSET_CACHE_CONTROL, AssetManifest, TemplateWatcher
+from content_store import BASE_DIR, visual_catalog, hearing_catalog
+from jobs import JobManager
+from media import MEDIA_DIR, MEDIA_MAX_AGE, MEDIA_X_SENDFILE, MediaManifest, media_path, media_signature
+from navigation import SessionRegistry, NAVIGATION_COMMANDS
+from progress import PROGRESS_DB, ProgressStore
+from responses import LatestResponseCache, ResponseCache, prepare_html, send_prepared
+from search import SearchIndex
+from state_backend import STATE_BACKEND, create_backend
 
-app = Flask(__name__)
+class LazyModule:
+    """
+    Stand-in for a module that is imported on first attribute access, so that
+    web workers only load the speech stack once a voice flow actually runs.
+    """
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self):
+        return self._module is not None
+
+    def __getattr__(self, attr):
+        if self._module is None:
+            with self._lock:
+                if self._module is None:
+                    self._module = importlib.import_module(self._name)
+        return getattr(self._module, attr)
+
+visually = LazyModule("visually")  # Import visually.py on first voice use
+
+bp = Blueprint('main', __name__)
+
+# Settings for the learner state create_app builds, overridable through its config argument. Navigation
+# state lives in STATE_BACKEND so that any worker process can serve any learner (see serve.py)
+SESSION_IDLE_TIMEOUT = int(os.environ.get("SESSION_IDLE_TIMEOUT", 30 * 60))
+DEFAULT_CONFIG = {
+    "PROGRESS_DB": PROGRESS_DB,
+    "STATE_BACKEND": STATE_BACKEND,
+    "MAX_SESSIONS": int(os.environ.get("MAX_SESSIONS", 500)),
+    "SESSION_IDLE_TIMEOUT": SESSION_IDLE_TIMEOUT,
+    "MAX_VOICE_WORKERS": int(os.environ.get("MAX_VOICE_WORKERS", 32)),
+    "VOICE_PROMPT_WORKERS": int(os.environ.get("VOICE_PROMPT_WORKERS", 2)),
+    "VOICE_PROMPT_MAX_PENDING": int(os.environ.get("VOICE_PROMPT_MAX_PENDING", 8)),
+    # Open /api/stream connections per process, 0 for no limit. Each one holds a server thread for
+    # as long as the page is open, so serve.py keeps this below its thread count; clients turned
+    # away fall back to polling /api/state
+    "MAX_STREAMS": int(os.environ.get("MAX_STREAMS", 0)),
+}
+
+class LearnerState:
+    """
+    Everything one app keeps about its learners, built by create_app from its config.
+    """
+
+    def __init__(self, config):
+        # Where each learner got to in each course, fed by navigation changes and written behind to SQLite
+        self.progress = ProgressStore(config["PROGRESS_DB"])
+        # Navigation state for visually impaired learners, one session per browser
+        self.sessions = SessionRegistry(
+            max_sessions=config["MAX_SESSIONS"],
+            idle_timeout=config["SESSION_IDLE_TIMEOUT"],
+            max_voice_workers=config["MAX_VOICE_WORKERS"],
+            backend=create_backend(config["STATE_BACKEND"], idle_timeout=config["SESSION_IDLE_TIMEOUT"]),
+            topics_for=lambda course: visual_catalog().course_view(course),
+            on_change=self.progress.on_navigation,
+        )
+        # Each learner's latest /api/state body, kept apart so that per-learner churn doesn't evict shared bodies
+        self.state_responses = LatestResponseCache(max_entries=self.sessions.max_sessions)
+        # "Are you visually impaired?" prompts run here so HTTP workers never wait on audio
+        self.voice_jobs = JobManager(
+            max_workers=config["VOICE_PROMPT_WORKERS"],
+            max_pending=config["VOICE_PROMPT_MAX_PENDING"],
+            backend=self.sessions.backend,  # Shared, so whichever worker a poll reaches can answer it
+        )
+
+    def shutdown(self):
+        self.voice_jobs.shutdown()
+        self.sessions.shutdown()
+        self.progress.close()
+
+# The current app's LearnerState, inside a request or voice loop (see in_app_context)
+progress = LocalProxy(lambda: current_app.extensions["learners"].progress)
+sessions = LocalProxy(lambda: current_app.extensions["learners"].sessions)
+state_responses = LocalProxy(lambda: current_app.extensions["learners"].state_responses)
+voice_jobs = LocalProxy(lambda: current_app.extensions["learners"].voice_jobs)
+
+# Seconds between keep-alive comments on idle /api/stream connections
+STREAM_HEARTBEAT = 15
+# Open /api/stream connections in this process, against the MAX_STREAMS setting
+_open_streams = 0
+_open_streams_lock = threading.Lock()
+
+# Serialized API bodies keyed by resource and version, see responses.py
+prepared_responses = ResponseCache()
+# Full-text index over both catalogs, created on first search and rebuilt when either reloads
+_topic_search = None
+_topic_search_lock = threading.Lock()
+# /api/search results returned by default and at most
+SEARCH_LIMIT = 10
+MAX_SEARCH_LIMIT = 50
+# Local lesson videos in the hearing catalog, created on first use
+_hearing_media = None
+# Fingerprinted files from static/, loaded on first use, and the templates pages are pre-rendered from
+_static_assets = None
+page_templates = TemplateWatcher()
+# Course lists change only with the catalog; clients revalidate with their ETag after that
+COURSE_CACHE_CONTROL = "public, max-age=300"
+# State is per learner and changes any time; always revalidate
+STATE_CACHE_CONTROL = "private, no-cache"
+# Pre-rendered pages are the same for everyone; their assets are cached for good, see assets.py
+PAGE_CACHE_CONTROL = "public, max-age=300"
+
+# Session cookies carry the learner id that progress is keyed by, so without SECRET_KEY
+# the app generates a key once and keeps it here rather than changing it every start
+SECRET_KEY_FILE = os.environ.get("SECRET_KEY_FILE", os.path.join(BASE_DIR, "secret_key"))
+
+USER_TYPE_PROMPT = "Hello! Are you visually impaired? Please say yes or no. Hearing-impaired users, wait for text instructions."
+# Course prompts list the visual catalog's courses in place of {courses}, see course_prompts()
+COURSE_PROMPTS = [
+    "Welcome! To start, please choose a course: {courses}.",
+    "I’m listening, go ahead and choose {courses}.",
+    "Let’s begin. Which course would you like? {courses}?"
+]
+RETRY_COURSE_PROMPTS = [
+    "I didn’t hear you clearly. Please choose {courses}.",
+    "Let’s try that again. Say {courses}, please.",
+    "I’m sorry, I didn’t catch that. Which course: {courses}?"
+]
+COURSE_CHOICE_PROMPT = "Say {courses}."
+COURSE_STARTED_PROMPT = "Got it, starting the {course} course."
+SEARCH_PROMPT = "What topic are you looking for? Say a few words from its title."
+RESUME_PROMPT = "Say yes to continue, or no to choose a course."
+NAVIGATION_PROMPTS = [
+    "What would you like to do next? Say repeat, next, previous, search, or stop.",
+    "I’m listening. You can say repeat, next, previous, search, or stop.",
+    "What’s your next step? Say repeat, next, previous, search, or stop."
+]
+RETRY_NAVIGATION_PROMPTS = [
+    "I didn’t hear that clearly. Please say repeat, next, previous, search, or stop.",
+    "Let’s try again. Say repeat, next, previous, search, or stop."
+]
+# Every fixed sentence spoken by the voice flows, pre-rendered by `python tts_cache.py`
+FIXED_PROMPTS = [
+    USER_TYPE_PROMPT,
+    "Say yes or no.",
+    "Got it, you said yes.",
+    "Understood, you said no.",
+    "I couldn’t hear you clearly. I’ll assume you’re visually impaired and proceed.",
+    RESUME_PROMPT,
+    "Couldn’t recognize a course after several tries. Please restart the app.",
+    "Repeating the topic.",
+    "Moving to the next topic.",
+    "Going back to the previous topic.",
+    "You’re at the first topic. You can say repeat, next, or stop.",
+    "Stopping the course. Goodbye.",
+    "I couldn’t understand after a few tries. Let’s try again.",
+    "You’ve completed all topics. Goodbye.",
+    SEARCH_PROMPT,
+] + NAVIGATION_PROMPTS + RETRY_NAVIGATION_PROMPTS
+
+def available_courses():
+    """
+    Course names in the visual catalog, in catalog order.
+    """
+    return list(visual_catalog())
+
+def spoken_list(names):
+    """
+    ["Python", "Java", "Rust"] -> "Python, Java or Rust"
+    """
+    names = list(names)
+    if len(names) < 2:
+        return "".join(names)
+    return ", ".join(names[:-1]) + " or " + names[-1]
+
+def course_prompts(templates):
+    courses = spoken_list(available_courses())
+    return [template.format(courses=courses) for template in templates]
+
+def voice_prompts():
+    """
+    FIXED_PROMPTS plus the course prompts for the current catalog; texts not
+    pre-rendered (e.g. after a course was added) are synthesized live.
+    """
+    return FIXED_PROMPTS + course_prompts(COURSE_PROMPTS + RETRY_COURSE_PROMPTS + [COURSE_CHOICE_PROMPT]) + [
+        COURSE_STARTED_PROMPT.format(course=course) for course in available_courses()
+    ]
+
+HTTP_REQUESTS = metrics.counter("http_requests", "HTTP requests handled, by endpoint, method and status.",
+                                ["endpoint", "method", "status"])
+HTTP_SECONDS = metrics.histogram("http_request_seconds", "Time until the response is returned (first byte for streams).", ["endpoint"])
+metrics.gauge("navigation_sessions", "Learner navigation sessions held in memory.", function=lambda: len(sessions))
+PAGE_RENDERS = metrics.counter("page_renders", "Cached pages rendered from their template.", ["template"])
+metrics.gauge("progress_pending", "Learner progress entries buffered for the next write.", function=lambda: progress.pending)
+metrics.gauge("state_streams_open", "Open /api/stream connections in this process.", function=lambda: _open_streams)
+metrics.gauge("voice_prompt_jobs_active", "Voice prompt jobs queued or running.", function=lambda: voice_jobs.active)
+
+def load_secret_key(path=SECRET_KEY_FILE):
+    """
+    SECRET_KEY from the environment, otherwise the key saved in path, which is
+    created on first start. Every worker and every restart signs alike.
+    """
+    key = os.environ.get("SECRET_KEY")
+    if key:
+        return key
+    print(f"Warning: SECRET_KEY is not set; signing sessions with the key in {path}")
+    try:
+        if not os.path.exists(path):
+            # Linked into place from a private file, so workers starting together end up with one key
+            temporary = f"{path}.{os.getpid()}.tmp"
+            fd = os.open(temporary, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, "w") as f:
+                f.write(secrets.token_hex(32))
+            try:
+                os.link(temporary, path)
+            except FileExistsError:
+                pass
+            finally:
+                os.remove(temporary)
+        with open(path) as f:
+            key = f.read().strip()
+        if key:
+            return key
+        print(f"{path} is empty")
+    except OSError as e:
+        print(f"Could not keep a secret key in {path}: {str(e)}")
+    print("Warning: using a random key; learners will lose their sessions and progress when the app restarts")
+    return secrets.token_hex(32)
+
+def create_app(config=None):
+    """
+    Application factory. Content, search and the speech stack all load lazily
+    on first use, so creating the app only costs Flask itself.
+    """
+    app = Flask(__name__)
+    app.config.update(DEFAULT_CONFIG)
+    app.config['USE_X_SENDFILE'] = MEDIA_X_SENDFILE
+    # Pages are rendered once per template edit, so checking templates for changes costs nothing per request
+    app.config['TEMPLATES_AUTO_RELOAD'] = True
+    if config:
+        app.config.update(config)
+    if not app.secret_key:
+        app.secret_key = load_secret_key()
+    app.extensions["learners"] = LearnerState(app.config)
+    app.register_blueprint(bp)
+    return app
+
+def shutdown(app):
+    """
+    Cancel app's voice prompt jobs and voice loops and write buffered progress.
+    Servers call this as they stop: atexit handlers would only run after
+    Python has waited for the running jobs to finish on their own.
+    """
+    app.extensions["learners"].shutdown()
+
+def in_app_context(target):
+    """
+    target wrapped to run inside the current app's context, e.g. on a voice loop thread.
+    """
+    app = current_app._get_current_object()
+
+    def run(*args, **kwargs):
+        with app.app_context():
+            return target(*args, **kwargs)
+    return run
+
+@bp.before_app_request
+def start_request_timer():
+    g.request_start = time.perf_counter()
 
-# State for visually impaired navigation
-current_course = None
-current_index = 0
-topics_content = []
+@bp.after_app_request
+def record_request_metrics(response):
+    start = g.pop('request_start', None)
+    if start is not None:
+        endpoint = request.endpoint or "unmatched"  # Raw paths of 404s would explode the label set
+        HTTP_SECONDS.observe(time.perf_counter() - start, endpoint=endpoint)
+        HTTP_REQUESTS.inc(endpoint=endpoint, method=request.method, status=response.status_code)
+    return response
 
-# Global flag to stop voice prompt
-stop_voice_prompt = False
+@bp.route('/metrics', methods=['GET'])
+def metrics_endpoint():
+    """
+    Prometheus scrape target for the counters and histograms in metrics.py.
+    """
+    return Response(metrics.REGISTRY.render(), content_type=metrics.CONTENT_TYPE)
+
+def topic_search():
+    global _topic_search
+    if _topic_search is None:
+        with _topic_search_lock:
+            if _topic_search is None:
+                _topic_search = SearchIndex({"visual": visual_catalog(), "hearing": hearing_catalog()})
+    return _topic_search
+
+def hearing_media():
+    global _hearing_media
+    if _hearing_media is None:
+        _hearing_media = MediaManifest(hearing_catalog())
+    return _hearing_media
+
+def static_assets():
+    global _static_assets
+    if _static_assets is None:
+        _static_assets = AssetManifest()
+    return _static_assets
 
-def ask_user_type():
+@bp.app_template_global()
+def asset_url(name):
+    """
+    URL of a file in static/ under its content-hashed name, for templates.
+    """
+    return url_for('main.static_asset', filename=static_assets().url_name(name))
+
+def cached_page(template, versions=(), context=None, cache_control=PAGE_CACHE_CONTROL):
+    """
+    Serve a page that depends only on its template, the static assets and the
+    given content versions: rendered once per combination, then sent from
+    memory with pre-compressed variants and an ETag. context is a callable
+    returning the template variables, only called when rendering.
+    """
+    assets = static_assets()
+    assets.refresh()
+    key = ("page", template, page_templates.stamp(template), assets.version) + tuple(versions)
+
+    def render():
+        PAGE_RENDERS.inc(template=template)
+        return render_template(template, **(context() if context else {}))
+
+    return send_prepared(prepared_responses.get(key, render, prepare=prepare_html), cache_control)
+
+def current_navigation():
+    """
+    Return the navigation session for the learner making the current request.
+    """
+    learner_id = session.get('learner_id')
+    if not learner_id:
+        learner_id = SessionRegistry.new_session_id()
+        session['learner_id'] = learner_id
+        session.permanent = True  # Keep the id, and with it the learner's progress, across browser restarts
+    return sessions.get(learner_id)
+
+def ask_user_type(cancel_event=None, speech_session=None):
     """
     Function to determine user type via voice or text input.
     Returns 'visually' for visually impaired, 'hearing' for hearing-impaired, 'none' for others.
     """
-    global stop_voice_prompt
-    visually.speak_text("Hello! Are you visually impaired? Please say yes or no. Hearing-impaired users, wait for text instructions.", post_delay=0.5)
+    def interrupted():
+        return cancel_event is not None and cancel_event.is_set()
+
+    if interrupted():
+        return "interrupted"
+    visually.set_speech_session(speech_session)
+    visually.speak_text(USER_TYPE_PROMPT, post_delay=0.5)
     print("Asking user type via voice and text...")
     
-    time.sleep(6.0)  # Ensure prompt is fully spoken
-    
-    response = visually.recognize_command("Say yes or no.", is_course_selection=False).lower().strip()
+    response = visually.recognize_command("Say yes or no.", is_course_selection=False, state="yes_no",
+                                          cancel_event=cancel_event).lower().strip()
     print(f"Final user type recognition result: '{response}'")
     
-    if stop_voice_prompt:
+    if interrupted():
         print("Voice prompt interrupted by form submission")
+        visually.cancel_speech()
         return "interrupted"
     
     words = response.split()
@@ -50,58 +390,87 @@ def ask_user_type():
     visually.speak_text("I couldn’t hear you clearly. I’ll assume you’re visually impaired and proceed.", post_delay=0.5)
     return "visually"
 
-@app.route('/')
+@bp.route('/')
 def index():
     print("Redirecting to /accessibility")
     return redirect('/accessibility')
 
-@app.route('/accessibility', methods=['GET', 'POST'])
+@bp.route('/accessibility', methods=['GET', 'POST'])
 def accessibility():
-    global stop_voice_prompt
-    stop_voice_prompt = False
-    
+    nav = current_navigation()
     if request.method == 'POST':
-        stop_voice_prompt = True
+        interrupt_voice_prompt(nav)
         user_type = request.form.get('user_type', '').lower()
         print(f"Received user type from form: {user_type}")
         if user_type in ["hearing", "none"]:
             print("Rendering index.html for hearing-impaired or normal user")
             return redirect('/homepage')
         print("Invalid user type, rendering accessibility.html")
-        return render_template('accessibility.html')
+        return cached_page('accessibility.html', cache_control="no-cache")
     
     print("Rendering accessibility.html")
-    return render_template('accessibility.html')
+    # Revalidated on every visit, so the learner's voice prompt flag is cleared each time
+    nav.stop_voice_prompt(False)
+    return cached_page('accessibility.html', cache_control="no-cache")
+
+def interrupt_voice_prompt(nav):
+    """
+    A form submission answers the question, so stop this learner's voice prompts.
+    """
+    nav.stop_voice_prompt()
+    voice_jobs.cancel_all(owner=nav.session_id)
+    if visually.loaded:  # Nothing can be speaking before the speech stack is imported
+        visually.cancel_speech(nav.session_id)
 
-@app.route('/start_voice_prompt', methods=['GET'])
+@bp.route('/start_voice_prompt', methods=['GET', 'POST'])
 def start_voice_prompt():
-    global stop_voice_prompt
-    if stop_voice_prompt:
+    nav = current_navigation()
+    if nav.voice_prompt_stopped:
         return jsonify({'status': 'interrupted'})
     
-    user_type_result = ["none"]
-    def run_ask_user_type():
-        result = ask_user_type()
-        user_type_result[0] = result
-    
-    voice_thread = threading.Thread(target=run_ask_user_type, daemon=True)
-    voice_thread.start()
-    
-    voice_thread.join()
+    learner_id = nav.session_id
+    # A reloaded page picks up the prompt already asking this learner, whichever worker runs it
+    job = voice_jobs.get(nav.voice_prompt_job) if nav.voice_prompt_job else None
+    if job is None or not job.pending:
+        # The stop flag may be set by a form submission handled in another worker
+        job = voice_jobs.submit(lambda job: ask_user_type(job.cancel_event, learner_id), owner=learner_id,
+                                cancelled=lambda: nav.voice_prompt_stopped)
+        if job is None:
+            return jsonify({'status': 'busy', 'error': 'Too many voice prompts in progress'}), 503
+        nav.set_voice_prompt_job(job.job_id)
+    return jsonify({'job_id': job.job_id, 'status': job.status, 'poll': f'/voice_prompt/{job.job_id}'}), 202
+
+@bp.route('/voice_prompt/<job_id>', methods=['GET'])
+def voice_prompt_status(job_id):
+    job = voice_jobs.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Unknown voice prompt'}), 404
+    if job.status in ('queued', 'running'):
+        return jsonify({'job_id': job_id, 'status': job.status})
     
-    user_type = user_type_result[0]
+    user_type = job.result
     if user_type == "visually":
         print("Redirecting to /visually")
-        return jsonify({'redirect': '/visually'})
-    elif user_type == "interrupted":
-        return jsonify({'status': 'interrupted'})
+        return jsonify({'job_id': job_id, 'status': job.status, 'redirect': '/visually'})
+    elif user_type == "interrupted" or job.status == 'cancelled':
+        return jsonify({'job_id': job_id, 'status': 'interrupted'})
+    elif job.status == 'failed':
+        return jsonify({'job_id': job_id, 'status': 'failed'})
     
-    return jsonify({'status': 'no_redirect'})
+    return jsonify({'job_id': job_id, 'status': 'no_redirect'})
+
+@bp.route('/voice_prompt/<job_id>', methods=['DELETE'])
+def cancel_voice_prompt(job_id):
+    job = voice_jobs.cancel(job_id, owner=current_navigation().session_id)
+    if job is None:
+        return jsonify({'error': 'Unknown voice prompt'}), 404
+    if visually.loaded:
+        visually.cancel_speech(job.owner)
+    return jsonify({'job_id': job_id, 'status': 'cancelling'})
 
-@app.route('/set_user_type', methods=['POST'])
+@bp.route('/set_user_type', methods=['POST'])
 def set_user_type():
-    global stop_voice_prompt
-    stop_voice_prompt = True
+    interrupt_voice_prompt(current_navigation())
     user_type = request.form.get('user_type', '').lower()
     print(f"Received user type from form: {user_type}")
     if user_type in ["hearing", "none"]:
@@ -110,104 +479,63 @@ def set_user_type():
     print("Invalid user type, rendering accessibility.html")
     return redirect('/accessibility')
 
-@app.route('/homepage')
+@bp.route('/homepage')
 def homepage():
     print("Rendering index.html (homepage)")
-    return render_template('index.html')
+    return cached_page('index.html')
 
-@app.route('/visually', methods=['GET'])
+@bp.route('/visually', methods=['GET'])
 def visually_impaired():
-    global current_course, current_index, topics_content
-    print("Entered /visually route, rendering visual.html")
-    current_course = None
-    current_index = 0
-    topics_content = []
-    
-    voice_thread = threading.Thread(target=voice_navigation, daemon=True)
-    voice_thread.start()
+    nav = current_navigation()
+    print(f"Entered /visually route for session {nav.session_id}, rendering visual.html")
+    sessions.start_voice_loop(nav, in_app_context(voice_navigation), reset=True)
     
-    initial_content = {"title": "Please select a course", "summary": "Say Python or Java to begin.", "example": ""}
-    return render_template('visual.html', courses=visually.course_data, current_course=current_course, current_index=current_index, content=initial_content)
+    courses = available_courses()
+    initial_content = {"title": "Please select a course", "summary": f"Say {spoken_list(courses)} to begin.", "example": ""}
+    return render_template('visual.html', courses=courses, current_course=nav.course, current_index=nav.index, content=initial_content)
 
-def voice_navigation():
-    global current_course, current_index, topics_content
-    available_courses = ["Python", "Java"]
-    
-    course_prompts = [
-        "Welcome! To start, please choose a course: Python or Java.",
-        "I’m listening, go ahead and choose Python or Java.",
-        "Let’s begin. Which course would you like? Python or Java?"
-    ]
-    retry_course_prompts = [
-        "I didn’t hear you clearly. Please choose Python or Java.",
-        "Let’s try that again. Say Python or Java, please.",
-        "I’m sorry, I didn’t catch that. Which course: Python or Java?"
-    ]
-    
-    visually.speak_text(course_prompts[0], post_delay=0.5)
-    
-    attempt = 1
-    max_course_attempts = 4  # Reduced to prevent runaway
-    while attempt <= max_course_attempts:
-        time.sleep(6.0)
-        course_command = visually.recognize_command("Say Python or Java.", is_course_selection=True).lower()
-        print(f"Course selection attempt {attempt}: Recognized course: '{course_command}'")
-        words = course_command.split()
-        for word in words:
-            if word == "python":
-                course_command = "Python"
-                break
-            elif word == "java":
-                course_command = "Java"
-                break
-            else:
-                course_command = ""
-        
-        if course_command in available_courses:
-            visually.speak_text(f"Got it, starting the {course_command} course.", post_delay=0.5)
-            current_course = course_command
-            topics_content = visually.course_data[current_course]
-            current_index = 0
-            break
-        else:
-            print("Invalid course detected.")
-            retry_prompt = retry_course_prompts[attempt % len(retry_course_prompts)]
-            visually.speak_text(retry_prompt, post_delay=0.5)
-            attempt += 1
-            time.sleep(5.0)
-        time.sleep(0.5)
+def voice_navigation(nav):
+    """
+    Voice loop for one learner, holding a microphone stream open for the whole session.
+    """
+    visually.set_speech_session(nav.session_id)
+    nav.microphone = visually.microphone_factory(session=nav.session_id)
+    try:
+        navigate_by_voice(nav)
+    finally:
+        nav.microphone.close()
+        nav.microphone = None
+        visually.set_speech_session(None)
+
+def navigate_by_voice(nav):
+    if not resume_by_voice(nav):
+        select_course_by_voice(nav)
     
-    if not current_course:
+    if nav.stop_requested:
+        return
+    if not nav.course:
         visually.speak_text("Couldn’t recognize a course after several tries. Please restart the app.", post_delay=0.5)
         return
 
-    while current_course and current_index < len(topics_content):
-        topic = topics_content[current_index]
-        content = f"Topic: {topic['title']}. Summary: {topic['summary']}"
-        if "example" in topic:
-            content += f" Example: {topic['example']}"
-        visually.speak_text(content, post_delay=0.5)
-        
-        navigation_prompts = [
-            "What would you like to do next? Say repeat, next, previous, or stop.",
-            "I’m listening. You can say repeat, next, previous, or stop.",
-            "What’s your next step? Say repeat, next, previous, or stop."
-        ]
-        retry_navigation_prompts = [
-            "I didn’t hear that clearly. Please say repeat, next, previous, or stop.",
-            "Let’s try again. Say repeat, next, previous, or stop."
-        ]
+    finished = False
+    while nav.course and not nav.stop_requested and not finished:
+        topic = nav.current_topic()
+        if topic is None:
+            break
+        content = visually.topic_speech(topic)
+        utterance = visually.speak_text(content, post_delay=0.5, priority=visually.PRIORITY_CONTENT)
         
         max_attempts = 3
         attempt = 1
-        while attempt <= max_attempts:
-            time.sleep(6.0)
-            navigation_prompt = navigation_prompts[(current_index + attempt - 1) % len(navigation_prompts)]
-            command = visually.recognize_command(navigation_prompt, is_course_selection=False).lower()
+        while attempt <= max_attempts and not nav.stop_requested:
+            navigation_prompt = NAVIGATION_PROMPTS[(nav.index + attempt - 1) % len(NAVIGATION_PROMPTS)]
+            command = visually.recognize_command(navigation_prompt, is_course_selection=False, microphone=nav.microphone,
+                                                 barge_in=utterance, state="navigation").lower()
+            nav.touch()
             print(f"Navigation attempt {attempt}/{max_attempts}: Recognized command: '{command}'")
             words = command.split()
             for word in words:
-                if word in ["repeat", "next", "previous", "stop"]:
+                if word in NAVIGATION_COMMANDS:
                     command = word
                     break
                 else:
@@ -215,121 +543,302 @@ def voice_navigation():
             
             if command == "repeat":
                 visually.speak_text("Repeating the topic.", post_delay=0.5)
-                visually.speak_text(content, post_delay=0.5)
+                utterance = visually.speak_text(content, post_delay=0.5, priority=visually.PRIORITY_CONTENT)
                 attempt = 1
             elif command == "next":
-                if current_index < len(topics_content) - 1:
+                if nav.move("next"):
                     visually.speak_text("Moving to the next topic.", post_delay=0.5)
-                    current_index += 1
-                    break
                 else:
-                    visually.speak_text("You’ve reached the last topic. You can say repeat, previous, or stop.", post_delay=0.5)
-                attempt = 1
+                    finished = True  # Asked to move on from the last topic
+                break
             elif command == "previous":
-                if current_index > 0:
+                if nav.move("previous"):
                     visually.speak_text("Going back to the previous topic.", post_delay=0.5)
-                    current_index -= 1
                     break
                 else:
                     visually.speak_text("You’re at the first topic. You can say repeat, next, or stop.", post_delay=0.5)
                 attempt = 1
+            elif command == "search":
+                if voice_search(nav):
+                    break
+                attempt = 1
             elif command == "stop":
                 visually.speak_text("Stopping the course. Goodbye.", post_delay=0.5)
-                current_course = None
-                current_index = 0
-                topics_content = []
+                nav.move("stop")
                 return
             else:
-                retry_prompt = retry_navigation_prompts[attempt - 1]
-                visually.speak_text(retry_prompt, post_delay=0.5)
+                retry_prompt = RETRY_NAVIGATION_PROMPTS[attempt - 1]
+                visually.speak_text(retry_prompt, post_delay=0.5, priority=visually.PRIORITY_URGENT, key=visually.RETRY_KEY)
                 attempt += 1
                 if attempt > max_attempts:
-                    visually.speak_text("I couldn’t understand after a few tries. Let’s try again.", post_delay=0.5)
-                time.sleep(5.0)
-            time.sleep(0.5)
-    if current_course:
+                    visually.speak_text("I couldn’t understand after a few tries. Let’s try again.", post_delay=0.5,
+                                        priority=visually.PRIORITY_URGENT, key=visually.RETRY_KEY)
+    if nav.course and not nav.stop_requested:
         visually.speak_text("You’ve completed all topics. Goodbye.", post_delay=0.5)
-        current_course = None
-        current_index = 0
-        topics_content = []
+        progress.complete(nav.session_id, nav.course, len(nav.topics))
+        nav.reset()
+
+def resume_by_voice(nav):
+    """
+    Offer to continue the course the learner left unfinished last time.
+    Returns True if the learner was put back where they stopped.
+    """
+    resume = progress.resume_point(nav.session_id)
+    if resume is None or resume["course"] not in visual_catalog():
+        return False
+    course = resume["course"]
+    topics = visual_catalog().course_view(course)
+    if not topics:
+        return False
+    index = min(resume["index"], len(topics) - 1)
+    visually.speak_text(f"Welcome back. You stopped at topic {index + 1} of {len(topics)} in the {course} course, "
+                        f"{topics[index]['title']}.", post_delay=0.5)
+    answer = visually.recognize_command(RESUME_PROMPT, microphone=nav.microphone, state="yes_no").lower()
+    nav.touch()
+    if answer != "yes" or nav.stop_requested:
+        return False
+    visually.speak_text(f"Continuing the {course} course.", post_delay=0.5)
+    nav.select_course(course, topics, index=index)
+    return True
+
+def select_course_by_voice(nav):
+    # Spoken names (lowercase, as recognized) -> catalog names
+    courses = {course.lower(): course for course in available_courses()}
+    visually.speak_text(course_prompts(COURSE_PROMPTS)[0], post_delay=0.5)
+    retry_prompts = course_prompts(RETRY_COURSE_PROMPTS)
+    
+    attempt = 1
+    max_course_attempts = 4  # Reduced to prevent runaway
+    while attempt <= max_course_attempts and not nav.stop_requested:
+        course_command = visually.recognize_command(course_prompts([COURSE_CHOICE_PROMPT])[0], is_course_selection=True,
+                                                    microphone=nav.microphone, state="course", commands=list(courses)).lower()
+        nav.touch()
+        print(f"Course selection attempt {attempt}: Recognized course: '{course_command}'")
+        course_command = courses.get(course_command, "")
+        
+        if course_command:
+            index = progress.position(nav.session_id, course_command)
+            if index:
+                visually.speak_text(f"Got it, continuing the {course_command} course at topic {index + 1}.", post_delay=0.5)
+            else:
+                visually.speak_text(COURSE_STARTED_PROMPT.format(course=course_command), post_delay=0.5)
+            nav.select_course(course_command, visual_catalog().course_view(course_command), index=index)
+            break
+        else:
+            print("Invalid course detected.")
+            retry_prompt = retry_prompts[attempt % len(retry_prompts)]
+            visually.speak_text(retry_prompt, post_delay=0.5, priority=visually.PRIORITY_URGENT, key=visually.RETRY_KEY)
+            attempt += 1
 
-@app.route('/api/state', methods=['GET'])
+def voice_search(nav):
+    """
+    Ask for a free-form query and jump to the best matching topic.
+    Returns True if the learner was moved to a new topic.
+    """
+    query = visually.recognize_command(SEARCH_PROMPT, microphone=nav.microphone, vocabulary=None)
+    nav.touch()
+    results = topic_search().search(query, limit=1, catalog="visual") if query else []
+    if not results:
+        visually.speak_text(f"I couldn’t find a topic matching {query or 'that'}.", post_delay=0.5)
+        return False
+    match = results[0]
+    visually.speak_text(f"Jumping to {match['title']} in the {match['course']} course.", post_delay=0.5)
+    nav.select_course(match["course"], visual_catalog().course_view(match["course"]), index=match["index"])
+    return True
+
+@bp.route('/api/search', methods=['GET'])
+def search_topics():
+    query = request.args.get('q', '').strip()
+    if not query:
+        return jsonify({"error": "Missing query parameter q"}), 400
+    try:
+        limit = min(max(int(request.args.get('limit', SEARCH_LIMIT)), 1), MAX_SEARCH_LIMIT)
+    except ValueError:
+        return jsonify({"error": "limit must be a whole number"}), 400
+    results = topic_search().search(query, limit=limit, catalog=request.args.get('catalog'), course=request.args.get('course'))
+    return jsonify({"query": query, "results": results})
+
+@bp.route('/api/state', methods=['GET'])
 def get_state():
-    global current_course, current_index, topics_content
-    content = topics_content[current_index] if current_course and topics_content and current_index < len(topics_content) else None
-    return jsonify({
-        'course': current_course,
-        'index': current_index,
-        'total': len(topics_content),
-        'content': content if content else {"title": "No content", "summary": "Please navigate using voice.", "example": ""}
-    })
-
-@app.route('/api/navigate', methods=['POST'])
+    nav = current_navigation()
+    # Topics come from the catalog, so a reload changes the body without changing the session
+    version = (nav.version, visual_catalog().version)
+    prepared = state_responses.get(nav.session_id, version, lambda: state_payload(nav))
+    return send_prepared(prepared, STATE_CACHE_CONTROL)
+
+def state_payload(nav):
+    state = nav.snapshot()
+    if not state['content']:
+        state['content'] = {"title": "No content", "summary": "Please navigate using voice.", "example": ""}
+    return state
+
+@bp.route('/api/stream', methods=['GET'])
+def stream_state():
+    """
+    Server-Sent Events stream of navigation state, pushed on every change.
+    Beyond MAX_STREAMS open streams, answers 503 so the page polls /api/state instead.
+    """
+    global _open_streams
+    nav = current_navigation()
+    try:
+        last_version = int(request.headers.get('Last-Event-ID', -1))
+    except ValueError:
+        last_version = -1
+    max_streams = current_app.config["MAX_STREAMS"]
+    with _open_streams_lock:
+        if max_streams and _open_streams >= max_streams:
+            return jsonify({'error': 'Too many open streams, poll /api/state'}), 503, {'Retry-After': str(STREAM_HEARTBEAT)}
+        _open_streams += 1
+
+    def events():
+        version = last_version
+        while not nav.stop_requested:
+            if nav.version != version:
+                state = state_payload(nav)
+                version = state['version']
+                yield f"id: {version}\ndata: {json.dumps(state)}\n\n"
+            elif nav.wait_for_change(version, timeout=STREAM_HEARTBEAT) == version:
+                nav.touch()
+                yield ": keep-alive\n\n"
+
+    def closed():
+        global _open_streams
+        with _open_streams_lock:
+            _open_streams -= 1
+
+    response = Response(events(), mimetype='text/event-stream', headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+    response.call_on_close(closed)  # Runs even if the client leaves before the first event
+    return response
+
+@bp.route('/api/navigate', methods=['POST'])
 def navigate():
-    global current_course, current_index, topics_content
+    nav = current_navigation()
     command = request.json.get('command', '').lower()
     
-    if not current_course or not topics_content:
+    if not nav.course or not nav.topics:
         return jsonify({'error': 'No course selected'})
 
-    if command == "repeat":
-        topic = topics_content[current_index]
-    elif command == "next":
-        if current_index < len(topics_content) - 1:
-            current_index += 1
-    elif command == "previous":
-        if current_index > 0:
-            current_index -= 1
-    elif command == "stop":
-        current_course = None
-        current_index = 0
-        topics_content = []
+    if command == "stop":
+        nav.move("stop")
         return jsonify({'command': 'stop'})
+    if command in ("next", "previous"):
+        nav.move(command)
     
-    topic = topics_content[current_index]
-    return jsonify({
-        'course': current_course,
-        'index': current_index,
-        'total': len(topics_content),
-        'content': {"title": topic["title"], "summary": topic["summary"] or "No summary available", "example": topic.get("example", "")}
-    })
-
-@app.route('/api/course/<course_name>')
+    state = nav.snapshot()
+    topic = state['content']
+    state['content'] = {"title": topic["title"], "summary": topic["summary"] or "No summary available", "example": topic.get("example", "")}
+    return jsonify(state)
+
+@bp.route('/api/course/<course_name>')
 def get_course_content(course_name):
-    if course_name in visually.course_data:
-        return jsonify(visually.course_data[course_name])
-    elif course_name in hearing.course_data:
-        return jsonify(hearing.course_data[course_name])
+    for store in (visual_catalog(), hearing_catalog()):
+        if course_name in store:
+            prepared = prepared_responses.get(("course", id(store), store.version, course_name), lambda: store[course_name])
+            return send_prepared(prepared, COURSE_CACHE_CONTROL)
     return jsonify({"error": "Course not found"}), 404
 
-@app.route('/hearing')
+@bp.route('/api/media/<course_name>')
+def get_media_manifest(course_name):
+    """
+    Lessons of a hearing course that have a local video, with their URLs, so
+    the player can use them instead of YouTube and prefetch the neighbours.
+    """
+    store = hearing_catalog()
+    if course_name not in store:
+        return jsonify({"error": "Course not found"}), 404
+    manifest = hearing_media()
+    prepared = prepared_responses.get(
+        ("media", store.version, media_signature(), course_name),
+        lambda: [dict(entry, url=url_for('main.serve_media', filename=entry["media"])) for entry in manifest.course(course_name)],
+    )
+    return send_prepared(prepared, COURSE_CACHE_CONTROL)
+
+@bp.route('/media/<path:filename>')
+def serve_media(filename):
+    """
+    Serve a local lesson video. Range and conditional requests get 206/304
+    responses, and the body goes out through the server's file wrapper
+    (sendfile where available) or X-Sendfile when MEDIA_X_SENDFILE is set.
+    """
+    if media_path(filename) is None:
+        abort(404)
+    response = send_from_directory(MEDIA_DIR, filename, conditional=True, max_age=MEDIA_MAX_AGE)
+    prefetch = hearing_media().neighbours(filename)
+    if prefetch:
+        response.headers['Link'] = ", ".join(
+            f"<{url_for('main.serve_media', filename=name)}>; rel=prefetch; as=video" for name in prefetch
+        )
+    return response
+
+@bp.route('/assets/<path:filename>')
+def static_asset(filename):
+    """
+    A file from static/: cached for a year under its fingerprinted name,
+    revalidated under its plain one, pre-compressed either way.
+    """
+    prepared, fingerprinted = static_assets().get(filename)
+    if prepared is None:
+        abort(404)
+    return send_prepared(prepared, ASSET_CACHE_CONTROL if fingerprinted else PLAIN_ASSET_CACHE_CONTROL)
+
+@bp.route('/hearing')
 def hearing_impaired():
-    courses = {
-        "Learn Sign Language": hearing.course_data["Learn Sign Language"],
-        "Indian sign language with Tamil words": hearing.course_data["Indian sign language with Tamil words"],
-        "English Grammar": hearing.course_data["English Grammar"]
-    }
-    return render_template('hearing.html', courses=courses)
-
-@app.route('/courses')
+    # Every course in the catalog; topics are fetched per course through /api/course
+    store = hearing_catalog()
+    store.refresh()
+    return cached_page('hearing.html', (store.version,), lambda: {"courses": list(store)})
+
+@bp.route('/courses')
 def courses():
-    return render_template('courses.html')
+    return cached_page('courses.html')
 
-@app.route('/profile')
+@bp.route('/profile')
 def profile():
-    return render_template('profile.html')
+    return cached_page('profile.html')
 
-@app.route('/dashboard')
+@bp.route('/dashboard')
 def dashboard():
-    return render_template('dashboard.html')
+    nav = current_navigation()
+    started, not_started = dashboard_courses(nav.session_id)
+    return render_template('dashboard.html', started=started, not_started=not_started)
+
+def dashboard_courses(learner_id):
+    """
+    The learner's progress per visual course for the dashboard, most recent
+    first, and the catalog courses they have not started yet.
+    """
+    catalog = visual_catalog()
+    started = []
+    for entry in progress.courses(learner_id):
+        if entry["course"] not in catalog:
+            continue
+        topics = catalog.course_view(entry["course"])
+        total = len(topics) or entry["total"]
+        index = min(entry["index"], total - 1)
+        started.append({
+            "course": entry["course"],
+            "position": index + 1,
+            "total": total,
+            "title": topics[index]["title"] if index < len(topics) else "",
+            "percent": 100 if entry["finished"] else min(100, round(100 * (entry["furthest"] + 1) / total)),
+            "completed": entry["completed"],
+            "finished": entry["finished"],
+            "updated": time.strftime("%d %b %Y, %H:%M", time.localtime(entry["updated"])),
+        })
+    seen = {entry["course"] for entry in started}
+    return started, [course for course in catalog if course not in seen]
 
-@app.route('/contact')
+@bp.route('/contact')
 def contact():
-    return render_template('contact.html')
+    return cached_page('contact.html')
 
-@app.route('/about')
+@bp.route('/about')
 def about():
-    return render_template('about.html')
+    return cached_page('about.html')
 
 if __name__ == '__main__':
-    app.run(host='127.0.0.1', port=5000, debug=True)
\ No newline at end of file
+    application = create_app()
+    try:
+        application.run(host='127.0.0.1', port=5000, debug=True)
+    finally:
+        shutdown(application)
\ No newline at end of file
@@ -0,0 +1,139 @@
+import mimetypes
+import os
+import threading
+import time
+from content_store import BASE_DIR
+from responses import PreparedBody
+
+STATIC_DIR = os.path.join(BASE_DIR, "static")
+TEMPLATE_DIR = os.path.join(BASE_DIR, "templates")
+# Fingerprinted URLs change with their content, so browsers may keep them for a year
+ASSET_CACHE_CONTROL = "public, max-age=31536000, immutable"
+# Assets requested by their plain name (no fingerprint) must be revalidated
+PLAIN_ASSET_CACHE_CONTROL = "public, no-cache"
+# Seconds between checks of static/ and templates/ for edits
+ASSET_CHECK_INTERVAL = 2.0
+# Hex digits of the content hash put into asset file names
+FINGERPRINT_LENGTH = 12
+# Types worth compressing; images and fonts already are
+COMPRESSIBLE_TYPES = {"application/javascript", "text/javascript", "application/json", "image/svg+xml"}
+
+
+def fingerprinted_name(name, digest):
+    """
+    css/theme.css -> css/theme.<hash>.css
+    """
+    stem, extension = os.path.splitext(name)
+    return f"{stem}.{digest[:FINGERPRINT_LENGTH]}{extension}"
+
+
+def compressible(mimetype):
+    return mimetype.startswith("text/") or mimetype in COMPRESSIBLE_TYPES
+
+
+class AssetManifest:
+    """
+    Every file under static/, loaded into memory with pre-compressed variants
+    and served under a content-hashed name, so pages can tell browsers to
+    cache assets indefinitely. Edits are picked up by comparing mtimes, at
+    most once per check_interval; the previous generation stays servable so
+    pages rendered just before an edit still find their assets.
+    """
+
+    def __init__(self, root=STATIC_DIR, check_interval=ASSET_CHECK_INTERVAL):
+        self.root = root
+        self.check_interval = check_interval
+        self.version = 0
+        self._urls = {}  # plain name -> fingerprinted name
+        self._files = {}  # fingerprinted or plain name -> (PreparedBody, fingerprinted)
+        self._previous = {}
+        self._signature = None
+        self._last_check = 0.0
+        self._lock = threading.Lock()
+        self.refresh(force=True)
+
+    def _scan(self):
+        files = {}
+        for directory, _, names in os.walk(self.root):
+            for name in names:
+                path = os.path.join(directory, name)
+                stat = os.stat(path)
+                files[os.path.relpath(path, self.root).replace(os.sep, "/")] = (path, stat.st_mtime_ns, stat.st_size)
+        return files
+
+    def refresh(self, force=False):
+        """
+        Reload static/ if anything in it changed. Returns True when it did.
+        """
+        now = time.monotonic()
+        if not force and now - self._last_check < self.check_interval:
+            return False
+        with self._lock:
+            self._last_check = now
+            try:
+                found = self._scan()
+            except OSError as e:
+                print(f"Could not scan {self.root}: {str(e)}")
+                return False
+            signature = sorted((name, mtime, size) for name, (_, mtime, size) in found.items())
+            if signature == self._signature:
+                return False
+            urls = {}
+            files = {}
+            for name, (path, _, _) in found.items():
+                with open(path, "rb") as f:
+                    body = f.read()
+                mimetype = mimetypes.guess_type(name)[0] or "application/octet-stream"
+                prepared = PreparedBody(body, mimetype, compress=compressible(mimetype))
+                urls[name] = fingerprinted_name(name, prepared.etag)
+                files[urls[name]] = (prepared, True)
+                files[name] = (prepared, False)
+            self._previous = self._files
+            self._urls = urls
+            self._files = files
+            self._signature = signature
+            self.version += 1
+            print(f"Loaded {len(urls)} static assets from {self.root}")
+            return True
+
+    def url_name(self, name):
+        """
+        The fingerprinted name to link name by; unknown names are returned as they are.
+        """
+        self.refresh()
+        return self._urls.get(name, name)
+
+    def get(self, name):
+        """
+        (PreparedBody, fingerprinted) for a requested name, or (None, False).
+        """
+        self.refresh()
+        return self._files.get(name) or self._previous.get(name) or (None, False)
+
+
+class TemplateWatcher:
+    """
+    Change stamps for template files, so pages rendered once can be keyed by
+    the template they came from. Files are stat()ed at most once per check_interval.
+    """
+
+    def __init__(self, root=TEMPLATE_DIR, check_interval=ASSET_CHECK_INTERVAL):
+        self.root = root
+        self.check_interval = check_interval
+        self._stamps = {}  # name -> (stamp, checked at)
+        self._lock = threading.Lock()
+
+    def stamp(self, name):
+        now = time.monotonic()
+        with self._lock:
+            cached = self._stamps.get(name)
+            if cached is not None and now - cached[1] < self.check_interval:
+                return cached[0]
+        try:
+            stat = os.stat(os.path.join(self.root, name))
+            stamp = f"{stat.st_mtime_ns}:{stat.st_size}"
+        except OSError:
+            stamp = None
+        with self._lock:
+            self._stamps[name] = (stamp, now)
+        return stamp
@@ -0,0 +1,370 @@
+"""
+Replay benchmark for the voice navigation loop.
+
+Drives app.voice_navigation with recorded WAVs instead of a microphone, a fake
+synthesizer that "speaks" for as long as the text would take at the configured
+words per minute, and a scripted recognizer backend, then reports per-stage
+latency distributions and the time from a recognized command to the start of
+the spoken response. Runs headless: no PyAudio, speakers or network needed.
+
+    python benchmark.py                      # human-readable report
+    python benchmark.py --json --check       # machine-readable, non-zero exit on budget failures
+"""
+import argparse
+import audioop
+import contextlib
+import glob
+import json
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+import wave
+
+import speech_recognition as sr
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+# Recorded commands replayed in order, one per listen
+DEFAULT_CLIPS = os.path.join(BASE_DIR, "debug_audio_*.wav")
+# Transcripts the scripted recognizer returns, in order, including near misses the
+# command matcher should accept without a retry; the session ends with stop
+DEFAULT_SCRIPT = "pie thon,next,nest,repeat,previews,next,stop"
+# recognize_command outcomes that cost the learner another prompt-and-listen cycle
+RETRY_OUTCOMES = ["unclear", "service_error", "error"]
+# Modules that importing app and calling create_app() must not load
+FORBIDDEN_IMPORTS = ["visually", "hearing", "speech_recognition", "tkinter", "pyttsx3"]
+STAGES = ["prompt", "calibration", "noise_floor", "listen", "recognize", "first_audio", "speak", "command_to_speech"]
+
+IMPORT_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import app
+app.create_app()
+elapsed = time.perf_counter() - start
+print(json.dumps({"seconds": elapsed, "forbidden": [name for name in %r if name in sys.modules]}))
+"""
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    if not ordered:
+        return None
+    index = min(len(ordered) - 1, max(0, int(round(fraction * (len(ordered) - 1)))))
+    return ordered[index]
+
+
+def summarize(values):
+    """
+    Distribution of a list of durations in milliseconds.
+    """
+    if not values:
+        return {"count": 0}
+    return {
+        "count": len(values),
+        "mean": round(sum(values) / len(values) * 1000, 2),
+        "p50": round(percentile(values, 0.5) * 1000, 2),
+        "p90": round(percentile(values, 0.9) * 1000, 2),
+        "p99": round(percentile(values, 0.99) * 1000, 2),
+        "max": round(max(values) * 1000, 2),
+    }
+
+
+def load_clip(path, sample_rate, sample_width):
+    """
+    Raw mono PCM of a WAV converted to the replay format.
+    """
+    with wave.open(path, "rb") as f:
+        frames = f.readframes(f.getnframes())
+        channels, width, rate = f.getnchannels(), f.getsampwidth(), f.getframerate()
+    if channels > 1:
+        frames = audioop.tomono(frames, width, 0.5, 0.5)
+    if width != sample_width:
+        frames = audioop.lin2lin(frames, width, sample_width)
+    if rate != sample_rate:
+        frames, _ = audioop.ratecv(frames, sample_width, 1, rate, sample_rate, None)
+    return frames
+
+
+class ReplayStream:
+    """
+    Stand-in for a PyAudio input stream: a little room noise, the current clip,
+    then room noise forever. Reads are paced to time_scale times real time.
+    While source.hold() is true the clip is held back, like a learner waiting
+    for the app to stop talking.
+    """
+
+    def __init__(self, source):
+        self.source = source
+        self.pending = b""
+        self.rng = random.Random(0)
+
+    def noise(self, size):
+        samples = size // self.source.SAMPLE_WIDTH
+        return b"".join(
+            self.rng.randint(-self.source.noise_level, self.source.noise_level).to_bytes(
+                self.source.SAMPLE_WIDTH, "little", signed=True)
+            for _ in range(samples)
+        )
+
+    def queue(self, clip):
+        lead = int(self.source.lead_seconds * self.source.SAMPLE_RATE) * self.source.SAMPLE_WIDTH
+        self.pending = self.noise(lead) + clip
+
+    def read(self, size):
+        size *= self.source.SAMPLE_WIDTH
+        if self.source.hold():
+            chunk = b""
+        else:
+            chunk, self.pending = self.pending[:size], self.pending[size:]
+        if len(chunk) < size:
+            chunk += self.noise(size - len(chunk))
+        time.sleep(size / self.source.SAMPLE_WIDTH / self.source.SAMPLE_RATE * self.source.time_scale)
+        return chunk
+
+
+class ReplayMicrophone(sr.AudioSource):
+    """
+    sr.AudioSource that plays the recorded clips in rotation, one per next_clip().
+    """
+
+    def __init__(self, clips, time_scale, sample_rate=16000, lead_seconds=0.3, noise_level=40, hold=None):
+        self.SAMPLE_RATE = sample_rate
+        self.SAMPLE_WIDTH = 2
+        self.CHUNK = 1024
+        self.time_scale = time_scale
+        self.lead_seconds = lead_seconds
+        self.noise_level = noise_level
+        self.hold = hold or (lambda: False)
+        self.clips = [load_clip(path, sample_rate, self.SAMPLE_WIDTH) for path in clips]
+        self.position = 0
+        self.stream = None
+
+    def next_clip(self):
+        self.stream.queue(self.clips[self.position % len(self.clips)])
+        self.position += 1
+
+    def __enter__(self):
+        self.stream = ReplayStream(self)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stream = None
+
+
+class FakeSynthesizer:
+    """
+    pyttsx3-compatible engine that takes as long as speaking would, without audio.
+    """
+
+    def __init__(self, wpm, time_scale, on_say):
+        self.wpm = wpm
+        self.time_scale = time_scale
+        self.on_say = on_say
+        self.text = ""
+        self.stopped = threading.Event()
+
+    def getProperty(self, name):
+        return "benchmark" if name == "voice" else None
+
+    def setProperty(self, name, value):
+        pass
+
+    def say(self, text):
+        self.text = text
+        self.on_say(text)
+
+    def runAndWait(self):
+        self.stopped.clear()
+        seconds = len(self.text.split()) / self.wpm * 60 * self.time_scale
+        self.stopped.wait(seconds)
+
+    def stop(self):
+        self.stopped.set()
+
+    def save_to_file(self, text, path):
+        raise NotImplementedError("The benchmark synthesizer does not render files")
+
+
+class Benchmark:
+    """
+    Collects stage timings from visually.stage_listeners and pairs each scripted
+    command with the next utterance that starts after it.
+    """
+
+    def __init__(self, args):
+        self.args = args
+        self.samples = {stage: [] for stage in STAGES}
+        self.script = [command.strip() for command in args.script.split(",") if command.strip()]
+        self.commands = []
+        self.command_time = None
+        self.lock = threading.Lock()
+
+    def record(self, stage, seconds):
+        with self.lock:
+            self.samples.setdefault(stage, []).append(seconds)
+
+    def on_say(self, text):
+        with self.lock:
+            if self.command_time is not None:
+                self.samples["command_to_speech"].append(time.perf_counter() - self.command_time)
+                self.command_time = None
+
+    def next_command(self):
+        with self.lock:
+            command = self.script.pop(0) if self.script else "stop"
+            self.commands.append(command)
+            self.command_time = time.perf_counter()
+        return command
+
+    def install(self, visually):
+        """
+        Point the voice pipeline at replayed audio, the fake synthesizer and the script.
+        """
+        benchmark = self
+        clips = sorted(glob.glob(self.args.clips))
+        if not clips:
+            raise SystemExit(f"No recordings match {self.args.clips}")
+
+        class ScriptedBackend(visually.RecognizerBackend):
+            name = "scripted"
+
+            def recognize(self, recognizer, audio, vocabulary=None):
+                return [(benchmark.next_command(), 1.0)]
+
+        class ReplayMicrophoneStream(visually.MicrophoneStream):
+            def __init__(self, session=None):
+                hold = None if benchmark.args.barge_in else visually.speaking
+                super().__init__(microphone=ReplayMicrophone(clips, benchmark.args.time_scale, hold=hold), session=session)
+
+            def __enter__(self):
+                source = super().__enter__()
+                self.microphone.next_clip()
+                return source
+
+        visually.stage_listeners.append(self.record)
+        visually.AUDIO_PLAYER = None  # Always speak live through the fake engine
+        visually.synthesizer_factory = lambda: FakeSynthesizer(self.args.wpm, self.args.time_scale, self.on_say)
+        visually.microphone_factory = ReplayMicrophoneStream
+        visually.recognizer_backends = [ScriptedBackend()]
+        return clips
+
+    def run_session(self):
+        import app
+        import visually
+        from navigation import NavigationSession
+        clips = self.install(visually)
+        # Always start at course selection, leaving progress.sqlite alone
+        application = app.create_app({"PROGRESS_DB": ":memory:", "SECRET_KEY": "benchmark"})
+        print(f"Replaying {len(clips)} recordings for script {','.join(self.script)}")
+        nav = NavigationSession("benchmark")
+        start = time.perf_counter()
+        try:
+            with application.app_context():
+                app.voice_navigation(nav)
+            visually.wait_for_speech(nav.session_id)  # Let the goodbye finish
+            return time.perf_counter() - start
+        finally:
+            app.shutdown(application)
+
+    def recognition_counts(self):
+        import visually
+        attempts = visually.RECOGNITION_ATTEMPTS
+        commands = attempts.value(outcome="recognized") + attempts.value(outcome="barge_in")
+        retries = sum(attempts.value(outcome=outcome) for outcome in RETRY_OUTCOMES)
+        return {"commands": commands, "retries": retries, "retries_per_command": round(retries / max(commands, 1), 3)}
+
+
+def measure_imports(runs):
+    """
+    Time a cold `import app; app.create_app()` in fresh interpreters.
+    """
+    timings = []
+    forbidden = set()
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, "-c", IMPORT_PROBE % (FORBIDDEN_IMPORTS,)],
+            cwd=BASE_DIR, capture_output=True, text=True, check=True,
+        ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        timings.append(result["seconds"])
+        forbidden.update(result["forbidden"])
+    return timings, sorted(forbidden)
+
+
+def parse_budgets(values):
+    budgets = {}
+    for value in values:
+        stage, _, limit = value.partition("=")
+        if stage not in STAGES or not limit:
+            raise SystemExit(f"Budget must look like STAGE=MS with STAGE one of {', '.join(STAGES)}")
+        budgets[stage] = float(limit)
+    return budgets
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay benchmark for the voice navigation loop")
+    parser.add_argument("--clips", default=DEFAULT_CLIPS, help="glob of WAV recordings to replay")
+    parser.add_argument("--script", default=DEFAULT_SCRIPT, help="comma-separated transcripts for the scripted recognizer")
+    parser.add_argument("--time-scale", type=float, default=0.05,
+                        help="fraction of real time that audio playback and capture take")
+    parser.add_argument("--wpm", type=float, default=140, help="speaking rate of the fake synthesizer")
+    parser.add_argument("--barge-in", action="store_true",
+                        help="speak each command over the app instead of after it finishes talking")
+    parser.add_argument("--import-runs", type=int, default=3, help="cold imports of app to time")
+    parser.add_argument("--import-budget-ms", type=float, default=1500, help="p50 budget for importing app")
+    parser.add_argument("--budget", action="append", default=[], metavar="STAGE=MS",
+                        help="p90 budget for a stage, may be repeated")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    parser.add_argument("--check", action="store_true", help="exit non-zero if any budget is exceeded")
+    args = parser.parse_args()
+    budgets = parse_budgets(args.budget)
+
+    os.environ.setdefault("DEBUG_AUDIO", "off")  # Don't fill debug_audio/ with replayed clips
+    import_timings, forbidden = measure_imports(args.import_runs)
+    benchmark = Benchmark(args)
+    # Keep stdout parseable: the pipeline's own logging goes to stderr in --json mode
+    with contextlib.redirect_stdout(sys.stderr if args.json else sys.stdout):
+        session_seconds = benchmark.run_session()
+
+    report = {
+        "time_scale": args.time_scale,
+        "barge_in": args.barge_in,
+        "commands": benchmark.commands,
+        "session_seconds": round(session_seconds, 3),
+        "recognition": benchmark.recognition_counts(),
+        "import": dict(summarize(import_timings), forbidden_modules=forbidden),
+        "stages": {stage: summarize(values) for stage, values in benchmark.samples.items()},
+    }
+    failures = []
+    if forbidden:
+        failures.append(f"importing app loaded {', '.join(forbidden)}")
+    if report["import"]["p50"] > args.import_budget_ms:
+        failures.append(f"import p50 {report['import']['p50']} ms > {args.import_budget_ms} ms")
+    for stage, limit in budgets.items():
+        p90 = report["stages"][stage].get("p90")
+        if p90 is not None and p90 > limit:
+            failures.append(f"{stage} p90 {p90} ms > {limit} ms")
+    report["failures"] = failures
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print(f"\nCommands: {', '.join(benchmark.commands)}  (session {session_seconds:.2f} s at time scale {args.time_scale})")
+        recognition = report["recognition"]
+        print(f"Recognized {recognition['commands']} commands with {recognition['retries']} retries")
+        print(f"{'stage':<20}{'count':>6}{'mean':>10}{'p50':>10}{'p90':>10}{'p99':>10}{'max':>10}  (ms)")
+        for stage, stats in [("import", report["import"])] + list(report["stages"].items()):
+            if stats["count"]:
+                print(f"{stage:<20}{stats['count']:>6}{stats['mean']:>10}{stats['p50']:>10}{stats['p90']:>10}{stats['p99']:>10}{stats['max']:>10}")
+            else:
+                print(f"{stage:<20}{0:>6}")
+        for failure in failures:
+            print(f"Budget exceeded: {failure}")
+    if args.check and failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
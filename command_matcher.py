@@ -0,0 +1,140 @@
+import re
+from navigation import NAVIGATION_COMMANDS
+
+# Commands accepted in each fixed dialogue state; recognizers are also constrained to these words.
+# Course selection accepts the catalog's course names, passed to matcher_for() by the caller.
+VOCABULARIES = {
+    "navigation": NAVIGATION_COMMANDS,
+    "yes_no": ["yes", "no"],
+}
+# Other words learners use for a command, matched as if they were the command itself. Words that
+# also turn up in ordinary lesson speech ("end", "look", "before") are left out.
+ALIASES = {
+    "yes": ["yeah", "yep", "yup", "sure", "correct"],
+    "no": ["nope", "nah"],
+    "next": ["forward", "skip", "continue"],
+    "previous": ["back"],
+    "repeat": ["again", "replay"],
+    "stop": ["quit", "exit"],
+    "search": ["find"],
+}
+# Least similarity (0-1, after rank weighting) accepted as a command
+MATCH_THRESHOLD = 0.7
+# Lead the best command needs over the runner-up, otherwise the utterance is ambiguous
+AMBIGUITY_MARGIN = 0.1
+# Weight of the n-th recognizer alternative relative to the one before it; kept well under
+# 1 - AMBIGUITY_MARGIN so an exact hit always beats an exact hit one rank further down
+RANK_DECAY = 0.85
+# Slack for float rounding when comparing scores against the margin
+SCORE_TOLERANCE = 1e-9
+
+TOKEN_PATTERN = re.compile(r"[a-z]+")
+# Spelling-to-sound rewrites applied in order, enough to make "pie thon" sound like "python"
+PHONETIC_RULES = [
+    (re.compile(r"^kn"), "n"), (re.compile(r"^wr"), "r"), (re.compile(r"ph"), "f"), (re.compile(r"ck"), "k"),
+    (re.compile(r"x"), "ks"), (re.compile(r"q"), "k"), (re.compile(r"c(?=[eiy])"), "s"), (re.compile(r"c"), "k"),
+    (re.compile(r"z"), "s"), (re.compile(r"(ie|ee|ea|ey|y)"), "i"), (re.compile(r"(oo|ou|ew)"), "u"),
+    (re.compile(r"(ow|oa)"), "o"), (re.compile(r"(?<=[^aeiou])h"), ""), (re.compile(r"(.)\1+"), r"\1"),
+]
+
+
+def phonetic(word):
+    """
+    Rough pronunciation key: words that sound alike map to similar strings.
+    """
+    for pattern, replacement in PHONETIC_RULES:
+        word = pattern.sub(replacement, word)
+    return word
+
+
+def edit_distance(a, b):
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char_a != char_b)))
+        previous = current
+    return previous[-1]
+
+
+def similarity(a, b):
+    if a == b:
+        return 1.0
+    if not a or not b:
+        return 0.0
+    return 1.0 - edit_distance(a, b) / max(len(a), len(b))
+
+
+class CommandMatcher:
+    """
+    Picks the command meant by a list of recognizer alternatives, scoring every
+    word and adjacent word pair of every alternative against the vocabulary by
+    spelling and by sound, so near misses like "nest" or "pie thon" still count.
+    A near miss must begin with the same letter or sound as the command.
+    """
+
+    def __init__(self, vocabulary, aliases=ALIASES, threshold=MATCH_THRESHOLD, margin=AMBIGUITY_MARGIN):
+        self.vocabulary = list(vocabulary)
+        self.threshold = threshold
+        self.margin = margin
+        # (spelling, pronunciation, command) for each command and its aliases
+        self._forms = []
+        for command in self.vocabulary:
+            for form in [command] + list(aliases.get(command, [])):
+                # Spaces dropped, so "data science" compares with the joined pair "datascience"
+                form = "".join(TOKEN_PATTERN.findall(form.lower()))
+                self._forms.append((form, phonetic(form), command))
+
+    def _candidates(self, transcript):
+        tokens = TOKEN_PATTERN.findall(transcript.lower())
+        # Adjacent pairs catch words the recognizer split, e.g. "pie thon"
+        return tokens + [first + second for first, second in zip(tokens, tokens[1:])]
+
+    def score(self, alternatives):
+        """
+        Best score per command over all alternatives, highest first.
+        """
+        scores = {}
+        for rank, (transcript, _) in enumerate(alternatives):
+            weight = RANK_DECAY ** rank
+            for candidate in self._candidates(transcript):
+                sound = phonetic(candidate)
+                for form, form_sound, command in self._forms:
+                    value = max(similarity(candidate, form), similarity(sound, form_sound))
+                    # Near misses must start like the command: "nest" is next, "text" is not
+                    if value < 1.0 and candidate[0] != form[0] and sound[:1] != form_sound[:1]:
+                        continue
+                    value *= weight
+                    if value > scores.get(command, 0.0):
+                        scores[command] = value
+        return sorted(scores.items(), key=lambda item: -item[1])
+
+    def match(self, alternatives):
+        """
+        Return (command, score), or (None, score) when nothing is close enough
+        or two commands are too close to call.
+        """
+        ranked = self.score(alternatives)
+        if not ranked:
+            return None, 0.0
+        command, best = ranked[0]
+        runner_up = ranked[1][1] if len(ranked) > 1 else 0.0
+        if best < self.threshold or best - runner_up < self.margin - SCORE_TOLERANCE:
+            return None, best
+        return command, best
+
+
+_matchers = {}
+
+
+def matcher_for(state, commands=None):
+    """
+    Shared matcher for a dialogue state: "navigation" or "yes_no", or any other
+    state given its commands, e.g. "course" with the catalog's course names.
+    The matcher is rebuilt when the commands change.
+    """
+    vocabulary = list(VOCABULARIES[state] if commands is None else commands)
+    matcher = _matchers.get(state)
+    if matcher is None or matcher.vocabulary != vocabulary:
+        matcher = _matchers[state] = CommandMatcher(vocabulary)
+    return matcher
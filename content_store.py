@@ -0,0 +1,252 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Mapping, Sequence
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+VISUAL_CATALOG = os.environ.get("VISUAL_CATALOG", os.path.join(BASE_DIR, "visual.json"))
+HEARING_CATALOG = os.environ.get("HEARING_CATALOG", os.path.join(BASE_DIR, "hearing.json"))
+
+INDEX_SCHEMA = """
+CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE courses (name TEXT PRIMARY KEY, position INTEGER NOT NULL, topic_count INTEGER NOT NULL);
+CREATE TABLE topics (
+    course TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    payload TEXT NOT NULL,
+    PRIMARY KEY (course, position)
+) WITHOUT ROWID;
+"""
+
+
+class CourseView(Sequence):
+    """
+    Read-only list of a course's topics that fetches each topic from the store
+    on access, so it always reflects the latest catalog.
+    """
+
+    def __init__(self, store, course):
+        self.store = store
+        self.course = course
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        topic = self.store.get_topic(self.course, index)
+        if topic is None:
+            raise IndexError(index)
+        return topic
+
+    def __len__(self):
+        return self.store.topic_count(self.course)
+
+
+class ContentStore(Mapping):
+    """
+    Course catalog backed by a JSON file and an SQLite index built next to it.
+
+    The JSON is only parsed when the index is missing or older than the file;
+    otherwise courses are read from the index on first use. Edits to the JSON
+    are picked up by comparing its mtime, at most once per check_interval.
+    Behaves like the {course: [topic, ...]} dict the flows used to load.
+    """
+
+    def __init__(self, json_path, index_path=None, check_interval=2.0, max_cached_courses=32):
+        self.json_path = json_path
+        self.index_path = index_path or json_path + ".index.sqlite"
+        self.check_interval = check_interval
+        self.max_cached_courses = max_cached_courses
+        self.version = 0
+        self.digest = None
+        self._course_names = []
+        self._topic_counts = {}
+        self._courses = OrderedDict()
+        self._lock = threading.RLock()
+        self._local = threading.local()
+        self._last_check = 0.0
+        self._source_stamp = None
+        self.refresh(force=True)
+
+    def _source_signature(self):
+        stat = os.stat(self.json_path)
+        return f"{stat.st_mtime_ns}:{stat.st_size}"
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.version != self.version:
+            if conn is not None:
+                conn.close()
+            conn = sqlite3.connect(f"file:{self.index_path}?mode=ro", uri=True, check_same_thread=False)
+            self._local.conn = conn
+            self._local.version = self.version
+        return conn
+
+    def _read_meta(self):
+        try:
+            conn = sqlite3.connect(f"file:{self.index_path}?mode=ro", uri=True)
+        except sqlite3.Error:
+            return {}
+        try:
+            return dict(conn.execute("SELECT key, value FROM meta"))
+        except sqlite3.Error:
+            return {}
+        finally:
+            conn.close()
+
+    def _build_index(self, signature):
+        with open(self.json_path, "rb") as f:
+            raw = f.read()
+        data = json.loads(raw)
+        tmp_path = f"{self.index_path}.{os.getpid()}.tmp"
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        conn = sqlite3.connect(tmp_path)
+        try:
+            conn.executescript(INDEX_SCHEMA)
+            for position, (name, topics) in enumerate(data.items()):
+                conn.execute("INSERT INTO courses VALUES (?, ?, ?)", (name, position, len(topics)))
+                conn.executemany(
+                    "INSERT INTO topics VALUES (?, ?, ?)",
+                    ((name, i, json.dumps(topic)) for i, topic in enumerate(topics)),
+                )
+            conn.executemany("INSERT INTO meta VALUES (?, ?)", [
+                ("source", signature),
+                ("digest", hashlib.sha256(raw).hexdigest()),
+            ])
+            conn.commit()
+        finally:
+            conn.close()
+        os.replace(tmp_path, self.index_path)
+        print(f"Indexed {len(data)} courses from {self.json_path}")
+
+    def refresh(self, force=False):
+        """
+        Rebuild the index and drop cached courses if the JSON changed on disk.
+        Returns True when new content was loaded.
+        """
+        now = time.monotonic()
+        if not force and now - self._last_check < self.check_interval:
+            return False
+        with self._lock:
+            self._last_check = now
+            try:
+                signature = self._source_signature()
+            except OSError:
+                if force:
+                    raise
+                return False
+            if signature == self._source_stamp:
+                return False
+            meta = self._read_meta()
+            if meta.get("source") != signature:
+                try:
+                    self._build_index(signature)
+                except (OSError, ValueError) as e:
+                    if force:
+                        raise
+                    print(f"Keeping previous content, could not reload {self.json_path}: {str(e)}")
+                    self._source_stamp = signature  # Retry once the file changes again
+                    return False
+                meta = self._read_meta()
+            self._source_stamp = signature
+            self.digest = meta.get("digest")
+            self.version += 1
+            conn = self._connect()
+            rows = conn.execute("SELECT name, topic_count FROM courses ORDER BY position").fetchall()
+            self._course_names = [name for name, _ in rows]
+            self._topic_counts = dict(rows)
+            self._courses.clear()
+            if not force:
+                print(f"Reloaded content from {self.json_path}")
+            return True
+
+    def get_course(self, course):
+        """
+        All topics of course as a list, loaded from the index on first use.
+        """
+        self.refresh()
+        with self._lock:
+            topics = self._courses.get(course)
+            if topics is not None:
+                self._courses.move_to_end(course)
+                return topics
+            if course not in self._topic_counts:
+                raise KeyError(course)
+            rows = self._connect().execute(
+                "SELECT payload FROM topics WHERE course = ? ORDER BY position", (course,)
+            ).fetchall()
+            topics = [json.loads(payload) for payload, in rows]
+            self._courses[course] = topics
+            if len(self._courses) > self.max_cached_courses:
+                self._courses.popitem(last=False)
+            return topics
+
+    def get_topic(self, course, index):
+        """
+        Topic number index of course, or None if it does not exist.
+        """
+        self.refresh()
+        with self._lock:
+            topics = self._courses.get(course)
+            if topics is not None:
+                return topics[index] if 0 <= index < len(topics) else None
+            row = self._connect().execute(
+                "SELECT payload FROM topics WHERE course = ? AND position = ?", (course, index)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def topic_count(self, course):
+        self.refresh()
+        return self._topic_counts.get(course, 0)
+
+    def course_view(self, course):
+        if course not in self:
+            raise KeyError(course)
+        return CourseView(self, course)
+
+    def __getitem__(self, course):
+        return self.get_course(course)
+
+    def __contains__(self, course):
+        self.refresh()
+        return course in self._topic_counts
+
+    def __iter__(self):
+        self.refresh()
+        return iter(list(self._course_names))
+
+    def __len__(self):
+        self.refresh()
+        return len(self._course_names)
+
+
+_catalogs = {}
+_catalogs_lock = threading.Lock()
+
+
+def shared_catalog(json_path):
+    """
+    Process-wide ContentStore for json_path, created on first use.
+    """
+    store = _catalogs.get(json_path)
+    if store is None:
+        with _catalogs_lock:
+            store = _catalogs.get(json_path)
+            if store is None:
+                store = ContentStore(json_path)
+                _catalogs[json_path] = store
+    return store
+
+
+def visual_catalog():
+    return shared_catalog(VISUAL_CATALOG)
+
+
+def hearing_catalog():
+    return shared_catalog(HEARING_CATALOG)
@@ -0,0 +1,114 @@
+import gzip
+import os
+import queue
+import threading
+import time
+from content_store import BASE_DIR
+
+# Which captures to keep: "all", "failures" (unrecognized audio only) or "off"
+DEBUG_AUDIO_MODE = os.environ.get("DEBUG_AUDIO", "failures")
+DEBUG_AUDIO_DIR = os.environ.get("DEBUG_AUDIO_DIR", os.path.join(BASE_DIR, "debug_audio"))
+# Keep one capture in N among those the mode selects
+DEBUG_AUDIO_SAMPLE_EVERY = int(os.environ.get("DEBUG_AUDIO_SAMPLE_EVERY", 1))
+DEBUG_AUDIO_MAX_BYTES = int(os.environ.get("DEBUG_AUDIO_MAX_BYTES", 50 * 1024 * 1024))
+DEBUG_AUDIO_MAX_AGE = float(os.environ.get("DEBUG_AUDIO_MAX_AGE_DAYS", 7)) * 24 * 60 * 60
+
+
+class DebugAudioRecorder:
+    """
+    Saves captured command audio for debugging on a background thread, so the
+    listen -> recognize path only pays for a non-blocking queue put.
+    """
+
+    def __init__(self, directory=DEBUG_AUDIO_DIR, mode=DEBUG_AUDIO_MODE, sample_every=DEBUG_AUDIO_SAMPLE_EVERY,
+                 max_bytes=DEBUG_AUDIO_MAX_BYTES, max_age=DEBUG_AUDIO_MAX_AGE, max_pending=8, sample_rate=16000):
+        self.directory = directory
+        self.mode = mode
+        self.sample_every = max(1, sample_every)
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        # Captures are stored at the rate recognizers use, not the microphone's
+        self.sample_rate = sample_rate
+        self.dropped = 0
+        self._seen = 0
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def record(self, audio, transcript=None):
+        """
+        Queue audio for saving; transcript is None for failed recognitions.
+        Returns False if the capture was skipped or dropped.
+        """
+        if self.mode == "off" or audio is None:
+            return False
+        if self.mode == "failures" and transcript:
+            return False
+        with self._lock:
+            self._seen += 1
+            if self._seen % self.sample_every:
+                return False
+            sequence = self._seen
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._worker, name="debug-audio", daemon=True)
+                self._thread.start()
+        try:
+            self._queue.put_nowait((time.time(), sequence, audio, transcript))
+            return True
+        except queue.Full:
+            self.dropped += 1
+            return False
+
+    def _worker(self):
+        os.makedirs(self.directory, exist_ok=True)
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            timestamp, sequence, audio, transcript = item
+            label = "_".join(transcript.lower().split())[:32] if transcript else "unrecognized"
+            path = os.path.join(self.directory, f"debug_audio_{int(timestamp * 1000)}_{sequence}_{label}.wav.gz")
+            try:
+                with gzip.open(path, "wb", compresslevel=6) as f:
+                    f.write(audio.get_wav_data(convert_rate=self.sample_rate, convert_width=2))
+                print(f"Saved audio to {path} for debugging")
+                self.rotate()
+            except Exception as e:
+                print(f"Could not save debug audio: {str(e)}")
+            finally:
+                self._queue.task_done()
+
+    def rotate(self):
+        """
+        Delete captures older than max_age, then the oldest until under max_bytes.
+        """
+        entries = []
+        for name in os.listdir(self.directory):
+            if not name.startswith("debug_audio_"):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        entries.sort()
+        cutoff = time.time() - self.max_age
+        total = sum(size for _, size, _ in entries)
+        for mtime, size, path in entries:
+            if mtime >= cutoff and total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+
+    def flush(self):
+        self._queue.join()
+
+    def close(self):
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join()
+            self._thread = None
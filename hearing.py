@@ -1,27 +1,44 @@
-import tkinter as tk
-from tkinter import messagebox
 import webbrowser
 import json
+import pathlib
+from content_store import hearing_catalog, HEARING_CATALOG
+from media import media_path
 
 # Set the path to the JSON file
-JSON_FILE_PATH = "hearing.json"
+JSON_FILE_PATH = HEARING_CATALOG
 
-# Load course data from the JSON file
+# Tk is imported by load_tk() so that importing this module never loads GUI libraries
+tk = None
+messagebox = None
+# Message shown by the Tk reader if the course data could not be loaded
+load_error = None
+
+# Load course data from the JSON file, indexed on disk and reloaded when it changes
 try:
-    with open(JSON_FILE_PATH, 'r') as file:
-        course_data = json.load(file)
+    course_data = hearing_catalog()
     print("Course data loaded successfully from", JSON_FILE_PATH)
 except FileNotFoundError:
     print(f"Error: The file {JSON_FILE_PATH} was not found.")
-    messagebox.showerror("Error", f"The file {JSON_FILE_PATH} was not found.")
+    load_error = f"The file {JSON_FILE_PATH} was not found."
     course_data = {}  # Fallback to empty dict if file not found
 except json.JSONDecodeError:
     print(f"Error: The file {JSON_FILE_PATH} contains invalid JSON.")
-    messagebox.showerror("Error", f"The file {JSON_FILE_PATH} contains invalid JSON.")
+    load_error = f"The file {JSON_FILE_PATH} contains invalid JSON."
     course_data = {}  # Fallback to empty dict if JSON is invalid
 
+def load_tk():
+    """
+    Import tkinter on first use of the desktop reader.
+    """
+    global tk, messagebox
+    if tk is None:
+        import tkinter
+        from tkinter import messagebox as tk_messagebox
+        tk, messagebox = tkinter, tk_messagebox
+
 class SignLanguageCourseApp:
     def __init__(self, root):
+        load_tk()
         self.root = root
         self.root.title("Sign Language Course Reader")
         self.root.geometry("600x400")
@@ -69,7 +86,9 @@ class SignLanguageCourseApp:
         if self.video_list:
             video = self.video_list[self.current_video_index]
             self.video_label.config(text=video["title"])
-            webbrowser.open(video["url"])  # Opens video in default browser
+            path = media_path(video["media"]) if video.get("media") else None
+            # Local copy plays instantly and offline; otherwise open the online video
+            webbrowser.open(pathlib.Path(path).as_uri() if path else video["url"])
         else:
             self.video_label.config(text="No videos available")
 
@@ -95,6 +114,9 @@ class SignLanguageCourseApp:
         self.next_button.config(state=tk.NORMAL if self.current_video_index < len(self.video_list) - 1 else tk.DISABLED)
 
 if __name__ == "__main__":
+    load_tk()
     root = tk.Tk()
+    if load_error:
+        messagebox.showerror("Error", load_error)
     app = SignLanguageCourseApp(root)
     root.mainloop()
\ No newline at end of file
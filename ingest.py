@@ -0,0 +1,259 @@
+"""
+Batch ingestion: compile a directory of course sources into the content catalogs.
+
+    python ingest.py SOURCE_DIR [--output-dir DIR] [--workers N] [--strict] [--dry-run]
+
+SOURCE_DIR holds one folder per catalog, visual/ and hearing/, each with one
+file per course:
+
+  * .json – a list of topics, {"course": name, "topics": [...]}, or a whole
+    catalog {course: [topics]} such as the current visual.json
+  * .md   – "# Course name", then per topic a "## Title" heading, the summary
+    as text, an optional ``` fenced example and optional "url:" / "media:" lines
+
+Files are parsed and normalized in a process pool, then merged in file name
+order, validated and deduplicated, and written to visual.json / hearing.json.
+The running app picks the new catalogs up on its own (see content_store.py).
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import time
+import unicodedata
+from concurrent.futures import ProcessPoolExecutor
+from content_store import BASE_DIR
+
+CATALOGS = ["visual", "hearing"]
+TOPIC_FIELDS = {"title", "summary", "example", "url", "media", "speech_seconds"}
+# Speaking rate used to estimate how long a topic takes to read out, in words per minute
+SPEECH_WPM = 140
+# Spoken text: typographic characters a synthesizer reads badly, mapped to plain equivalents
+SPEAKABLE = {
+    "\u2018": "'", "\u2019": "'", "\u201c": '"', "\u201d": '"', "\u2026": "...",
+    "\u00a0": " ", "\u200b": "", "\u00d7": " times ", "\u00f7": " divided by ",
+    "\u2264": " less than or equal to ", "\u2265": " greater than or equal to ", "\u2260": " not equal to ",
+}
+# A dash between spaces separates clauses, e.g. "characteristics of Python − It supports ..."
+SEPARATOR_DASH = re.compile(r"\s+[\u2212\u2013\u2014]\s+")
+# A minus sign or dash directly before a digit is arithmetic
+MINUS = re.compile(r"[\u2212\u2013](?=\d)")
+WHITESPACE = re.compile(r"[ \t]+")
+URL_PATTERN = re.compile(r"^https?://\S+$")
+
+
+def speakable(text):
+    """
+    Normalize prose for text-to-speech: plain quotes, spoken symbols and clause dashes.
+    """
+    text = unicodedata.normalize("NFKC", text)
+    for symbol, replacement in SPEAKABLE.items():
+        text = text.replace(symbol, replacement)
+    text = SEPARATOR_DASH.sub(": ", text)
+    text = MINUS.sub(" minus ", text)
+    text = text.replace("\u2212", "-").replace("\u2013", "-").replace("\u2014", "-")
+    return WHITESPACE.sub(" ", text).strip()
+
+
+def normalize_code(text):
+    """
+    Examples are code: keep symbols and line breaks, only fix quotes and trailing space.
+    """
+    for symbol in ("\u2018", "\u2019", "\u201c", "\u201d", "\u00a0"):
+        text = text.replace(symbol, SPEAKABLE[symbol])
+    return "\n".join(line.rstrip() for line in text.strip("\n").splitlines())
+
+
+def speech_seconds(topic):
+    """
+    Estimated time to speak a topic the way the voice flow reads it out.
+    """
+    words = len(f"Topic: {topic['title']}. Summary: {topic['summary']} {topic.get('example', '')}".split())
+    return round(words / SPEECH_WPM * 60, 1)
+
+
+def parse_markdown(text, default_course):
+    courses = {}
+    course = default_course
+    topic = None
+    in_code = False
+    code = []
+    for line in text.splitlines():
+        if line.strip().startswith("```"):
+            if in_code and topic is not None:
+                topic["example"] = "\n".join(code)
+            in_code = not in_code
+            code = []
+            continue
+        if in_code:
+            code.append(line)
+        elif line.startswith("# "):
+            course = line[2:].strip()
+        elif line.startswith("## "):
+            topic = {"title": line[3:].strip(), "summary": ""}
+            courses.setdefault(course, []).append(topic)
+        elif topic is not None:
+            key, _, value = line.partition(":")
+            if key.strip().lower() in ("url", "media") and value.strip() and " " not in value.strip():
+                topic[key.strip().lower()] = value.strip()
+            elif line.strip():
+                topic["summary"] = f"{topic['summary']} {line.strip()}".strip()
+    return courses
+
+
+def parse_json(data, default_course):
+    if isinstance(data, list):
+        return {default_course: data}
+    if isinstance(data, dict) and "topics" in data:
+        return {data.get("course") or default_course: data["topics"]}
+    if isinstance(data, dict):
+        return data
+    raise ValueError("expected a list of topics, a course object or a catalog")
+
+
+def validate(topic):
+    """
+    Return a list of problems with a raw topic; empty when it is usable.
+    """
+    if not isinstance(topic, dict):
+        return ["topic is not an object"]
+    problems = []
+    for field in ("title", "summary"):
+        if not isinstance(topic.get(field), str) or not topic[field].strip():
+            problems.append(f"missing {field}")
+    unknown = set(topic) - TOPIC_FIELDS
+    if unknown:
+        problems.append(f"unknown fields {sorted(unknown)}")
+    if "url" in topic and not URL_PATTERN.match(str(topic["url"])):
+        problems.append(f"invalid url {topic['url']!r}")
+    media = topic.get("media")
+    if media is not None and (not isinstance(media, str) or os.path.isabs(media) or ".." in media.split("/")):
+        problems.append(f"media must be a relative path inside MEDIA_DIR, got {media!r}")
+    return problems
+
+
+def compile_file(path):
+    """
+    Parse and normalize one source file. Runs in a worker process.
+    Returns (path, {course: [topic, ...]}, [error, ...]).
+    """
+    default_course = os.path.splitext(os.path.basename(path))[0]
+    errors = []
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            raw = f.read()
+        courses = parse_json(json.loads(raw), default_course) if path.endswith(".json") else parse_markdown(raw, default_course)
+    except (OSError, ValueError) as e:
+        return path, {}, [f"{path}: {str(e)}"]
+    compiled = {}
+    for course, topics in courses.items():
+        if not isinstance(topics, list):
+            errors.append(f"{path}: course {course!r} is not a list of topics")
+            continue
+        clean = []
+        for position, topic in enumerate(topics):
+            problems = validate(topic)
+            if problems:
+                errors.append(f"{path}: {course} topic {position + 1}: {', '.join(problems)}")
+                continue
+            entry = {"title": speakable(topic["title"]), "summary": speakable(topic["summary"])}
+            if topic.get("example"):
+                entry["example"] = normalize_code(topic["example"])
+            for field in ("url", "media"):
+                if topic.get(field):
+                    entry[field] = topic[field]
+            entry["speech_seconds"] = speech_seconds(entry)
+            clean.append(entry)
+        compiled[speakable(course)] = clean
+    return path, compiled, errors
+
+
+def source_files(source_dir, catalog):
+    folder = os.path.join(source_dir, catalog)
+    if not os.path.isdir(folder):
+        return []
+    return sorted(
+        os.path.join(folder, name) for name in os.listdir(folder) if name.endswith((".json", ".md"))
+    )
+
+
+def merge(results):
+    """
+    Combine compiled files in order, dropping repeated topics within a course.
+    Returns (catalog, number of duplicates).
+    """
+    catalog = {}
+    seen = {}
+    duplicates = 0
+    for _, courses, _ in results:
+        for course, topics in courses.items():
+            titles = seen.setdefault(course, set())
+            target = catalog.setdefault(course, [])
+            for topic in topics:
+                key = " ".join(topic["title"].lower().split())
+                if key in titles:
+                    duplicates += 1
+                    continue
+                titles.add(key)
+                target.append(topic)
+    return catalog, duplicates
+
+
+def write_catalog(catalog, path):
+    """
+    Replace path atomically so the app never reads a half-written catalog.
+    """
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(catalog, f, ensure_ascii=False, indent=4)
+        f.write("\n")
+    os.replace(tmp_path, path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compile course sources into visual.json and hearing.json")
+    parser.add_argument("source_dir")
+    parser.add_argument("--output-dir", default=BASE_DIR)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--strict", action="store_true", help="write nothing if any topic is invalid")
+    parser.add_argument("--dry-run", action="store_true", help="validate and report without writing")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    files = {catalog: source_files(args.source_dir, catalog) for catalog in CATALOGS}
+    all_files = [path for paths in files.values() for path in paths]
+    if not all_files:
+        print(f"No .json or .md sources under {args.source_dir}/visual or {args.source_dir}/hearing")
+        return 1
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        compiled = dict((path, (path, courses, errors)) for path, courses, errors in
+                        pool.map(compile_file, all_files, chunksize=max(1, len(all_files) // (args.workers * 4))))
+
+    errors = [error for result in compiled.values() for error in result[2]]
+    for error in errors:
+        print(f"Invalid: {error}")
+    outputs = {}
+    for catalog, paths in files.items():
+        if not paths:
+            continue
+        outputs[catalog], duplicates = merge(compiled[path] for path in paths)
+        topics = sum(len(topics) for topics in outputs[catalog].values())
+        hours = sum(t["speech_seconds"] for ts in outputs[catalog].values() for t in ts) / 3600
+        print(f"{catalog}: {len(outputs[catalog])} courses, {topics} topics, {duplicates} duplicates dropped, "
+              f"about {hours:.1f} hours of speech")
+
+    if args.strict and errors:
+        print(f"Not writing catalogs: {len(errors)} invalid topics")
+        return 1
+    if not args.dry_run:
+        for catalog, data in outputs.items():
+            path = os.path.join(args.output_dir, f"{catalog}.json")
+            write_catalog(data, path)
+            print(f"Wrote {path}")
+    print(f"Ingested {len(all_files)} files in {time.perf_counter() - start:.2f} seconds")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,248 @@
+import atexit
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+# Jobs mirrored into a shared state backend are stored under this prefix, next to navigation records
+JOB_RECORD_PREFIX = "job:"
+# Seconds between checks for a cancellation requested through another process
+CANCEL_POLL_INTERVAL = 1.0
+
+
+class CancelEvent(threading.Event):
+    """
+    Cancellation flag that also counts as set once one of checks returns True,
+    e.g. for a cancellation recorded by another process. The checks run at
+    most every poll_interval seconds, from is_set() and while waiting.
+    """
+
+    def __init__(self, checks=(), poll_interval=CANCEL_POLL_INTERVAL):
+        super().__init__()
+        self.checks = list(checks)
+        self.poll_interval = poll_interval
+        self._polled = 0.0
+
+    def is_set(self):
+        if super().is_set():
+            return True
+        now = time.monotonic()
+        if not self.checks or now - self._polled < self.poll_interval:
+            return False
+        self._polled = now
+        for check in self.checks:
+            try:
+                if check():
+                    self.set()
+                    return True
+            except Exception as e:
+                print(f"Error checking for cancellation: {str(e)}")
+        return False
+
+    def wait(self, timeout=None):
+        if not self.checks:
+            return super().wait(timeout)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not self.is_set():
+            remaining = self.poll_interval if deadline is None else min(self.poll_interval, deadline - time.monotonic())
+            if remaining <= 0:
+                return False
+            super().wait(remaining)
+        return True
+
+
+class Job:
+    """
+    One background task: its status, result and a cancellation event the task polls.
+    owner identifies who the job runs for (e.g. a learner), so their jobs can be cancelled together.
+    """
+    __slots__ = ("job_id", "owner", "status", "result", "error", "cancel_event", "created", "finished")
+
+    def __init__(self, owner=None, checks=()):
+        self.job_id = uuid.uuid4().hex
+        self.owner = owner
+        self.status = "queued"
+        self.result = None
+        self.error = None
+        self.cancel_event = CancelEvent(checks)
+        self.created = time.monotonic()
+        self.finished = None
+
+    @property
+    def cancelled(self):
+        return self.cancel_event.is_set()
+
+    @property
+    def pending(self):
+        """
+        Queued or running and not asked to stop.
+        """
+        return self.status in ("queued", "running") and not self.cancelled
+
+    def to_dict(self):
+        return {"job_id": self.job_id, "owner": self.owner, "status": self.status, "result": self.result, "error": self.error}
+
+    @classmethod
+    def from_dict(cls, data):
+        """
+        Read-only copy of a job running in another process.
+        """
+        job = cls(data.get("owner"))
+        job.job_id = data["job_id"]
+        job.status = data["status"]
+        job.result = data.get("result")
+        job.error = data.get("error")
+        if job.status not in ("queued", "running"):
+            job.finished = job.created
+        return job
+
+
+class JobManager:
+    """
+    Runs jobs on a bounded thread pool, refusing new work once max_pending jobs
+    are queued or running, and forgetting finished jobs after retention seconds.
+    An owner has at most one pending job in a process; submitting again
+    returns it instead of starting another.
+
+    With a shared state backend (see state_backend.py) every job's status is
+    mirrored into it, so any worker process can report on a job or ask for
+    it to be cancelled; the process running it notices within CANCEL_POLL_INTERVAL.
+    """
+
+    def __init__(self, max_workers=2, max_pending=8, retention=300, backend=None):
+        self.max_pending = max_pending
+        self.retention = retention
+        self.backend = backend if backend is not None and backend.shared else None
+        self._jobs = {}
+        self._active = 0
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="voice-job")
+        # concurrent.futures waits for running jobs before atexit handlers run, so servers
+        # should call shutdown() as they stop; this only covers the other ways of exiting
+        atexit.register(self.shutdown)
+
+    def submit(self, target, owner=None, cancelled=None):
+        """
+        Schedule target(job) and return the Job, or None if the queue is full.
+        If owner already has a pending job, that job is returned instead.
+        cancelled, if given, is polled like a cancellation from another process.
+        """
+        checks = [cancelled] if cancelled is not None else []
+        with self._lock:
+            self._prune()
+            if owner is not None:
+                for job in self._jobs.values():
+                    if job.owner == owner and job.pending:
+                        return job
+            if self._active >= self.max_pending:
+                return None
+            job = Job(owner, checks)
+            if self.backend is not None:
+                job.cancel_event.checks.append(lambda: self._cancel_requested(job.job_id))
+            self._jobs[job.job_id] = job
+            self._active += 1
+        self._publish(job)
+        self._executor.submit(self._run, job, target)
+        return job
+
+    def _publish(self, job):
+        if self.backend is None:
+            return
+        data = job.to_dict()
+
+        def store(record):
+            record["job"] = data
+        try:
+            self.backend.update(JOB_RECORD_PREFIX + job.job_id, store)
+        except Exception as e:
+            print(f"Could not share the status of job {job.job_id}: {str(e)}")
+
+    def _load(self, job_id):
+        """
+        The shared record of a job started by another process, or None.
+        """
+        if self.backend is None:
+            return None
+        record = self.backend.load(JOB_RECORD_PREFIX + job_id)
+        return record if record is not None and "job" in record else None
+
+    def _cancel_requested(self, job_id):
+        record = self._load(job_id)
+        return record is not None and record.get("cancel_requested", False)
+
+    def _run(self, job, target):
+        try:
+            if job.cancelled:
+                job.status = "cancelled"
+                return
+            job.status = "running"
+            self._publish(job)
+            job.result = target(job)
+            job.status = "cancelled" if job.cancelled else "done"
+        except Exception as e:
+            print(f"Error in job {job.job_id}: {str(e)}")
+            job.error = str(e)
+            job.status = "failed"
+        finally:
+            job.finished = time.monotonic()
+            with self._lock:
+                self._active -= 1
+            self._publish(job)
+
+    def _prune(self):
+        # Caller holds self._lock
+        cutoff = time.monotonic() - self.retention
+        for job_id in [job_id for job_id, job in self._jobs.items() if job.finished and job.finished < cutoff]:
+            del self._jobs[job_id]
+
+    @property
+    def active(self):
+        """
+        Number of jobs queued or running.
+        """
+        return self._active
+
+    def get(self, job_id):
+        """
+        The job, or a copy of its shared status if another process runs it; None if unknown.
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is None:
+            record = self._load(job_id)
+            if record is not None:
+                job = Job.from_dict(record["job"])
+                if record.get("cancel_requested", False):
+                    job.cancel_event.set()
+        return job
+
+    def cancel(self, job_id, owner=None):
+        """
+        Cancel a job, only if it belongs to owner when one is given. Returns the job or None.
+        """
+        job = self.get(job_id)
+        if job is None or (owner is not None and job.owner != owner):
+            return None
+        job.cancel_event.set()
+        if self.backend is not None and job_id not in self._jobs:
+            def request_cancel(record):
+                record["cancel_requested"] = True
+            self.backend.update(JOB_RECORD_PREFIX + job_id, request_cancel)
+        return job
+
+    def cancel_all(self, owner=None):
+        """
+        Cancel every unfinished job, or only those of owner.
+        """
+        with self._lock:
+            jobs = [job for job in self._jobs.values() if job.finished is None and (owner is None or job.owner == owner)]
+        for job in jobs:
+            job.cancel_event.set()
+        return len(jobs)
+
+    def shutdown(self):
+        """
+        Cancel every job, drop the queued ones and stop taking new ones; called at exit.
+        """
+        self.cancel_all()
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,95 @@
+import os
+import threading
+from content_store import BASE_DIR
+
+# Local copies of lesson videos, referenced by the optional "media" field of a hearing.json lesson
+MEDIA_DIR = os.environ.get("MEDIA_DIR", os.path.join(BASE_DIR, "media"))
+# Browser cache lifetime for media files; lesson videos are replaced under a new name, not edited
+MEDIA_MAX_AGE = int(os.environ.get("MEDIA_MAX_AGE", 7 * 24 * 3600))
+# Hand file bodies to the front-end server (X-Sendfile) instead of streaming them from Python
+MEDIA_X_SENDFILE = os.environ.get("MEDIA_X_SENDFILE", "").lower() in ("1", "true", "yes")
+
+
+def media_path(name, media_dir=MEDIA_DIR):
+    """
+    Absolute path of a media file if it exists inside media_dir, else None.
+    """
+    root = os.path.realpath(media_dir)
+    path = os.path.realpath(os.path.join(root, name))
+    if not path.startswith(root + os.sep) or not os.path.isfile(path):
+        return None
+    return path
+
+
+def media_signature(media_dir=MEDIA_DIR):
+    """
+    Changes whenever files are added to or removed from media_dir.
+    """
+    try:
+        return os.stat(media_dir).st_mtime_ns
+    except OSError:
+        return None
+
+
+class MediaManifest:
+    """
+    Which lessons of a catalog have a local video, and the neighbouring
+    lessons' videos a client should prefetch while one is playing.
+    Rebuilt when the catalog reloads or the media directory changes.
+    """
+
+    def __init__(self, store, media_dir=MEDIA_DIR):
+        self.store = store
+        self.media_dir = media_dir
+        self._courses = {}
+        self._neighbours = {}
+        self._stamp = None
+        self._lock = threading.Lock()
+
+    def ensure_current(self):
+        stamp = (self.store.version, media_signature(self.media_dir))
+        if stamp != self._stamp:
+            with self._lock:
+                if stamp != self._stamp:
+                    self._build()
+                    self._stamp = stamp
+        return self._stamp
+
+    def _build(self):
+        courses = {}
+        neighbours = {}
+        for course in self.store:
+            entries = []
+            for index, topic in enumerate(self.store[course]):
+                name = topic.get("media")
+                path = media_path(name, self.media_dir) if name else None
+                if path is None:
+                    continue
+                entries.append({
+                    "index": index,
+                    "title": topic.get("title", ""),
+                    "media": name,
+                    "bytes": os.path.getsize(path),
+                })
+            courses[course] = entries
+            by_index = {entry["index"]: entry["media"] for entry in entries}
+            for entry in entries:
+                # Next lesson first: it is the one most likely to be watched
+                nearby = [by_index.get(entry["index"] + 1), by_index.get(entry["index"] - 1)]
+                neighbours.setdefault(entry["media"], [name for name in nearby if name])
+        self._courses = courses
+        self._neighbours = neighbours
+
+    def course(self, course):
+        """
+        Local videos of course as [{index, title, media, bytes}], in lesson order.
+        """
+        self.ensure_current()
+        return self._courses.get(course, [])
+
+    def neighbours(self, name):
+        """
+        Media of the lessons next to the one using name, next lesson first.
+        """
+        self.ensure_current()
+        return self._neighbours.get(name, [])
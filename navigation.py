@@ -0,0 +1,362 @@
+import atexit
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from state_backend import MemoryStateBackend, new_record
+
+NAVIGATION_COMMANDS = ["repeat", "next", "previous", "search", "stop"]
+# Seconds a cached record may be reused before re-reading a shared backend
+SYNC_INTERVAL = 0.25
+# Seconds between version checks of a shared backend while waiting for a change (e.g. an open
+# /api/stream); each check reads one small column, so the cost per idle learner stays low
+CHANGE_POLL_INTERVAL = float(os.environ.get("CHANGE_POLL_INTERVAL", 1.0))
+# A voice loop whose heartbeat is older than this is presumed dead (e.g. its worker crashed)
+RUNNING_TTL = 10 * 60
+# Least seconds between activity writes to the backend for one session
+PERSIST_TOUCH_INTERVAL = 60
+
+
+def heartbeat(record):
+    record["heartbeat"] = time.time()
+
+
+class NavigationSession:
+    """
+    Course navigation state machine for a single learner.
+
+    Position and version live in a state backend (see state_backend.py) so
+    that every worker process sees the same state; this object caches the
+    last record it read and wakes local waiters when it changes.
+    """
+    __slots__ = ("session_id", "backend", "topics_for", "on_change", "last_seen", "stop_requested", "microphone", "lock",
+                 "changed", "_record", "_topics", "_topics_course", "_synced", "_persisted", "_looping")
+
+    def __init__(self, session_id, backend=None, topics_for=None, on_change=None):
+        self.session_id = session_id
+        self.backend = backend or MemoryStateBackend()
+        self.topics_for = topics_for  # course name -> topics, for courses selected in another process
+        self.on_change = on_change  # Called with (session_id, record, number of topics) when the position moves
+        self.last_seen = time.monotonic()
+        self.stop_requested = False
+        self.microphone = None
+        self.lock = threading.RLock()
+        self.changed = threading.Condition(self.lock)
+        self._record = self.backend.load(session_id) or new_record()
+        self._topics = []
+        self._topics_course = None
+        self._synced = time.monotonic()
+        self._persisted = 0.0
+        self._looping = False  # This process runs the session's voice loop
+
+    def _sync(self, force=False):
+        """
+        Re-read the record if another process may have changed it.
+        """
+        if not self.backend.shared:
+            return
+        now = time.monotonic()
+        if not force and now - self._synced < SYNC_INTERVAL:
+            return
+        record = self.backend.load(self.session_id) or new_record()
+        with self.lock:
+            self._synced = now
+            changed = record["version"] != self._record["version"]
+            self._record = record
+            if changed:
+                self.changed.notify_all()
+
+    def _update(self, change):
+        """
+        Atomically apply change(record) in the backend and return its result.
+        """
+        with self.lock:
+            before = self._record["version"]
+            self._record, result = self.backend.update(self.session_id, change)
+            self._synced = time.monotonic()
+            moved = self._record["version"] != before
+            if moved:
+                self.changed.notify_all()
+                record = self._record
+                total = len(self.topics) if record["course"] else 0
+        if moved and self.on_change is not None:
+            try:
+                self.on_change(self.session_id, record, total)
+            except Exception as e:
+                print(f"Error in navigation listener for session {self.session_id}: {str(e)}")
+        return result
+
+    @property
+    def course(self):
+        self._sync()
+        return self._record["course"]
+
+    @property
+    def index(self):
+        self._sync()
+        return self._record["index"]
+
+    @property
+    def version(self):
+        self._sync()
+        return self._record["version"]
+
+    @property
+    def topics(self):
+        course = self.course
+        with self.lock:
+            if course != self._topics_course:
+                self._topics = self.topics_for(course) if course and self.topics_for else []
+                self._topics_course = course
+            return self._topics
+
+    @property
+    def running(self):
+        """
+        True while a voice loop, in any process, owns this session.
+        """
+        self._sync()
+        record = self._record
+        return record["running"] and time.time() - record["heartbeat"] < RUNNING_TTL
+
+    def touch(self):
+        now = time.monotonic()
+        self.last_seen = now
+        if now - self._persisted >= PERSIST_TOUCH_INTERVAL:
+            self._persisted = now
+            if self._looping:
+                self._update(heartbeat)
+            else:
+                self.backend.touch(self.session_id)
+
+    def close(self):
+        with self.lock:
+            self.stop_requested = True
+            self.changed.notify_all()
+
+    @property
+    def voice_prompt_stopped(self):
+        """
+        True once the learner answered the accessibility question without
+        voice, in any process; no voice prompt starts for them until cleared.
+        """
+        self._sync()
+        return self._record.get("prompt_stopped", False)
+
+    def stop_voice_prompt(self, stopped=True):
+        if self.voice_prompt_stopped == stopped:
+            return
+
+        def set_stopped(record):
+            record["prompt_stopped"] = stopped
+        self._update(set_stopped)
+
+    @property
+    def voice_prompt_job(self):
+        """
+        Id of the learner's latest voice prompt job, started by any process, or None.
+        """
+        self._sync()
+        return self._record.get("prompt_job")
+
+    def set_voice_prompt_job(self, job_id):
+        def set_job(record):
+            record["prompt_job"] = job_id
+        self._update(set_job)
+
+    def claim_voice_loop(self):
+        """
+        Mark the session as owned by a voice loop; False if one is already running.
+        """
+        def claim(record):
+            if record["running"] and time.time() - record["heartbeat"] < RUNNING_TTL:
+                return False
+            record["running"] = True
+            record["heartbeat"] = time.time()
+            return True
+        claimed = self._update(claim)
+        if claimed:
+            self.stop_requested = False
+            self._looping = True
+            self._persisted = time.monotonic()
+        return claimed
+
+    def release_voice_loop(self):
+        def release(record):
+            record["running"] = False
+        self._looping = False
+        self._update(release)
+
+    def wait_for_change(self, version, timeout=None):
+        """
+        Block until the state version differs from version or timeout elapses.
+        Returns the current version.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self.lock:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if self.backend.shared:
+                    # Changes made by other processes are only seen by polling
+                    remaining = CHANGE_POLL_INTERVAL if remaining is None else min(remaining, CHANGE_POLL_INTERVAL)
+                if remaining is None or remaining > 0:
+                    self.changed.wait_for(lambda: self._record["version"] != version or self.stop_requested, remaining)
+            if self.backend.shared and self.backend.version(self.session_id) != self._record["version"]:
+                self._sync(force=True)
+            current = self._record["version"]
+            if current != version or self.stop_requested or (deadline is not None and time.monotonic() >= deadline):
+                return current
+
+    def reset(self):
+        def reset(record):
+            record["course"] = None
+            record["index"] = 0
+        self._update(reset)
+
+    def select_course(self, course, topics, index=0):
+        with self.lock:
+            self._topics = topics
+            self._topics_course = course
+
+        def select(record):
+            record["course"] = course
+            record["index"] = index
+        self._update(select)
+
+    def current_topic(self):
+        with self.lock:
+            topics = self.topics
+            index = self._record["index"]
+            if self._record["course"] and topics and index < len(topics):
+                return topics[index]
+            return None
+
+    def move(self, command):
+        """
+        Apply a navigation command and return True if the position changed.
+        """
+        total = len(self.topics)
+
+        def move(record):
+            if command == "next" and record["index"] < total - 1:
+                record["index"] += 1
+                return True
+            if command == "previous" and record["index"] > 0:
+                record["index"] -= 1
+                return True
+            if command == "stop":
+                record["course"] = None
+                record["index"] = 0
+                return True
+            return False
+        return self._update(move)
+
+    def snapshot(self):
+        self._sync(force=True)
+        with self.lock:
+            return {
+                'course': self._record["course"],
+                'index': self._record["index"],
+                'version': self._record["version"],
+                'total': len(self.topics),
+                'content': self.current_topic(),
+            }
+
+
+class SessionRegistry:
+    """
+    Keeps one NavigationSession per learner, evicting idle and least recently
+    used sessions, and runs voice loops on a bounded thread pool.
+    """
+
+    def __init__(self, max_sessions=500, idle_timeout=30 * 60, max_voice_workers=32, backend=None, topics_for=None,
+                 on_change=None):
+        self.backend = backend or MemoryStateBackend()
+        self.topics_for = topics_for
+        self.on_change = on_change
+        self.max_sessions = max_sessions
+        self.idle_timeout = idle_timeout
+        self.sweep_interval = min(30, idle_timeout)
+        self._last_sweep = time.monotonic()
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_voice_workers, thread_name_prefix="voice-nav")
+        atexit.register(self.shutdown)  # Servers call shutdown() sooner, see app.shutdown
+
+    @staticmethod
+    def new_session_id():
+        return uuid.uuid4().hex
+
+    def get(self, session_id, create=True):
+        """
+        Return the session for session_id, creating it if needed.
+        """
+        with self._lock:
+            self._evict_idle()
+            nav = self._sessions.get(session_id)
+            if nav is None:
+                if not create:
+                    return None
+                nav = NavigationSession(session_id, self.backend, self.topics_for, self.on_change)
+                self._sessions[session_id] = nav
+                while len(self._sessions) > self.max_sessions:
+                    _, evicted = self._sessions.popitem(last=False)
+                    evicted.close()
+                    print(f"Evicted least recently used session {evicted.session_id}")
+            else:
+                self._sessions.move_to_end(session_id)
+            nav.touch()
+            return nav
+
+    def _evict_idle(self):
+        # Voice loops and open streams touch sessions without reordering them,
+        # so scan everything, but at most once per sweep interval.
+        now = time.monotonic()
+        if now - self._last_sweep < self.sweep_interval:
+            return
+        self._last_sweep = now
+        cutoff = now - self.idle_timeout
+        for session_id, nav in list(self._sessions.items()):
+            if nav.last_seen < cutoff and not nav.running:
+                del self._sessions[session_id]
+                nav.close()
+                print(f"Evicted idle session {session_id}")
+        self.backend.expire(time.time() - self.idle_timeout)
+
+    def start_voice_loop(self, nav, target, reset=False):
+        """
+        Schedule target(nav) on the voice pool unless a loop is already running
+        for nav in any process; with reset, start it from course selection.
+        """
+        if not nav.claim_voice_loop():
+            return False
+        if reset:
+            nav.reset()
+
+        def run():
+            try:
+                target(nav)
+            except Exception as e:
+                print(f"Error in voice loop for session {nav.session_id}: {str(e)}")
+            finally:
+                nav.release_voice_loop()
+
+        self._executor.submit(run)
+        return True
+
+    def __len__(self):
+        with self._lock:
+            return len(self._sessions)
+
+    def shutdown(self):
+        """
+        Stop every voice loop and close the backend; called at exit.
+        """
+        with self._lock:
+            for nav in self._sessions.values():
+                nav.close()
+            self._sessions.clear()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self.backend.close()
@@ -0,0 +1,248 @@
+import atexit
+import os
+import sqlite3
+import threading
+import time
+import metrics
+from content_store import BASE_DIR
+
+# Where learner progress is kept; unlike navigation state it outlives idle sessions
+PROGRESS_DB = os.environ.get("PROGRESS_DB", os.path.join(BASE_DIR, "progress.sqlite"))
+# Seconds between write-behind flushes of buffered progress
+PROGRESS_FLUSH_INTERVAL = float(os.environ.get("PROGRESS_FLUSH_INTERVAL", 2.0))
+# Buffered (learner, course) entries that trigger a flush before the interval is up
+PROGRESS_BATCH_SIZE = 256
+
+PROGRESS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS progress (
+    learner_id TEXT NOT NULL,
+    course TEXT NOT NULL,
+    topic_index INTEGER NOT NULL,
+    furthest_index INTEGER NOT NULL,
+    total INTEGER NOT NULL,
+    started REAL NOT NULL,
+    updated REAL NOT NULL,
+    completed_at REAL,
+    PRIMARY KEY (learner_id, course)
+);
+CREATE INDEX IF NOT EXISTS progress_learner_updated ON progress (learner_id, updated);
+"""
+# Upsert with the same rules as merge_progress, so flushes from several
+# processes, in any order, leave the row as if they had been merged in memory
+UPSERT = """
+INSERT INTO progress (learner_id, course, topic_index, furthest_index, total, started, updated, completed_at)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (learner_id, course) DO UPDATE SET
+    topic_index = CASE WHEN excluded.updated >= progress.updated THEN excluded.topic_index ELSE progress.topic_index END,
+    total = CASE WHEN excluded.updated >= progress.updated THEN excluded.total ELSE progress.total END,
+    furthest_index = MAX(progress.furthest_index, excluded.furthest_index),
+    started = MIN(progress.started, excluded.started),
+    updated = MAX(progress.updated, excluded.updated),
+    completed_at = COALESCE(MAX(progress.completed_at, excluded.completed_at), progress.completed_at, excluded.completed_at)
+"""
+FIELDS = ("index", "furthest", "total", "started", "updated", "completed_at")
+
+PROGRESS_EVENTS = metrics.counter("progress_events", "Navigation events recorded in the progress store.")
+PROGRESS_FLUSH_SECONDS = metrics.histogram("progress_flush_seconds", "Time to write one batch of buffered progress to SQLite.")
+PROGRESS_FLUSH_ROWS = metrics.histogram("progress_flush_rows", "Progress rows written per flush.",
+                                        buckets=(1, 5, 10, 50, 100, 250, 500, 1000))
+
+
+def merge_progress(old, new):
+    """
+    Combine two progress entries for one learner and course: the latest
+    position wins, while the furthest topic, start time and completion time
+    only ever move forward.
+    """
+    if old is None:
+        return dict(new)
+    latest = new if new["updated"] >= old["updated"] else old
+    completions = [entry["completed_at"] for entry in (old, new) if entry["completed_at"] is not None]
+    return {
+        "index": latest["index"],
+        "total": latest["total"],
+        "furthest": max(old["furthest"], new["furthest"]),
+        "started": min(old["started"], new["started"]),
+        "updated": max(old["updated"], new["updated"]),
+        "completed_at": max(completions) if completions else None,
+    }
+
+
+class ProgressStore:
+    """
+    Course, topic position and completion per learner, persisted to SQLite.
+    A course counts as finished when complete() was called after the last
+    navigation in it; studying it again makes it unfinished, while
+    completed_at keeps the last time it was finished.
+
+    record() only updates an in-memory buffer, so navigation never waits on
+    disk; a background thread writes the buffer in one transaction every
+    flush_interval seconds, or sooner once batch_size entries are waiting.
+    Reads merge the buffer over the database, so they are never stale.
+    """
+
+    def __init__(self, path=PROGRESS_DB, flush_interval=PROGRESS_FLUSH_INTERVAL, batch_size=PROGRESS_BATCH_SIZE):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self._pending = {}  # (learner_id, course) -> entry not yet written
+        self._flushing = {}  # The batch being written, still visible to reads
+        self._lock = threading.Lock()
+        self._db_lock = threading.Lock()
+        self._conn = None
+        self._wake = threading.Event()
+        self._closed = False
+        self._thread = None
+
+    def _connect(self):
+        # Caller holds _db_lock
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(PROGRESS_SCHEMA)
+        return self._conn
+
+    def record(self, learner_id, course, index, total, now=None, completed=False):
+        """
+        Note that learner_id is at topic index of total in course. Never blocks on disk.
+        """
+        if not course or total <= 0:
+            return
+        now = time.time() if now is None else now
+        entry = {
+            "index": index,
+            "furthest": index,
+            "total": total,
+            "started": now,
+            "updated": now,
+            "completed_at": now if completed else None,
+        }
+        PROGRESS_EVENTS.inc()
+        with self._lock:
+            if self._closed:
+                return
+            key = (learner_id, course)
+            self._pending[key] = merge_progress(self._pending.get(key), entry)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="progress-writer", daemon=True)
+                self._thread.start()
+                atexit.register(self.close)
+            if len(self._pending) >= self.batch_size:
+                self._wake.set()
+
+    def complete(self, learner_id, course, total, now=None):
+        """
+        Note that learner_id went through every topic of course.
+        """
+        self.record(learner_id, course, total - 1, total, now=now, completed=True)
+
+    @property
+    def pending(self):
+        return len(self._pending)
+
+    def on_navigation(self, session_id, record, total):
+        """
+        NavigationSession change listener; stopping or resetting (no course) keeps the last position.
+        """
+        self.record(session_id, record["course"], record["index"], total)
+
+    def _run(self):
+        while not self._closed:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+
+    def flush(self):
+        """
+        Write everything buffered in one transaction. On failure the batch is
+        put back, under anything recorded since, and retried next time.
+        """
+        with self._lock:
+            batch, self._pending = self._pending, {}
+            self._flushing = batch
+        if not batch:
+            return 0
+        start = time.perf_counter()
+        rows = [
+            (learner_id, course, e["index"], e["furthest"], e["total"], e["started"], e["updated"], e["completed_at"])
+            for (learner_id, course), e in batch.items()
+        ]
+        try:
+            with self._db_lock:
+                conn = self._connect()
+                conn.execute("BEGIN IMMEDIATE")
+                try:
+                    conn.executemany(UPSERT, rows)
+                    conn.execute("COMMIT")
+                except BaseException:
+                    conn.execute("ROLLBACK")
+                    raise
+        except sqlite3.Error as e:
+            print(f"Could not save learner progress, will retry: {str(e)}")
+            with self._lock:
+                for key, entry in batch.items():
+                    self._pending[key] = merge_progress(self._pending.get(key), entry)
+                self._flushing = {}
+            return 0
+        with self._lock:
+            self._flushing = {}
+        PROGRESS_FLUSH_SECONDS.observe(time.perf_counter() - start)
+        PROGRESS_FLUSH_ROWS.observe(len(rows))
+        return len(rows)
+
+    def courses(self, learner_id):
+        """
+        Progress of learner_id in every course they started, most recent first.
+        """
+        with self._db_lock:
+            rows = self._connect().execute(
+                "SELECT course, topic_index, furthest_index, total, started, updated, completed_at "
+                "FROM progress WHERE learner_id = ?", (learner_id,)
+            ).fetchall()
+        entries = {row[0]: dict(zip(FIELDS, row[1:])) for row in rows}
+        with self._lock:
+            pending = [(course, entry) for buffer in (self._flushing, self._pending)
+                       for (learner, course), entry in buffer.items() if learner == learner_id]
+        for course, entry in pending:
+            entries[course] = merge_progress(entries.get(course), entry)
+        result = []
+        for course, entry in entries.items():
+            completed_at = entry["completed_at"]
+            result.append(dict(entry, course=course, completed=completed_at is not None,
+                               finished=completed_at is not None and completed_at >= entry["updated"]))
+        result.sort(key=lambda entry: -entry["updated"])
+        return result
+
+    def resume_point(self, learner_id):
+        """
+        The unfinished course learner_id studied most recently, or None.
+        """
+        for entry in self.courses(learner_id):
+            if not entry["finished"]:
+                return entry
+        return None
+
+    def position(self, learner_id, course):
+        """
+        Topic to continue course from: where the learner left it, or 0 once it was finished.
+        """
+        for entry in self.courses(learner_id):
+            if entry["course"] == course:
+                return 0 if entry["finished"] else entry["index"]
+        return 0
+
+    def close(self):
+        """
+        Stop the writer and flush whatever is still buffered.
+        """
+        with self._lock:
+            self._closed = True
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(5.0)
+        self.flush()
+        with self._db_lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
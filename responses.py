@@ -0,0 +1,141 @@
+import gzip
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from flask import Response, request
+try:
+    import brotli  # Optional, smaller bodies for browsers that accept br
+    use_brotli = True
+except ImportError:
+    use_brotli = False
+
+# Bodies smaller than this are not worth compressing
+MIN_COMPRESS_BYTES = 512
+
+
+class PreparedBody:
+    """
+    Response body built once, with pre-compressed variants and a strong ETag;
+    each variant has its own, see etag_for.
+    """
+    __slots__ = ("body", "mimetype", "encoded", "etag")
+
+    def __init__(self, body, mimetype, compress=True):
+        self.body = body
+        self.mimetype = mimetype
+        self.etag = hashlib.sha256(self.body).hexdigest()[:32]
+        self.encoded = {}
+        if compress and len(self.body) >= MIN_COMPRESS_BYTES:
+            if use_brotli:
+                self.encoded["br"] = brotli.compress(self.body)
+            self.encoded["gzip"] = gzip.compress(self.body, compresslevel=9, mtime=0)
+
+    def etag_for(self, encoding=None):
+        """
+        Strong ETag of the variant sent with this Content-Encoding (None for identity).
+        """
+        return self.etag if encoding is None else f"{self.etag}-{encoding}"
+
+
+class PreparedResponse(PreparedBody):
+    """
+    JSON body serialized once, see PreparedBody.
+    """
+    __slots__ = ()
+
+    def __init__(self, payload):
+        super().__init__(json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8"), "application/json")
+
+
+def prepare_html(html):
+    return PreparedBody(html.encode("utf-8"), "text/html")
+
+
+class ResponseCache:
+    """
+    LRU of prepared bodies keyed by (resource, version) tuples.
+    """
+
+    def __init__(self, max_entries=1024):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, build_payload, prepare=PreparedResponse):
+        """
+        The entry for key, built as prepare(build_payload()) on a miss.
+        """
+        with self._lock:
+            prepared = self._entries.get(key)
+            if prepared is not None:
+                self._entries.move_to_end(key)
+                return prepared
+        prepared = prepare(build_payload())
+        with self._lock:
+            self._entries[key] = prepared
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return prepared
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class LatestResponseCache:
+    """
+    Only the latest prepared body per resource, e.g. one per learner: a new
+    version replaces the previous one rather than piling up beside it, and
+    the least recently used resources go first once max_entries is reached.
+    """
+
+    def __init__(self, max_entries=1024):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # resource -> (version, PreparedBody)
+        self._lock = threading.Lock()
+
+    def get(self, resource, version, build_payload, prepare=PreparedResponse):
+        """
+        The body of resource at version, built as prepare(build_payload()) on a miss.
+        """
+        with self._lock:
+            cached = self._entries.get(resource)
+            if cached is not None and cached[0] == version:
+                self._entries.move_to_end(resource)
+                return cached[1]
+        prepared = prepare(build_payload())
+        with self._lock:
+            self._entries[resource] = (version, prepared)
+            self._entries.move_to_end(resource)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return prepared
+
+    def discard(self, resource):
+        with self._lock:
+            self._entries.pop(resource, None)
+
+
+def send_prepared(prepared, cache_control, status=200):
+    """
+    Serve a PreparedBody for the current request: the best pre-compressed
+    variant the client accepts, or 304 if it already has that variant's ETag.
+    """
+    encoding = None
+    for candidate in ("br", "gzip"):
+        if candidate in prepared.encoded and request.accept_encodings[candidate]:
+            encoding = candidate
+            break
+    etag = prepared.etag_for(encoding)
+    headers = {
+        "ETag": f'"{etag}"',
+        "Cache-Control": cache_control,
+        "Vary": "Accept-Encoding",
+    }
+    if etag in request.if_none_match:
+        return Response(status=304, headers=headers)
+    if encoding is None:
+        return Response(prepared.body, status=status, mimetype=prepared.mimetype, headers=headers)
+    headers["Content-Encoding"] = encoding
+    return Response(prepared.encoded[encoding], status=status, mimetype=prepared.mimetype, headers=headers)
@@ -0,0 +1,133 @@
+import bisect
+import re
+import threading
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+STOP_WORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "how", "in", "is", "it", "of", "on",
+    "or", "that", "the", "this", "to", "was", "what", "with", "about", "me", "i", "want", "topic",
+}
+# Longest suffixes first so "ations" wins over "s"
+SUFFIXES = sorted([
+    "ations", "ation", "ings", "ing", "ions", "ion", "ements", "ement", "ments", "ment", "ness",
+    "ities", "ity", "ies", "ed", "es", "ly", "er", "ers", "s",
+], key=len, reverse=True)
+# Relative weight of a match in each topic field
+FIELD_WEIGHTS = {"title": 3.0, "summary": 1.0, "example": 0.5}
+# Score multiplier for a query term that only matches as a prefix
+PREFIX_WEIGHT = 0.5
+
+
+def stem(word):
+    """
+    Light suffix-stripping stemmer: enough to match "handling" with "handle"
+    and "exceptions" with "exception" without a full Porter implementation.
+    """
+    for suffix in SUFFIXES:
+        if suffix == "s" and word.endswith(("ss", "us", "is")):
+            continue
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+            word = word[:-len(suffix)]
+            break
+    if word.endswith("e") and len(word) > 4:
+        word = word[:-1]
+    return word
+
+
+def analyze(text):
+    return [stem(token) for token in TOKEN_PATTERN.findall(text.lower()) if token not in STOP_WORDS]
+
+
+class SearchIndex:
+    """
+    Inverted index over topic titles, summaries and examples of one or more
+    content stores, rebuilt lazily whenever a store reloads.
+    """
+
+    def __init__(self, catalogs):
+        # catalogs: {catalog name: ContentStore or {course: [topic, ...]}}
+        self.catalogs = catalogs
+        self._postings = {}
+        self._terms = []
+        self._docs = []
+        self._versions = None
+        self._lock = threading.Lock()
+
+    def _current_versions(self):
+        versions = []
+        for store in self.catalogs.values():
+            refresh = getattr(store, "refresh", None)
+            if refresh is not None:
+                refresh()  # Picks up an edited catalog file, at most once per check_interval
+            versions.append(getattr(store, "version", 0))
+        return tuple(versions)
+
+    def _build(self):
+        postings = {}
+        docs = []
+        for catalog, store in self.catalogs.items():
+            for course in store:
+                for index, topic in enumerate(store[course]):
+                    doc_id = len(docs)
+                    docs.append((catalog, course, index, topic.get("title", "")))
+                    for field, weight in FIELD_WEIGHTS.items():
+                        for term in analyze(topic.get(field) or ""):
+                            entry = postings.setdefault(term, {})
+                            entry[doc_id] = entry.get(doc_id, 0.0) + weight
+        self._postings = postings
+        self._terms = sorted(postings)
+        self._docs = docs
+        print(f"Search index built: {len(docs)} topics, {len(self._terms)} terms")
+
+    def ensure_current(self):
+        versions = self._current_versions()
+        if versions != self._versions:
+            with self._lock:
+                if versions != self._versions:
+                    self._build()
+                    self._versions = versions
+
+    def _matches(self, term):
+        """
+        Postings for term plus, at reduced weight, every indexed term it prefixes.
+        """
+        matches = dict(self._postings.get(term, {}))
+        start = bisect.bisect_left(self._terms, term)
+        for candidate in self._terms[start:]:
+            if not candidate.startswith(term):
+                break
+            if candidate == term:
+                continue
+            for doc_id, weight in self._postings[candidate].items():
+                matches[doc_id] = max(matches.get(doc_id, 0.0), weight * PREFIX_WEIGHT)
+        return matches
+
+    def search(self, query, limit=10, catalog=None, course=None):
+        """
+        Rank topics for query; topics matching more query terms always rank first.
+        """
+        self.ensure_current()
+        terms = list(dict.fromkeys(analyze(query)))
+        if not terms:
+            return []
+        scores = {}
+        hits = {}
+        for term in terms:
+            for doc_id, weight in self._matches(term).items():
+                scores[doc_id] = scores.get(doc_id, 0.0) + weight
+                hits[doc_id] = hits.get(doc_id, 0) + 1
+        results = []
+        for doc_id in sorted(scores, key=lambda d: (-hits[d], -scores[d], d)):
+            doc_catalog, doc_course, index, title = self._docs[doc_id]
+            if catalog and doc_catalog != catalog or course and doc_course != course:
+                continue
+            results.append({
+                "catalog": doc_catalog,
+                "course": doc_course,
+                "index": index,
+                "title": title,
+                "score": round(scores[doc_id], 3),
+            })
+            if len(results) >= limit:
+                break
+        return results
@@ -0,0 +1,106 @@
+"""
+Production entry point: python serve.py [--bind HOST:PORT] [--workers N] [--threads T]
+
+Serves create_app() with gunicorn (N processes, T threads each) when it is
+installed, otherwise with waitress or Werkzeug in a single process. Several
+workers share navigation state through STATE_BACKEND, so any of them can
+answer any learner.
+
+Every open /api/stream (one per visual page) holds a thread for as long as
+the page is open, so one process serves at most MAX_STREAMS of them,
+half its threads by default; pages beyond that poll /api/state instead.
+Size --workers x --threads for the learners expected at once.
+"""
+import argparse
+import os
+
+
+def configure(workers, threads=None):
+    """
+    Settings every worker must agree on, fixed before app is imported.
+    """
+    if threads:
+        # Leave the other half of the threads for page and API requests
+        os.environ.setdefault("MAX_STREAMS", str(max(1, threads // 2)))
+    if workers > 1 and os.environ.get("STATE_BACKEND", "memory") == "memory":
+        os.environ["STATE_BACKEND"] = "sqlite"
+        print("STATE_BACKEND=memory cannot be shared between workers; using sqlite")
+
+
+def stop_worker(server, worker):
+    """
+    gunicorn hook run in each worker process as it exits.
+    """
+    import app
+    app.shutdown(worker.wsgi)
+
+
+def serve_gunicorn(bind, workers, threads):
+    from gunicorn.app.base import BaseApplication
+
+    class Server(BaseApplication):
+        def load_config(self):
+            self.cfg.set("bind", bind)
+            self.cfg.set("workers", workers)
+            self.cfg.set("threads", threads)
+            self.cfg.set("worker_class", "gthread")  # Threads keep /api/stream connections from blocking a worker
+            self.cfg.set("timeout", 0)  # Event streams stay open indefinitely
+            self.cfg.set("worker_exit", stop_worker)
+
+        def load(self):
+            import app
+            return app.create_app()
+
+    Server().run()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the platform with multiple workers")
+    parser.add_argument("--bind", default=os.environ.get("BIND", "127.0.0.1:8000"))
+    parser.add_argument("--workers", type=int, default=int(os.environ.get("WEB_CONCURRENCY", os.cpu_count() or 1)))
+    parser.add_argument("--threads", type=int, default=int(os.environ.get("WEB_THREADS", 32)))
+    args = parser.parse_args()
+
+    try:
+        import gunicorn  # noqa: F401
+        use_gunicorn = True
+    except ImportError:
+        use_gunicorn = False
+    workers = args.workers if use_gunicorn else 1
+    pooled = use_gunicorn
+    if not pooled:
+        try:
+            import waitress  # noqa: F401
+            pooled = True
+        except ImportError:
+            pass  # Werkzeug starts a thread per request, so it has no thread pool to protect
+    configure(workers, args.threads if pooled else None)
+
+    if use_gunicorn:
+        print(f"Serving on {args.bind} with gunicorn, {workers} workers x {args.threads} threads")
+        serve_gunicorn(args.bind, workers, args.threads)
+        return
+    if args.workers > 1:
+        print("gunicorn is not installed; serving from a single process")
+    import app
+    application = app.create_app()
+    try:
+        from waitress import serve
+    except ImportError:
+        from werkzeug.serving import run_simple
+        host, _, port = args.bind.rpartition(":")
+        print(f"Serving on {args.bind} with Werkzeug (threaded)")
+        try:
+            run_simple(host or "127.0.0.1", int(port), application, threaded=True)
+        finally:
+            app.shutdown(application)
+        return
+    print(f"Serving on {args.bind} with waitress, {args.threads} threads")
+    try:
+        serve(application, listen=args.bind, threads=args.threads)
+    finally:
+        app.shutdown(application)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,209 @@
+import copy
+import json
+import os
+import sqlite3
+import threading
+import time
+from content_store import BASE_DIR
+
+# Where navigation state lives: memory (one process), sqlite:///path or redis://host:port/db (many processes)
+STATE_BACKEND = os.environ.get("STATE_BACKEND", "memory")
+DEFAULT_SQLITE_PATH = os.path.join(BASE_DIR, "state.sqlite")
+
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    session_id TEXT PRIMARY KEY,
+    state TEXT NOT NULL,
+    updated REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS sessions_updated ON sessions (updated);
+"""
+
+
+def new_record():
+    return {"course": None, "index": 0, "version": 0, "running": False, "heartbeat": 0.0, "prompt_stopped": False, "prompt_job": None}
+
+
+def apply_change(record, change):
+    """
+    Run change(record) on a copy and bump the version if the position moved.
+    Returns (new record, change's return value).
+    """
+    updated = copy.copy(record)
+    result = change(updated)
+    if (updated["course"], updated["index"]) != (record["course"], record["index"]):
+        updated["version"] = record["version"] + 1
+    return updated, result
+
+
+class MemoryStateBackend:
+    """
+    Navigation records in a dict; only valid for a single process.
+    """
+    shared = False
+
+    def __init__(self):
+        self._records = {}
+        self._seen = {}
+        self._lock = threading.Lock()
+
+    def load(self, session_id):
+        with self._lock:
+            record = self._records.get(session_id)
+            return copy.copy(record) if record is not None else None
+
+    def version(self, session_id):
+        with self._lock:
+            record = self._records.get(session_id)
+            return record["version"] if record is not None else 0
+
+    def update(self, session_id, change):
+        with self._lock:
+            record, result = apply_change(self._records.get(session_id) or new_record(), change)
+            self._records[session_id] = record
+            self._seen[session_id] = time.time()
+            return copy.copy(record), result
+
+    def touch(self, session_id):
+        with self._lock:
+            if session_id in self._records:
+                self._seen[session_id] = time.time()
+
+    def expire(self, cutoff):
+        with self._lock:
+            for session_id in [s for s, seen in self._seen.items() if seen < cutoff and not self._records[s]["running"]]:
+                del self._records[session_id]
+                del self._seen[session_id]
+
+    def close(self):
+        pass
+
+
+class SQLiteStateBackend:
+    """
+    Navigation records in an SQLite database shared by every worker process on
+    one machine. Updates are read-modify-write inside BEGIN IMMEDIATE, so
+    concurrent writers from any process are serialized.
+    """
+    shared = True
+
+    def __init__(self, path=DEFAULT_SQLITE_PATH, busy_timeout=5.0):
+        self.path = path
+        self.busy_timeout = busy_timeout
+        self._local = threading.local()
+        self._connect().executescript(SQLITE_SCHEMA)
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=self.busy_timeout, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def load(self, session_id):
+        row = self._connect().execute("SELECT state FROM sessions WHERE session_id = ?", (session_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def version(self, session_id):
+        """
+        Just the record's version, without reading and parsing the whole record.
+        """
+        row = self._connect().execute(
+            "SELECT json_extract(state, '$.version') FROM sessions WHERE session_id = ?", (session_id,)
+        ).fetchone()
+        return row[0] if row else 0
+
+    def update(self, session_id, change):
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT state FROM sessions WHERE session_id = ?", (session_id,)).fetchone()
+            record, result = apply_change(json.loads(row[0]) if row else new_record(), change)
+            conn.execute(
+                "INSERT OR REPLACE INTO sessions (session_id, state, updated) VALUES (?, ?, ?)",
+                (session_id, json.dumps(record), time.time()),
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return record, result
+
+    def touch(self, session_id):
+        self._connect().execute("UPDATE sessions SET updated = ? WHERE session_id = ?", (time.time(), session_id))
+
+    def expire(self, cutoff):
+        self._connect().execute(
+            "DELETE FROM sessions WHERE updated < ? AND json_extract(state, '$.running') = 0", (cutoff,)
+        )
+
+    def close(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+class RedisStateBackend:
+    """
+    Navigation records in Redis (or any server speaking its protocol), for
+    workers spread over several machines. Updates use WATCH/MULTI and records
+    expire on their own after ttl seconds without activity.
+    """
+    shared = True
+    prefix = "navigation:"
+
+    def __init__(self, url, ttl=30 * 60):
+        import redis  # Optional, only needed for this backend
+        self.client = redis.Redis.from_url(url)
+        self.watch_error = redis.WatchError
+        self.ttl = ttl
+
+    def load(self, session_id):
+        raw = self.client.get(self.prefix + session_id)
+        return json.loads(raw) if raw else None
+
+    def version(self, session_id):
+        record = self.load(session_id)
+        return record["version"] if record is not None else 0
+
+    def update(self, session_id, change):
+        key = self.prefix + session_id
+        with self.client.pipeline() as pipe:
+            while True:
+                try:
+                    pipe.watch(key)
+                    raw = pipe.get(key)
+                    record, result = apply_change(json.loads(raw) if raw else new_record(), change)
+                    pipe.multi()
+                    pipe.set(key, json.dumps(record), ex=self.ttl)
+                    pipe.execute()
+                    return record, result
+                except self.watch_error:
+                    continue  # Another worker wrote first; retry on its version
+
+    def touch(self, session_id):
+        self.client.expire(self.prefix + session_id, self.ttl)
+
+    def expire(self, cutoff):
+        pass  # Redis expires keys by TTL
+
+    def close(self):
+        self.client.close()
+
+
+def create_backend(url=STATE_BACKEND, idle_timeout=30 * 60):
+    """
+    Build the backend named by url: "memory", "sqlite" / "sqlite:///path" or "redis://...".
+    """
+    if url in ("", "memory"):
+        return MemoryStateBackend()
+    if url == "sqlite":
+        return SQLiteStateBackend()
+    if url.startswith("sqlite:///"):
+        return SQLiteStateBackend(url[len("sqlite:///"):])
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        return RedisStateBackend(url, ttl=idle_timeout)
+    raise ValueError(f"Unknown STATE_BACKEND {url!r}")
@@ -0,0 +1,46 @@
+// Shown when the voice prompt cannot go on, so the page never just goes quiet
+const VOICE_UNAVAILABLE = 'The voice prompt is not available right now. Please use the buttons below.';
+
+function showVoiceStatus(message) {
+    const status = document.querySelector('.voice-status');
+    if (status) {
+        status.textContent = message;
+        status.hidden = false;
+    }
+}
+
+function pollVoicePrompt(url) {
+    fetch(url)
+        .then(response => response.json().then(data => ({ok: response.ok, data: data})))
+        .then(({ok, data}) => {
+            if (data.redirect) {
+                window.location.href = data.redirect;
+            } else if (data.status === 'queued' || data.status === 'running') {
+                setTimeout(() => pollVoicePrompt(url), 1000);
+            } else if (!ok || data.status === 'failed') {
+                showVoiceStatus(VOICE_UNAVAILABLE);
+            }
+        })
+        .catch(error => {
+            console.error('Error checking voice prompt:', error);
+            showVoiceStatus(VOICE_UNAVAILABLE);
+        });
+}
+
+function startVoicePrompt() {
+    fetch('/start_voice_prompt')
+        .then(response => response.json().then(data => ({ok: response.ok, data: data})))
+        .then(({ok, data}) => {
+            if (data.redirect) {
+                window.location.href = data.redirect;
+            } else if (data.poll) {
+                pollVoicePrompt(data.poll);
+            } else if (!ok) {
+                showVoiceStatus(VOICE_UNAVAILABLE);
+            }
+        })
+        .catch(error => {
+            console.error('Error starting voice prompt:', error);
+            showVoiceStatus(VOICE_UNAVAILABLE);
+        });
+}
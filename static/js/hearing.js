@@ -0,0 +1,76 @@
+let currentCourse = '';
+let currentIndex = 0;
+let currentTopics = {};
+let localMedia = {};  // lesson index -> URL of a locally served video
+
+function loadCourse(course) {
+    currentCourse = course;
+    currentIndex = 0;
+    localMedia = {};
+    const media = $.getJSON(`/api/media/${encodeURIComponent(course)}`).then(function(entries) {
+        entries.forEach(function(entry) { localMedia[entry.index] = entry.url; });
+    }, function() {
+        return $.Deferred().resolve();  // No local media: fall back to YouTube
+    });
+    const topics = $.getJSON(`/api/course/${encodeURIComponent(course)}`);
+    $.when(topics, media).done(function(topicsResult) {
+        currentTopics = topicsResult[0];
+        updateContent();
+    }).fail(function() {
+        $('.video').html('<p style="color: red;">Failed to load course data.</p>');
+    });
+}
+
+function prefetchNeighbours() {
+    $('link[data-prefetch]').remove();
+    [currentIndex + 1, currentIndex - 1].forEach(function(index) {
+        if (localMedia[index]) {
+            $('<link rel="prefetch" as="video" data-prefetch>').attr('href', localMedia[index]).appendTo('head');
+        }
+    });
+}
+
+function updateContent() {
+    if (currentTopics && currentTopics[currentIndex]) {
+        const video = currentTopics[currentIndex];
+        let player = '<p>No video available for this lesson.</p>';
+        if (localMedia[currentIndex]) {
+            player = `<video src="${localMedia[currentIndex]}" controls preload="auto"></video>`;
+        } else if (video.url) {
+            const videoId = video.url.split('?')[0].replace('https://youtu.be/', '');
+            player = `<iframe src="https://www.youtube.com/embed/${videoId}" allowfullscreen></iframe>`;
+        }
+        $('.video').html(`
+            <h2>${video.title}</h2>
+         <p><strong>Summary:</strong></p>
+         <p>${video.summary || 'Explore this sign language lesson.'}</p>
+            ${player}
+        `);
+        prefetchNeighbours();
+        $('.buttons button').prop('disabled', false);
+        if (currentIndex === 0) $('#prevBtn').prop('disabled', true);
+        if (currentIndex === currentTopics.length - 1) $('#nextBtn').prop('disabled', true);
+    } else {
+        $('.video').html('<p>No video available for this course.</p>');
+    }
+}
+
+$(document).ready(function() {
+    $('.sidebar li').click(function() {
+        loadCourse($(this).data('course'));
+    });
+
+    $('.buttons button#prevBtn').click(function() {
+        if (currentIndex > 0) {
+            currentIndex--;
+            updateContent();
+        }
+    });
+
+    $('.buttons button#nextBtn').click(function() {
+        if (currentIndex < (currentTopics.length || 0) - 1) {
+            currentIndex++;
+            updateContent();
+        }
+    });
+});
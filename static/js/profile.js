@@ -0,0 +1,128 @@
+const recognition = new (window.SpeechRecognition || window.webkitSpeechRecognition)();
+recognition.lang = 'en-US';
+recognition.continuous = false;
+
+const fields = [
+    { id: 'name', prompt: 'Please say your full name.' },
+    { id: 'email', prompt: 'Please say your email address.' },
+    { id: 'phone', prompt: 'Please say your phone number.' }
+];
+let currentFieldIndex = 0;
+let awaitingSaveCommand = false;
+
+function speak(text) {
+    const utterance = new SpeechSynthesisUtterance(text);
+    utterance.lang = 'en-US';
+    window.speechSynthesis.speak(utterance);
+    utterance.onend = () => {
+        recognition.start(); // Start listening after speaking
+    };
+}
+
+recognition.onresult = (event) => {
+    const transcript = event.results[0][0].transcript.trim().toLowerCase();
+
+    if (awaitingSaveCommand) {
+        if (transcript === 'save profile') {
+            submitForm();
+        } else {
+            speak('Please say "save profile" to save your details.');
+        }
+        return;
+    }
+
+    const currentField = fields[currentFieldIndex];
+    document.getElementById(currentField.id).value = transcript;
+
+    currentFieldIndex++;
+    if (currentFieldIndex < fields.length) {
+        speak(fields[currentFieldIndex].prompt);
+    } else {
+        awaitingSaveCommand = true;
+        speak('All details collected. Say "save profile" or click the submit button to save your information.');
+    }
+};
+
+recognition.onerror = (event) => {
+    console.error('Speech recognition error:', event.error);
+    speak('Sorry, I didn’t catch that. Please try again.');
+    recognition.start(); // Retry
+};
+
+recognition.onend = () => {
+    if (currentFieldIndex >= fields.length && !awaitingSaveCommand) {
+        recognition.stop();
+    }
+};
+
+// Start the process
+window.onload = () => {
+    speak(fields[0].prompt);
+};
+
+// Submit to Google Form and display details
+function submitForm() {
+    const name = document.getElementById('name').value;
+    const email = document.getElementById('email').value;
+    const phone = document.getElementById('phone').value;
+
+    // Your Google Form submission URL
+    const googleFormURL = 'https://docs.google.com/forms/d/e/1FAIpQLSfUZskTLTH4VAsOUsSD7T1FLpMZrBQUIfL3ozTgiL-HAD2l6w/formResponse';
+    const formData = new FormData();
+    formData.append('entry.1087795436', name);   // Full Name
+    formData.append('entry.1751763089', email);  // Email Address
+    formData.append('entry.711138081', phone);   // Phone Number
+
+    fetch(googleFormURL, {
+        method: 'POST',
+        mode: 'no-cors', // Required for Google Forms
+        body: formData
+    })
+    .then(() => {
+        // Hide form and show success message
+        const successMessage = document.getElementById('successMessage');
+        const detailsSection = document.getElementById('detailsSection');
+        document.getElementById('profileForm').style.display = 'none'; // Hide form
+        successMessage.classList.add('show'); // Show success message
+
+        // Display user details
+        document.getElementById('displayName').textContent = name;
+        document.getElementById('displayEmail').textContent = email;
+        document.getElementById('displayPhone').textContent = phone;
+        detailsSection.classList.add('show'); // Show details section
+
+        // Auto-hide success message after 3 seconds
+        setTimeout(() => {
+            successMessage.classList.remove('show');
+        }, 3000);
+    })
+    .catch(error => {
+        console.error('Error submitting to Google Form:', error);
+        speak('There was an error saving your profile. Please try again.');
+    });
+}
+
+// Submit button functionality
+document.getElementById('submitButton').addEventListener('click', () => {
+    submitForm();
+});
+
+// Restart button functionality
+document.getElementById('restartButton').addEventListener('click', () => {
+    const detailsSection = document.getElementById('detailsSection');
+    const successMessage = document.getElementById('successMessage');
+    const profileForm = document.getElementById('profileForm');
+
+    // Reset UI
+    detailsSection.classList.remove('show');
+    successMessage.classList.remove('show');
+    profileForm.style.display = 'block'; // Show form again
+    document.getElementById('profileForm').reset(); // Clear form
+
+    // Reset state
+    awaitingSaveCommand = false;
+    currentFieldIndex = 0;
+
+    // Start over
+    speak(fields[0].prompt);
+});
@@ -0,0 +1,72 @@
+// Position when the page was rendered, from data attributes on <body>
+let currentCourse = document.body.dataset.course || null;
+let currentIndex = parseInt(document.body.dataset.index, 10) || 0;
+let totalTopics = 0;
+let isPolling = true;
+// "Say ... to start", rendered with the catalog's course names
+const coursePrompt = $('.mic-prompt').text();
+
+function applyState(response) {
+    if (response.content && response.content.title && response.content.summary) {
+        currentCourse = response.course;
+        currentIndex = response.index;
+        totalTopics = response.total;
+    }
+    updateContent(response.content);
+}
+
+function updateContent(content) {
+    console.log("Updating content:", JSON.stringify(content));
+    if (content && content.title && content.summary) {
+        $('.content').html(`
+            <h2>${content.title}</h2>
+            <p><strong>Summary:</strong> ${content.summary}</p>
+            ${content.example ? `<pre><strong>Example:</strong>\n${content.example}</pre>` : ''}
+            <p><em>Topic ${currentIndex + 1} of ${totalTopics}</em></p>
+        `);
+        $('.mic-prompt').hide();
+    } else {
+        $('.content').html('<p>Please select a course using voice commands.</p>');
+        $('.mic-prompt').show().text(coursePrompt);
+    }
+}
+
+function startPolling() {
+    // Fallback for browsers without EventSource, or when the server has no stream to spare
+    setInterval(function() {
+        if (!isPolling) return;
+        $.get('/api/state', function(response) {
+            console.log("Polled response:", JSON.stringify(response));
+            applyState(response);
+        }).fail(function(jqXHR, textStatus, errorThrown) {
+            console.log("Failed to fetch state:", textStatus, errorThrown);
+            $('.mic-prompt').show().text('Server error. Ensure app.py is running.');
+            isPolling = false;
+        });
+    }, 3000);
+}
+
+$(document).ready(function() {
+    if (!window.EventSource) {
+        startPolling();
+    } else {
+        // Server pushes a new state whenever voice or API navigation changes it
+        const stream = new EventSource('/api/stream');
+        stream.onmessage = function(event) {
+            const response = JSON.parse(event.data);
+            console.log("Pushed state:", JSON.stringify(response));
+            applyState(response);
+        };
+        stream.onerror = function() {
+            console.log("State stream interrupted, browser will reconnect");
+            if (stream.readyState === EventSource.CLOSED) {
+                // Refused (e.g. 503 when the server is at MAX_STREAMS); polling reports real outages
+                startPolling();
+            }
+        };
+    }
+    // Initial fetch
+    $.get('/api/state', function(response) {
+        applyState(response);
+    });
+});
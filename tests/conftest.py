@@ -0,0 +1,27 @@
+import os
+import sys
+import pytest
+
+# The app is a set of top-level modules; make them importable from the tests
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def application(tmp_path):
+    """
+    An app with its own progress database and in-memory navigation state.
+    """
+    import app
+    application = app.create_app({
+        "TESTING": True,
+        "SECRET_KEY": "test",
+        "PROGRESS_DB": str(tmp_path / "progress.sqlite"),
+        "STATE_BACKEND": "memory",
+    })
+    yield application
+    app.shutdown(application)
+
+
+@pytest.fixture
+def client(application):
+    return application.test_client()
@@ -0,0 +1,44 @@
+import app
+
+
+def learner_id(client):
+    with client.session_transaction() as cookie:
+        return cookie["learner_id"]
+
+
+def test_each_app_keeps_its_own_learner_state(tmp_path):
+    first = app.create_app({"SECRET_KEY": "test", "PROGRESS_DB": str(tmp_path / "first.sqlite")})
+    second = app.create_app({"SECRET_KEY": "test", "PROGRESS_DB": str(tmp_path / "second.sqlite")})
+    try:
+        assert first.extensions["learners"].progress.path.endswith("first.sqlite")
+        client = first.test_client()
+        client.get("/api/state")
+        assert len(first.extensions["learners"].sessions) == 1
+        assert len(second.extensions["learners"].sessions) == 0
+    finally:
+        app.shutdown(first)
+        app.shutdown(second)
+
+
+def test_state_is_revalidated_with_its_etag(client):
+    response = client.get("/api/state")
+    assert response.status_code == 200
+    etag = response.headers["ETag"]
+    assert client.get("/api/state", headers={"If-None-Match": etag}).status_code == 304
+
+
+def test_state_changes_with_navigation(client, application):
+    client.get("/api/state")
+    nav = application.extensions["learners"].sessions.get(learner_id(client))
+    course = next(iter(app.visual_catalog()))
+    nav.select_course(course, app.visual_catalog().course_view(course))
+    state = client.get("/api/state").get_json()
+    assert (state["course"], state["index"]) == (course, 0)
+    assert client.post("/api/navigate", json={"command": "next"}).get_json()["index"] == 1
+
+
+def test_metrics_report_this_apps_state(client):
+    client.get("/api/state")
+    body = client.get("/metrics").get_data(as_text=True)
+    assert "navigation_sessions 1" in body
+    assert "voice_prompt_jobs_active 0" in body
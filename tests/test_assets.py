@@ -0,0 +1,78 @@
+import gzip
+import os
+import pytest
+from assets import ASSET_CACHE_CONTROL, PLAIN_ASSET_CACHE_CONTROL, AssetManifest, fingerprinted_name
+
+STYLE = "body { color: black; }\n" * 100
+
+
+def write(path, text, offset):
+    path.write_text(text)
+    stamp = os.stat(path).st_mtime_ns + offset * 10**9
+    os.utime(path, ns=(stamp, stamp))
+
+
+@pytest.fixture
+def root(tmp_path):
+    (tmp_path / "css").mkdir()
+    write(tmp_path / "css" / "theme.css", STYLE, 0)
+    (tmp_path / "logo.png").write_bytes(b"\x89PNG" + bytes(2000))
+    return tmp_path
+
+
+def test_fingerprinted_name_keeps_the_extension():
+    assert fingerprinted_name("css/theme.css", "0123456789abcdef") == "css/theme.0123456789ab.css"
+
+
+def test_assets_are_served_by_both_names(root):
+    assets = AssetManifest(str(root))
+    url_name = assets.url_name("css/theme.css")
+    assert url_name != "css/theme.css" and url_name.startswith("css/theme.")
+    fingerprinted, fingerprinted_flag = assets.get(url_name)
+    plain, plain_flag = assets.get("css/theme.css")
+    assert fingerprinted is plain
+    assert (fingerprinted_flag, plain_flag) == (True, False)
+    assert gzip.decompress(plain.encoded["gzip"]).decode() == STYLE
+    assert assets.get("missing.css") == (None, False)
+    assert assets.url_name("missing.css") == "missing.css"
+
+
+def test_images_are_not_compressed(root):
+    prepared, _ = AssetManifest(str(root)).get("logo.png")
+    assert prepared.mimetype == "image/png"
+    assert prepared.encoded == {}
+
+
+def test_edits_get_a_new_name_and_the_old_one_keeps_working(root):
+    assets = AssetManifest(str(root), check_interval=0)
+    old = assets.url_name("css/theme.css")
+    write(root / "css" / "theme.css", "body { color: navy; }\n", 1)
+    new = assets.url_name("css/theme.css")
+    assert new != old
+    assert assets.version == 2
+    assert assets.get(new)[0].body == b"body { color: navy; }\n"
+    assert assets.get(old)[0].body == STYLE.encode()
+
+
+def test_checks_are_throttled(root):
+    assets = AssetManifest(str(root), check_interval=3600)
+    old = assets.url_name("css/theme.css")
+    write(root / "css" / "theme.css", "body { color: navy; }\n", 1)
+    assert assets.url_name("css/theme.css") == old
+    assert assets.refresh(force=True)
+    assert assets.url_name("css/theme.css") != old
+
+
+def test_asset_route_caching(client, application):
+    import app
+    with application.test_request_context():
+        url = app.asset_url("js/profile.js")
+    response = client.get(url, headers={"Accept-Encoding": "gzip"})
+    assert response.status_code == 200
+    assert response.headers["Cache-Control"] == ASSET_CACHE_CONTROL
+    assert response.headers["Content-Encoding"] == "gzip"
+    plain = client.get("/assets/js/profile.js")
+    assert plain.headers["Cache-Control"] == PLAIN_ASSET_CACHE_CONTROL
+    assert "Content-Encoding" not in plain.headers
+    assert gzip.decompress(response.data) == plain.data
+    assert client.get("/assets/css/missing.css").status_code == 404
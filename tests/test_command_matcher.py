@@ -0,0 +1,60 @@
+from command_matcher import CommandMatcher, matcher_for
+
+
+def alternatives(*transcripts):
+    return [(transcript, 0.0) for transcript in transcripts]
+
+
+def test_exact_alias_and_near_misses():
+    matcher = matcher_for("navigation")
+    assert matcher.match(alternatives("next"))[0] == "next"
+    assert matcher.match(alternatives("go back"))[0] == "previous"
+    assert matcher.match(alternatives("nest"))[0] == "next"
+    assert matcher.match(alternatives("previews"))[0] == "previous"
+
+
+def test_words_split_by_the_recognizer_are_joined():
+    matcher = CommandMatcher(["python", "java"])
+    assert matcher.match(alternatives("pie thon"))[0] == "python"
+
+
+def test_later_alternatives_still_count():
+    matcher = matcher_for("yes_no")
+    assert matcher.match(alternatives("jess", "yes"))[0] == "yes"
+
+
+def test_unrelated_speech_matches_nothing():
+    command, score = matcher_for("navigation").match(alternatives("banana"))
+    assert command is None
+    assert score < 0.7
+
+
+def test_two_exact_commands_are_ambiguous():
+    assert matcher_for("navigation").match(alternatives("next stop"))[0] is None
+    assert matcher_for("yes_no").match(alternatives("yes no"))[0] is None
+
+
+def test_course_names_with_several_words():
+    matcher = CommandMatcher(["python", "data science"])
+    assert matcher.match(alternatives("data science"))[0] == "data science"
+
+
+def test_matcher_is_shared_until_the_commands_change():
+    first = matcher_for("course", ["python", "java"])
+    assert matcher_for("course", ["python", "java"]) is first
+    changed = matcher_for("course", ["python", "java", "rust"])
+    assert changed is not first
+    assert changed.match(alternatives("rust"))[0] == "rust"
+
+
+def test_exact_hit_beats_exact_hit_one_rank_down():
+    # Recognizer N-best lists: an exact hit at rank 0 must not tie with one at rank 1
+    assert matcher_for("yes_no").match(alternatives("no", "yes"))[0] == "no"
+    assert matcher_for("navigation").match(alternatives("stop", "next"))[0] == "stop"
+
+
+def test_ordinary_words_are_not_commands():
+    matcher = matcher_for("navigation")
+    assert matcher.match(alternatives("the end of the example"))[0] is None
+    assert matcher.match(alternatives("text"))[0] is None
+    assert matcher.match(alternatives("research"))[0] is None
@@ -0,0 +1,65 @@
+import itertools
+import json
+import os
+import time
+import pytest
+from content_store import ContentStore
+
+CATALOG = {
+    "Python": [{"title": "Variables"}, {"title": "Loops"}],
+    "Java": [{"title": "Classes"}],
+}
+
+
+# Seconds added to each write's mtime, so edits register even on file systems with coarse timestamps
+_later = itertools.count(1)
+
+
+def write(path, data):
+    path.write_text(data if isinstance(data, str) else json.dumps(data))
+    stamp = time.time_ns() + next(_later) * 10**9
+    os.utime(path, ns=(stamp, stamp))
+
+
+@pytest.fixture
+def catalog(tmp_path):
+    path = tmp_path / "visual.json"
+    write(path, CATALOG)
+    return path
+
+
+def test_behaves_like_the_catalog_dict(catalog):
+    store = ContentStore(str(catalog))
+    assert list(store) == ["Python", "Java"]
+    assert store["Python"] == CATALOG["Python"]
+    assert store.get_topic("Python", 1) == {"title": "Loops"}
+    assert store.get_topic("Python", 2) is None
+    view = store.course_view("Python")
+    assert len(view) == 2 and view[-1]["title"] == "Loops"
+    with pytest.raises(KeyError):
+        store["Rust"]
+
+
+def test_an_existing_index_is_reused(catalog):
+    ContentStore(str(catalog))
+    built = os.path.getmtime(str(catalog) + ".index.sqlite")
+    store = ContentStore(str(catalog))
+    assert os.path.getmtime(str(catalog) + ".index.sqlite") == built
+    assert store["Java"] == CATALOG["Java"]
+
+
+def test_edits_are_picked_up_and_views_follow(catalog):
+    store = ContentStore(str(catalog), check_interval=0)
+    view = store.course_view("Python")
+    version = store.version
+    write(catalog, dict(CATALOG, Python=CATALOG["Python"] + [{"title": "Functions"}]))
+    assert len(view) == 3 and view[2]["title"] == "Functions"
+    assert store.version == version + 1
+
+
+def test_a_broken_edit_keeps_the_previous_content(catalog):
+    store = ContentStore(str(catalog), check_interval=0)
+    write(catalog, "{not json")
+    assert store["Python"] == CATALOG["Python"]
+    write(catalog, {"Rust": [{"title": "Ownership"}]})
+    assert list(store) == ["Rust"]
@@ -0,0 +1,99 @@
+import json
+import sys
+import pytest
+import ingest
+
+MARKDOWN = """# Python
+
+## Variables
+A variable names a value — it is created on assignment.
+url: https://example.com/variables
+
+```
+x = 1
+```
+
+## Loops
+Loops repeat code.
+It is 3 × faster than copying.
+media: loops.mp4
+"""
+
+
+@pytest.fixture
+def sources(tmp_path):
+    visual = tmp_path / "sources" / "visual"
+    visual.mkdir(parents=True)
+    (visual / "a_python.md").write_text(MARKDOWN, encoding="utf-8")
+    (visual / "b_more.json").write_text(json.dumps({"course": "Python", "topics": [
+        {"title": "variables", "summary": "Repeated under another file."},
+        {"title": "Functions", "summary": "Functions group code."},
+        {"title": "No summary"},
+        {"title": "Bad link", "summary": "x", "url": "ftp://example.com"},
+        {"title": "Escape", "summary": "x", "media": "../secret.mp4"},
+    ]}), encoding="utf-8")
+    (visual / "c_java.json").write_text(json.dumps([{"title": "Classes", "summary": "Blueprints."}]), encoding="utf-8")
+    (visual / "notes.txt").write_text("ignored")
+    return tmp_path / "sources"
+
+
+def test_markdown_sources_become_topics(sources):
+    path, courses, errors = ingest.compile_file(str(sources / "visual" / "a_python.md"))
+    assert errors == []
+    variables, loops = courses["Python"]
+    assert variables["title"] == "Variables"
+    assert variables["summary"] == "A variable names a value: it is created on assignment."
+    assert variables["example"] == "x = 1"
+    assert variables["url"] == "https://example.com/variables"
+    assert loops["summary"] == "Loops repeat code. It is 3 times faster than copying."
+    assert loops["media"] == "loops.mp4"
+    assert loops["speech_seconds"] > 0
+
+
+def test_invalid_topics_are_reported_and_left_out(sources):
+    path, courses, errors = ingest.compile_file(str(sources / "visual" / "b_more.json"))
+    assert [topic["title"] for topic in courses["Python"]] == ["variables", "Functions"]
+    assert len(errors) == 3
+    assert "missing summary" in errors[0]
+    assert "invalid url" in errors[1]
+    assert "media must be a relative path" in errors[2]
+
+
+def test_a_list_is_a_course_named_after_its_file(sources):
+    _, courses, _ = ingest.compile_file(str(sources / "visual" / "c_java.json"))
+    assert list(courses) == ["c_java"]
+
+
+def test_unreadable_source_is_an_error(tmp_path):
+    path = tmp_path / "broken.json"
+    path.write_text("{not json")
+    _, courses, errors = ingest.compile_file(str(path))
+    assert courses == {} and len(errors) == 1
+
+
+def test_merge_keeps_the_first_copy_of_a_title():
+    first = ("a", {"Python": [{"title": "Loops", "summary": "first"}]}, [])
+    second = ("b", {"Python": [{"title": " loops ", "summary": "second"}, {"title": "Sets", "summary": "x"}]}, [])
+    catalog, duplicates = ingest.merge([first, second])
+    assert duplicates == 1
+    assert [topic["summary"] for topic in catalog["Python"]] == ["first", "x"]
+
+
+def run(monkeypatch, *args):
+    monkeypatch.setattr(sys, "argv", ["ingest.py", *map(str, args)])
+    return ingest.main()
+
+
+def test_main_writes_the_merged_catalog(sources, tmp_path, monkeypatch):
+    assert run(monkeypatch, sources, "--output-dir", tmp_path, "--workers", 2) == 0
+    catalog = json.loads((tmp_path / "visual.json").read_text(encoding="utf-8"))
+    assert [topic["title"] for topic in catalog["Python"]] == ["Variables", "Loops", "Functions"]
+    assert [topic["title"] for topic in catalog["c_java"]] == ["Classes"]
+    assert not (tmp_path / "hearing.json").exists()
+
+
+def test_strict_and_dry_runs_write_nothing(sources, tmp_path, monkeypatch):
+    assert run(monkeypatch, sources, "--output-dir", tmp_path, "--workers", 1, "--strict") == 1
+    assert run(monkeypatch, sources, "--output-dir", tmp_path, "--workers", 1, "--dry-run") == 0
+    assert not (tmp_path / "visual.json").exists()
+    assert run(monkeypatch, tmp_path / "empty", "--output-dir", tmp_path) == 1
@@ -0,0 +1,68 @@
+import threading
+from jobs import JobManager
+from state_backend import SQLiteStateBackend
+
+
+def waiting_job(started):
+    def target(job):
+        started.set()
+        job.cancel_event.wait(10)
+        return "stopped"
+    return target
+
+
+def test_an_owner_gets_one_pending_job():
+    manager = JobManager(max_workers=2, max_pending=2)
+    try:
+        started = threading.Event()
+        first = manager.submit(waiting_job(started), owner="learner")
+        assert manager.submit(waiting_job(started), owner="learner") is first
+        other = manager.submit(waiting_job(threading.Event()), owner="someone else")
+        assert other is not None and other is not first
+        # One learner reloading does not fill the queue for everyone else
+        assert manager.active == 2
+    finally:
+        manager.shutdown()
+
+
+def test_cancel_only_for_the_owner():
+    manager = JobManager()
+    try:
+        started = threading.Event()
+        job = manager.submit(waiting_job(started), owner="learner")
+        assert started.wait(5)
+        assert manager.cancel(job.job_id, owner="someone else") is None
+        assert manager.cancel(job.job_id, owner="learner") is job
+        manager._executor.shutdown(wait=True)
+        assert job.status == "cancelled"
+        assert job.result == "stopped"
+        # A cancelled job no longer blocks a new one for the same owner
+        assert not job.pending
+    finally:
+        manager.shutdown()
+
+
+def test_cancel_through_another_process(tmp_path):
+    path = str(tmp_path / "state.sqlite")
+    running, other = JobManager(backend=SQLiteStateBackend(path)), JobManager(backend=SQLiteStateBackend(path))
+    try:
+        started = threading.Event()
+        job = running.submit(waiting_job(started), owner="learner")
+        assert started.wait(5)
+        assert other.get(job.job_id).status == "running"
+        assert other.cancel(job.job_id, owner="learner") is not None
+        running._executor.shutdown(wait=True)
+        assert other.get(job.job_id).status == "cancelled"
+    finally:
+        running.shutdown()
+        other.shutdown()
+
+
+def test_shutdown_stops_running_jobs():
+    manager = JobManager()
+    started = threading.Event()
+    job = manager.submit(waiting_job(started), owner="learner")
+    assert started.wait(5)
+    manager.shutdown()
+    manager._executor.shutdown(wait=True)
+    assert job.status == "cancelled"
@@ -0,0 +1,83 @@
+import json
+import os
+import pytest
+import media
+from content_store import ContentStore
+
+VIDEO = bytes(range(256)) * 4
+
+
+@pytest.fixture
+def media_dir(tmp_path):
+    directory = tmp_path / "media"
+    directory.mkdir()
+    for name in ("one.mp4", "two.mp4", "three.mp4"):
+        (directory / name).write_bytes(VIDEO)
+    (tmp_path / "secret.txt").write_text("not media")
+    return directory
+
+
+@pytest.fixture
+def store(tmp_path):
+    path = tmp_path / "hearing.json"
+    path.write_text(json.dumps({"Signs": [
+        {"title": "One", "media": "one.mp4"},
+        {"title": "Two", "media": "two.mp4"},
+        {"title": "No video"},
+        {"title": "Three", "media": "three.mp4"},
+        {"title": "Missing", "media": "missing.mp4"},
+    ]}))
+    return ContentStore(str(path))
+
+
+def test_media_path_stays_inside_the_media_directory(media_dir):
+    assert media.media_path("one.mp4", str(media_dir)) == os.path.realpath(media_dir / "one.mp4")
+    assert media.media_path("missing.mp4", str(media_dir)) is None
+    assert media.media_path("../secret.txt", str(media_dir)) is None
+    assert media.media_path(str(media_dir.parent / "secret.txt"), str(media_dir)) is None
+    assert media.media_path("", str(media_dir)) is None
+
+
+def test_symlinks_out_of_the_media_directory_are_refused(media_dir):
+    os.symlink(media_dir.parent / "secret.txt", media_dir / "escape.mp4")
+    assert media.media_path("escape.mp4", str(media_dir)) is None
+
+
+def test_manifest_lists_local_videos_and_their_neighbours(store, media_dir):
+    manifest = media.MediaManifest(store, str(media_dir))
+    assert [(entry["index"], entry["media"], entry["bytes"]) for entry in manifest.course("Signs")] == [
+        (0, "one.mp4", len(VIDEO)), (1, "two.mp4", len(VIDEO)), (3, "three.mp4", len(VIDEO)),
+    ]
+    assert manifest.neighbours("one.mp4") == ["two.mp4"]
+    assert manifest.neighbours("two.mp4") == ["one.mp4"]
+    assert manifest.neighbours("three.mp4") == []
+    (media_dir / "missing.mp4").write_bytes(VIDEO)
+    os.utime(media_dir, ns=(0, os.stat(media_dir).st_mtime_ns + 10**9))
+    assert [entry["index"] for entry in manifest.course("Signs")] == [0, 1, 3, 4]
+    assert manifest.neighbours("three.mp4") == ["missing.mp4"]
+
+
+@pytest.fixture
+def media_client(client, monkeypatch, store, media_dir):
+    import app
+    monkeypatch.setattr(app, "MEDIA_DIR", str(media_dir))
+    monkeypatch.setattr(app, "media_path", lambda name: media.media_path(name, str(media_dir)))
+    monkeypatch.setattr(app, "_hearing_media", media.MediaManifest(store, str(media_dir)))
+    return client
+
+
+def test_range_requests_get_partial_content(media_client):
+    response = media_client.get("/media/two.mp4", headers={"Range": "bytes=10-19"})
+    assert response.status_code == 206
+    assert response.data == VIDEO[10:20]
+    assert response.headers["Content-Range"] == f"bytes 10-19/{len(VIDEO)}"
+    assert response.headers["Link"] == "</media/one.mp4>; rel=prefetch; as=video"
+    response.close()
+
+    etag = media_client.get("/media/two.mp4").headers["ETag"]
+    assert media_client.get("/media/two.mp4", headers={"If-None-Match": etag}).status_code == 304
+
+
+@pytest.mark.parametrize("name", ["..%2Fsecret.txt", "%2E%2E/secret.txt", "missing.mp4"])
+def test_files_outside_the_media_directory_are_not_served(media_client, name):
+    assert media_client.get(f"/media/{name}").status_code == 404
@@ -0,0 +1,36 @@
+import pytest
+
+visually = pytest.importorskip("visually")
+
+
+class SpeakingTo:
+    """
+    Stands in for the speech pool: only the given session is speaking.
+    """
+
+    def __init__(self, session):
+        self.session = session
+
+    def speaking(self, session=None):
+        return session is None or session == self.session
+
+
+def stream(session, energy):
+    microphone = visually.MicrophoneStream(microphone=object(), session=session)
+    microphone.noise_floor = 100.0
+    microphone.measure_energy = lambda: energy
+    return microphone
+
+
+def test_other_learners_speech_does_not_skip_the_noise_floor(monkeypatch):
+    monkeypatch.setattr(visually, "speech_pool", SpeakingTo("other learner"))
+    microphone = stream("learner", 150.0)
+    microphone.refresh()
+    assert microphone.noise_floor == pytest.approx(115.0)
+
+
+def test_own_speech_is_not_ambient_noise(monkeypatch):
+    monkeypatch.setattr(visually, "speech_pool", SpeakingTo("learner"))
+    microphone = stream("learner", 150.0)
+    microphone.refresh()
+    assert microphone.noise_floor == 100.0
@@ -0,0 +1,100 @@
+import threading
+from navigation import NavigationSession, SessionRegistry
+from state_backend import SQLiteStateBackend
+
+TOPICS = [{"title": "One"}, {"title": "Two"}, {"title": "Three"}]
+
+
+def topics_for(course):
+    return TOPICS if course == "Python" else []
+
+
+def test_moves_stay_inside_the_course():
+    nav = NavigationSession("learner", topics_for=topics_for)
+    nav.select_course("Python", TOPICS)
+    assert not nav.move("previous")
+    assert nav.move("next") and nav.move("next")
+    assert not nav.move("next")
+    assert nav.current_topic()["title"] == "Three"
+    assert nav.move("stop")
+    assert (nav.course, nav.index) == (None, 0)
+
+
+def test_version_counts_position_changes_only():
+    changes = []
+    nav = NavigationSession("learner", topics_for=topics_for, on_change=lambda *change: changes.append(change))
+    nav.select_course("Python", TOPICS)
+    version = nav.version
+    nav.stop_voice_prompt()
+    nav.move("previous")
+    assert nav.version == version
+    nav.move("next")
+    assert nav.version == version + 1
+    assert [(record["course"], record["index"], total) for _, record, total in changes] == [("Python", 0, 3), ("Python", 1, 3)]
+
+
+def test_learners_are_kept_apart():
+    registry = SessionRegistry(topics_for=topics_for)
+    try:
+        first, second = registry.get("first"), registry.get("second")
+        first.select_course("Python", TOPICS)
+        first.move("next")
+        assert registry.get("first") is first
+        assert (second.course, second.index) == (None, 0)
+    finally:
+        registry.shutdown()
+
+
+def test_least_recently_used_session_is_evicted():
+    registry = SessionRegistry(max_sessions=2)
+    try:
+        oldest = registry.get("a")
+        registry.get("b")
+        registry.get("c")
+        assert len(registry) == 2
+        assert oldest.stop_requested
+        assert registry.get("a", create=False) is None
+    finally:
+        registry.shutdown()
+
+
+def test_waiters_wake_on_a_change():
+    nav = NavigationSession("learner", topics_for=topics_for)
+    nav.select_course("Python", TOPICS)
+    version = nav.version
+    timer = threading.Timer(0.05, nav.move, ["next"])
+    timer.start()
+    assert nav.wait_for_change(version, timeout=5) == version + 1
+    assert nav.wait_for_change(version + 1, timeout=0.05) == version + 1
+
+
+def test_processes_share_position_and_one_voice_loop(tmp_path):
+    path = str(tmp_path / "state.sqlite")
+    here = NavigationSession("learner", SQLiteStateBackend(path), topics_for)
+    there = NavigationSession("learner", SQLiteStateBackend(path), topics_for)
+    here.select_course("Python", TOPICS)
+    here.move("next")
+    assert there.snapshot()["content"]["title"] == "Two"
+    assert here.claim_voice_loop()
+    assert not there.claim_voice_loop()
+    here.release_voice_loop()
+    assert there.claim_voice_loop()
+
+
+def test_voice_loop_runs_once_per_learner():
+    registry = SessionRegistry(topics_for=topics_for)
+    try:
+        nav = registry.get("learner")
+        release = threading.Event()
+        started = []
+
+        def loop(nav):
+            started.append(nav.session_id)
+            release.wait(5)
+        assert registry.start_voice_loop(nav, loop)
+        assert not registry.start_voice_loop(nav, loop)
+        release.set()
+        registry._executor.shutdown(wait=True)
+        assert started == ["learner"] and not nav.running
+    finally:
+        registry.shutdown()
@@ -0,0 +1,137 @@
+import time
+from progress import ProgressStore, merge_progress
+
+
+def entry(index, updated, furthest=None, started=None, completed_at=None, total=10):
+    return {
+        "index": index,
+        "furthest": index if furthest is None else furthest,
+        "total": total,
+        "started": updated if started is None else started,
+        "updated": updated,
+        "completed_at": completed_at,
+    }
+
+
+def test_merge_into_nothing_copies():
+    new = entry(3, 5.0)
+    merged = merge_progress(None, new)
+    assert merged == new
+    assert merged is not new
+
+
+def test_merge_latest_position_wins_and_furthest_only_grows():
+    merged = merge_progress(entry(7, 2.0), entry(2, 3.0))
+    assert merged["index"] == 2
+    assert merged["furthest"] == 7
+    assert merged["started"] == 2.0
+    assert merged["updated"] == 3.0
+
+
+def test_merge_is_order_independent():
+    old, new = entry(7, 2.0, total=10), entry(2, 3.0, total=12)
+    assert merge_progress(old, new) == merge_progress(new, old)
+
+
+def test_merge_keeps_latest_completion():
+    merged = merge_progress(entry(9, 4.0, completed_at=4.0), entry(1, 6.0))
+    assert merged["completed_at"] == 4.0
+    merged = merge_progress(merged, entry(9, 8.0, completed_at=8.0))
+    assert merged["completed_at"] == 8.0
+
+
+def test_store_reads_buffered_and_flushed_progress(tmp_path):
+    store = ProgressStore(str(tmp_path / "progress.sqlite"))
+    try:
+        store.record("learner", "Java", 19, 20, now=1.0)
+        store.record("learner", "Java", 9, 20, now=2.0)
+        assert store.position("learner", "Java") == 9
+        assert store.flush() == 1
+        assert store.pending == 0
+        (java,) = store.courses("learner")
+        assert (java["index"], java["furthest"], java["completed"]) == (9, 19, False)
+        assert store.resume_point("learner")["course"] == "Java"
+    finally:
+        store.close()
+
+
+def test_store_finishes_only_on_complete_and_restarts_after(tmp_path):
+    store = ProgressStore(str(tmp_path / "progress.sqlite"))
+    try:
+        store.record("learner", "Python", 4, 5, now=1.0)
+        assert store.resume_point("learner")["index"] == 4
+        store.complete("learner", "Python", 5, now=2.0)
+        store.flush()
+        assert store.resume_point("learner") is None
+        assert store.position("learner", "Python") == 0
+        store.record("learner", "Python", 1, 5, now=3.0)
+        (python,) = store.courses("learner")
+        assert python["completed"] and not python["finished"]
+        assert store.position("learner", "Python") == 1
+    finally:
+        store.close()
+
+
+def test_store_ignores_other_learners_and_empty_courses(tmp_path):
+    store = ProgressStore(str(tmp_path / "progress.sqlite"))
+    try:
+        store.record("a", "Java", 1, 20, now=1.0)
+        store.record("b", None, 0, 0, now=1.0)
+        assert store.courses("b") == []
+        assert [entry["course"] for entry in store.courses("a")] == ["Java"]
+    finally:
+        store.close()
+
+
+def test_full_batch_is_written_without_waiting_for_the_interval(tmp_path):
+    store = ProgressStore(str(tmp_path / "progress.sqlite"), flush_interval=60, batch_size=2)
+    try:
+        store.record("a", "Java", 1, 20, now=1.0)
+        store.record("b", "Java", 2, 20, now=1.0)
+        deadline = time.monotonic() + 5
+        while store.pending and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert store.pending == 0
+    finally:
+        store.close()
+
+
+def test_close_writes_what_is_buffered(tmp_path):
+    path = str(tmp_path / "progress.sqlite")
+    store = ProgressStore(path, flush_interval=60)
+    store.record("learner", "Java", 3, 20, now=1.0)
+    store.close()
+    store.record("learner", "Java", 4, 20, now=2.0)  # Ignored once closed
+    reopened = ProgressStore(path)
+    try:
+        assert reopened.position("learner", "Java") == 3
+    finally:
+        reopened.close()
+
+
+def test_navigation_without_a_course_keeps_the_last_position(tmp_path):
+    store = ProgressStore(str(tmp_path / "progress.sqlite"))
+    try:
+        store.on_navigation("learner", {"course": "Java", "index": 5}, 20)
+        store.on_navigation("learner", {"course": None, "index": 0}, 0)
+        assert store.position("learner", "Java") == 5
+    finally:
+        store.close()
+
+
+def test_dashboard_shows_progress_and_study_again(client, application):
+    import app
+    client.get("/api/state")
+    with client.session_transaction() as cookie:
+        learner = cookie["learner_id"]
+    course = next(iter(app.visual_catalog()))
+    topics = app.visual_catalog().course_view(course)
+    nav = application.extensions["learners"].sessions.get(learner)
+    nav.select_course(course, topics)
+    page = client.get("/dashboard").get_data(as_text=True)
+    assert f"Topic 1 of {len(topics)}" in page
+    assert "Continue" in page and "Study again" not in page
+
+    application.extensions["learners"].progress.complete(learner, course, len(topics), now=time.time() + 1)
+    page = client.get("/dashboard").get_data(as_text=True)
+    assert "Completed" in page and "Study again" in page
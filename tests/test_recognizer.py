@@ -0,0 +1,26 @@
+import os
+import pytest
+
+pytest.importorskip("pocketsphinx")
+visually = pytest.importorskip("visually")
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def capture(name):
+    return os.path.join(ROOT, name)
+
+
+def test_keyword_spotting_returns_one_hypothesis():
+    alternatives = visually.transcribe_file(capture("debug_audio_1754380380.wav"))
+    assert alternatives == [("no", 0.0)]
+    assert visually.match_command(alternatives, "yes_no") == "no"
+
+
+@pytest.mark.parametrize("name", ["debug_audio_1754380390.wav", "debug_audio_1754380402.wav"])
+def test_echo_of_the_yes_no_prompt_is_not_a_command(name):
+    # These captures picked up the app saying "say yes or no"; both keywords are heard
+    alternatives = visually.transcribe_file(capture(name), ["yes", "no"])
+    assert len(alternatives) == 1
+    assert {"yes", "no"} <= set(alternatives[0][0].split())
+    assert visually.match_command(alternatives, "yes_no") is None
@@ -0,0 +1,37 @@
+from flask import Flask
+from responses import PreparedResponse, send_prepared
+
+PAYLOAD = {"topics": ["Topic %d" % number for number in range(200)]}
+
+
+def client():
+    app = Flask(__name__)
+    prepared = PreparedResponse(PAYLOAD)
+
+    @app.route("/data")
+    def data():
+        return send_prepared(prepared, "no-cache")
+
+    return app.test_client()
+
+
+def test_each_encoding_has_its_own_etag():
+    test_client = client()
+    identity = test_client.get("/data", headers={"Accept-Encoding": "identity"})
+    gzipped = test_client.get("/data", headers={"Accept-Encoding": "gzip"})
+    assert "Content-Encoding" not in identity.headers
+    assert gzipped.headers["Content-Encoding"] == "gzip"
+    assert identity.headers["ETag"] != gzipped.headers["ETag"]
+    assert identity.headers["Vary"] == "Accept-Encoding"
+
+
+def test_not_modified_only_for_the_variant_the_client_has():
+    test_client = client()
+    gzipped = test_client.get("/data", headers={"Accept-Encoding": "gzip"})
+    etag = gzipped.headers["ETag"]
+    again = test_client.get("/data", headers={"Accept-Encoding": "gzip", "If-None-Match": etag})
+    assert again.status_code == 304
+    assert again.headers["ETag"] == etag
+    other = test_client.get("/data", headers={"Accept-Encoding": "identity", "If-None-Match": etag})
+    assert other.status_code == 200
+    assert other.get_json() == PAYLOAD
@@ -0,0 +1,86 @@
+import json
+import os
+import time
+import pytest
+from content_store import ContentStore
+from search import SearchIndex, analyze, stem
+
+PYTHON = [
+    {"title": "Exception Handling", "summary": "Catch errors with try and except.", "example": "try: pass"},
+    {"title": "Loops", "summary": "Repeat code with for and while.", "example": ""},
+    {"title": "Functions", "summary": "Define reusable code and handle arguments.", "example": "def f(): pass"},
+]
+JAVA = [
+    {"title": "Exceptions in Java", "summary": "Throw and catch exceptions.", "example": ""},
+]
+
+
+class Catalog(dict):
+    version = 1
+
+
+@pytest.fixture
+def index():
+    return SearchIndex({"visual": {"Python": PYTHON, "Java": JAVA}})
+
+
+def test_stemming_matches_word_forms():
+    assert stem("handling") == stem("handle")
+    assert stem("exceptions") == stem("exception")
+    assert analyze("What is the loop") == ["loop"]
+
+
+def test_title_matches_rank_first(index):
+    results = index.search("exception")
+    assert {(r["course"], r["index"]) for r in results[:2]} == {("Java", 0), ("Python", 0)}
+    assert all(r["score"] < results[1]["score"] for r in results[2:])
+
+
+def test_topics_matching_more_terms_rank_higher(index):
+    results = index.search("exception handling")
+    assert (results[0]["course"], results[0]["index"]) == ("Python", 0)
+
+
+def test_prefixes_match(index):
+    assert index.search("func")[0]["title"] == "Functions"
+
+
+def test_filters_and_limits(index):
+    assert {r["course"] for r in index.search("exception", course="Python")} == {"Python"}
+    assert index.search("exception", catalog="hearing") == []
+    assert len(index.search("code", limit=1)) == 1
+
+
+def test_queries_without_terms_find_nothing(index):
+    assert index.search("") == []
+    assert index.search("what is the") == []
+
+
+def test_rebuilds_when_a_catalog_reloads():
+    catalog = Catalog(Python=PYTHON)
+    index = SearchIndex({"visual": catalog})
+    assert index.search("recursion") == []
+    catalog["Python"] = PYTHON + [{"title": "Recursion", "summary": "Functions calling themselves."}]
+    catalog.version = 2
+    assert index.search("recursion")[0]["index"] == 3
+
+
+def test_an_edited_catalog_file_is_searched_without_another_route(tmp_path):
+    path = tmp_path / "visual.json"
+    path.write_text(json.dumps({"Python": PYTHON}))
+    store = ContentStore(str(path), check_interval=0)
+    index = SearchIndex({"visual": store})
+    assert index.search("recursion") == []
+    path.write_text(json.dumps({"Python": PYTHON + [{"title": "Recursion", "summary": "Functions calling themselves."}]}))
+    os.utime(path, ns=(time.time_ns() + 10**9,) * 2)
+    assert index.search("recursion")[0]["index"] == 3
+
+
+def test_search_endpoint_limits(client, monkeypatch):
+    import app
+    monkeypatch.setattr(app, "_topic_search", SearchIndex({"visual": {"Python": PYTHON}}))
+    assert len(client.get("/api/search?q=code&limit=-5").get_json()["results"]) == 1
+    assert len(client.get("/api/search?q=code&limit=0").get_json()["results"]) == 1
+    assert len(client.get("/api/search?q=code").get_json()["results"]) == 2
+    assert client.get("/api/search?q=code&limit=two").status_code == 400
+    assert client.get("/api/search").status_code == 400
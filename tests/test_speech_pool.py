@@ -0,0 +1,162 @@
+import threading
+import time
+import pytest
+
+visually = pytest.importorskip("visually")
+
+
+class HeldSynthesizer:
+    """
+    pyttsx3-compatible engine that records what it says and keeps "speaking"
+    until the test releases it or playback is interrupted.
+    """
+
+    def __init__(self, spoken, release):
+        self.spoken = spoken
+        self.release = release
+        self.started = threading.Event()
+        self.stopped = threading.Event()
+
+    def getProperty(self, name):
+        return "test" if name == "voice" else None
+
+    def say(self, text):
+        self.spoken.append(text)
+
+    def runAndWait(self):
+        self.stopped.clear()
+        self.started.set()
+        while not (self.release.is_set() or self.stopped.is_set()):
+            self.release.wait(0.01)
+
+    def stop(self):
+        self.stopped.set()
+
+
+class Engines(list):
+    """
+    Synthesizers created by the pool, what they said, and one switch releasing them all.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.spoken = []
+        self.release = threading.Event()
+
+    def create(self):
+        engine = HeldSynthesizer(self.spoken, self.release)
+        self.append(engine)
+        return engine
+
+
+@pytest.fixture
+def engines(monkeypatch):
+    """
+    Make the pool speak live through HeldSynthesizers, without the audio cache.
+    """
+    engines = Engines()
+    monkeypatch.setattr(visually, "use_nsspeech", False)
+    monkeypatch.setattr(visually, "AUDIO_PLAYER", None)
+    monkeypatch.setattr(visually, "audio_cache", None)
+    monkeypatch.setattr(visually, "audio_cache_opened", True)
+    monkeypatch.setattr(visually, "synthesizer_factory", engines.create)
+    return engines
+
+
+@pytest.fixture
+def pool(engines):
+    pool = visually.SpeechPool(size=1, limit=3, shared_synthesizer=False)
+    pool.start()
+    yield pool
+    engines.release.set()
+    pool.shutdown(timeout=1)
+
+
+def utterance(text, session="learner", priority=visually.PRIORITY_PROMPT, key=None):
+    return visually.SpeechHandle(text, post_delay=0, priority=priority, session=session, key=key)
+
+
+def hold(pool, engines, session="learner"):
+    """
+    Keep the worker busy speaking for session and return the handle.
+    """
+    handle = pool.submit(utterance("Hold on.", session))
+    assert wait_until(lambda: engines and engines[0].started.is_set())
+    return handle
+
+
+def wait_until(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+def test_session_speaks_most_urgent_first(pool, engines):
+    hold(pool, engines)
+    content = pool.submit(utterance("Some content.", priority=visually.PRIORITY_CONTENT))
+    urgent = pool.submit(utterance("Stopping.", priority=visually.PRIORITY_URGENT))
+    engines.release.set()
+    assert content.wait(2) and urgent.wait(2)
+    assert engines.spoken == ["Hold on.", "Stopping.", "Some content."]
+
+
+def test_newer_utterance_replaces_a_waiting_one_with_its_key(pool, engines):
+    hold(pool, engines)
+    stale = pool.submit(utterance("Topic one.", key="topic"))
+    fresh = pool.submit(utterance("Topic two.", key="topic"))
+    assert stale.done() and stale.cancelled
+    assert pool.depth() == 1
+    engines.release.set()
+    assert fresh.wait(2)
+    assert engines.spoken == ["Hold on.", "Topic two."]
+
+
+def test_full_queue_drops_its_least_urgent_utterance(pool, engines):
+    hold(pool, engines)
+    first = pool.submit(utterance("First content.", priority=visually.PRIORITY_CONTENT))
+    second = pool.submit(utterance("Second content.", priority=visually.PRIORITY_CONTENT))
+    pool.submit(utterance("A prompt."))
+    pool.submit(utterance("Urgent.", priority=visually.PRIORITY_URGENT))
+    assert first.done() and first.cancelled
+    assert pool.depth() == 3
+    third = pool.submit(utterance("Third content.", priority=visually.PRIORITY_CONTENT))
+    assert second.done() and not third.done()  # The oldest of the least urgent goes first
+    pool.submit(utterance("Another prompt."))
+    late = pool.submit(utterance("Fourth content.", priority=visually.PRIORITY_CONTENT))
+    assert late.done() and late.cancelled  # Less urgent than everything waiting
+
+
+def test_cancel_cuts_off_the_session_and_wakes_waiters(pool, engines):
+    playing = hold(pool, engines)
+    waiting = pool.submit(utterance("Never spoken."))
+    assert pool.speaking("learner")
+    pool.cancel("learner")
+    assert waiting.done() and waiting.cancelled
+    assert playing.wait(2) and playing.cancelled
+    assert pool.wait_idle("learner", timeout=2)
+    assert not pool.speaking()
+    assert engines.spoken == ["Hold on."]
+
+
+def test_wait_idle_times_out_while_speaking(pool, engines):
+    hold(pool, engines)
+    assert not pool.wait_idle("learner", timeout=0.05)
+    assert pool.wait_idle("someone else", timeout=0.05)
+
+
+def test_sessions_are_spoken_side_by_side(engines):
+    pool = visually.SpeechPool(size=2, limit=3, shared_synthesizer=False)
+    pool.start()
+    try:
+        first = pool.submit(utterance("For the first learner.", "first"))
+        second = pool.submit(utterance("For the second learner.", "second"))
+        assert wait_until(lambda: len(engines) == 2 and all(engine.started.is_set() for engine in engines))
+        assert not (first.done() or second.done())
+        engines.release.set()
+        assert first.wait(2) and second.wait(2)
+    finally:
+        engines.release.set()
+        pool.shutdown(timeout=1)
@@ -0,0 +1,34 @@
+import json
+import os
+import subprocess
+import sys
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Same budget as `python benchmark.py --import-budget-ms`
+IMPORT_BUDGET_SECONDS = 1.5
+# Only loaded once a voice flow runs, never by creating the app
+FORBIDDEN_IMPORTS = ["visually", "hearing", "speech_recognition", "tkinter", "pyttsx3"]
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import app
+app.create_app()
+elapsed = time.perf_counter() - start
+print(json.dumps({"seconds": elapsed, "forbidden": [name for name in %r if name in sys.modules]}))
+"""
+
+
+def probe():
+    env = dict(os.environ, SECRET_KEY="test", STATE_BACKEND="memory")
+    output = subprocess.run(
+        [sys.executable, "-c", PROBE % (FORBIDDEN_IMPORTS,)],
+        cwd=BASE_DIR, env=env, capture_output=True, text=True, check=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def test_create_app_is_fast_and_leaves_the_speech_stack_unloaded():
+    result = probe()
+    assert result["forbidden"] == []
+    assert result["seconds"] < IMPORT_BUDGET_SECONDS
@@ -0,0 +1,83 @@
+import threading
+import time
+import pytest
+from state_backend import SQLiteStateBackend, create_backend
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "state.sqlite")
+
+
+def select(course, index):
+    def change(record):
+        record["course"] = course
+        record["index"] = index
+        return "moved"
+    return change
+
+
+def test_missing_session(path):
+    backend = SQLiteStateBackend(path)
+    assert backend.load("nobody") is None
+    assert backend.version("nobody") == 0
+
+
+def test_update_bumps_the_version_only_when_the_position_moves(path):
+    backend = SQLiteStateBackend(path)
+    record, result = backend.update("learner", select("Python", 2))
+    assert result == "moved"
+    assert (record["course"], record["index"], record["version"]) == ("Python", 2, 1)
+
+    def heartbeat(record):
+        record["heartbeat"] = 123.0
+    record, _ = backend.update("learner", heartbeat)
+    assert record["version"] == 1
+    assert backend.load("learner")["heartbeat"] == 123.0
+    assert backend.version("learner") == 1
+
+
+def test_processes_sharing_the_file_see_each_other(path):
+    first, second = SQLiteStateBackend(path), SQLiteStateBackend(path)
+    first.update("learner", select("Java", 4))
+    assert second.load("learner")["index"] == 4
+    second.update("learner", select("Java", 5))
+    assert first.version("learner") == 2
+
+
+def test_expire_keeps_running_sessions(path):
+    backend = SQLiteStateBackend(path)
+    backend.update("idle", select("Python", 0))
+
+    def claim(record):
+        record["running"] = True
+    backend.update("looping", claim)
+    backend.expire(time.time() + 1)
+    assert backend.load("idle") is None
+    assert backend.load("looping")["running"] is True
+
+
+def test_create_backend_names(path):
+    assert isinstance(create_backend(f"sqlite:///{path}"), SQLiteStateBackend)
+    assert create_backend("memory").shared is False
+    with pytest.raises(ValueError):
+        create_backend("postgres://nowhere")
+
+
+def test_waiters_see_changes_made_through_another_process(path, monkeypatch):
+    import navigation
+    monkeypatch.setattr(navigation, "CHANGE_POLL_INTERVAL", 0.05)
+    waiting = navigation.NavigationSession("learner", SQLiteStateBackend(path))
+    other = navigation.NavigationSession("learner", SQLiteStateBackend(path))
+    version = waiting.version
+    threading.Timer(0.1, other.select_course, ["Python", [{"title": "One"}]]).start()
+    start = time.monotonic()
+    assert waiting.wait_for_change(version, timeout=5) == version + 1
+    assert time.monotonic() - start < 1
+
+
+def test_memory_backend_versions():
+    backend = create_backend("memory")
+    assert backend.version("learner") == 0
+    backend.update("learner", select("Python", 1))
+    assert backend.version("learner") == 1
@@ -0,0 +1,59 @@
+import json
+import threading
+import app
+
+
+def learner(client, application):
+    client.get("/api/state")
+    with client.session_transaction() as cookie:
+        learner_id = cookie["learner_id"]
+    return application.extensions["learners"].sessions.get(learner_id)
+
+
+def event(chunk):
+    if isinstance(chunk, bytes):
+        chunk = chunk.decode()
+    fields = dict(line.split(": ", 1) for line in chunk.strip().splitlines())
+    return int(fields["id"]), json.loads(fields["data"])
+
+
+def test_stream_sends_the_state_then_each_change(client, application):
+    nav = learner(client, application)
+    course = next(iter(app.visual_catalog()))
+    nav.select_course(course, app.visual_catalog().course_view(course))
+    response = client.get("/api/stream", buffered=False)
+    assert response.mimetype == "text/event-stream"
+    events = iter(response.response)
+    version, state = event(next(events))
+    assert (state["course"], state["index"]) == (course, 0)
+    nav.move("next")
+    next_version, state = event(next(events))
+    assert next_version == version + 1 and state["index"] == 1
+    response.close()
+
+
+def test_reconnecting_client_skips_the_state_it_has(client, application):
+    nav = learner(client, application)
+    course = next(iter(app.visual_catalog()))
+    nav.select_course(course, app.visual_catalog().course_view(course))
+    # The test client reads the first chunk before returning, so the change has to come from elsewhere
+    threading.Timer(0.1, nav.move, ["next"]).start()
+    response = client.get("/api/stream", buffered=False, headers={"Last-Event-ID": str(nav.version)})
+    version, state = event(next(iter(response.response)))
+    assert version == nav.version and state["index"] == 1
+    response.close()
+
+
+def test_streams_beyond_the_limit_fall_back_to_polling(tmp_path):
+    application = app.create_app({"SECRET_KEY": "test", "PROGRESS_DB": str(tmp_path / "progress.sqlite"), "MAX_STREAMS": 1})
+    try:
+        first = application.test_client().get("/api/stream", buffered=False)
+        refused = application.test_client().get("/api/stream")
+        assert refused.status_code == 503
+        assert refused.headers["Retry-After"]
+        first.close()
+        second = application.test_client().get("/api/stream", buffered=False)
+        assert second.status_code == 200
+        second.close()
+    finally:
+        app.shutdown(application)
@@ -0,0 +1,90 @@
+import array
+import math
+import pytest
+
+visually = pytest.importorskip("visually")
+sr = visually.sr
+
+
+class Recording:
+    """
+    AudioSource replaying 16-bit mono samples, then silence once they run out.
+    """
+    SAMPLE_WIDTH = 2
+    CHUNK = 1024
+
+    def __init__(self, samples, rate):
+        self.SAMPLE_RATE = rate
+        self.data = samples.tobytes()
+        self.stream = self
+
+    def read(self, size):
+        wanted = size * self.SAMPLE_WIDTH
+        chunk, self.data = self.data[:wanted], self.data[wanted:]
+        return chunk + b"\0" * (wanted - len(chunk))
+
+
+def silence(seconds, rate):
+    return array.array("h", [0] * int(seconds * rate))
+
+
+def tone(seconds, rate, amplitude=8000):
+    return array.array("h", (int(amplitude * math.sin(2 * math.pi * 440 * n / rate)) for n in range(int(seconds * rate))))
+
+
+def seconds(audio):
+    return len(audio.frame_data) / audio.sample_rate / audio.sample_width
+
+
+@pytest.fixture(autouse=True)
+def energy_detector(monkeypatch):
+    """
+    Use the RMS fallback so the results do not depend on webrtcvad being installed.
+    """
+    monkeypatch.setattr(visually, "use_webrtcvad", False)
+    monkeypatch.setattr(visually, "_voice_activity_detector", None)
+
+
+@pytest.fixture
+def recognizer():
+    recognizer = sr.Recognizer()
+    recognizer.energy_threshold = 300
+    return recognizer
+
+
+def test_utterance_is_cut_to_the_speech_and_resampled(recognizer):
+    rate = 44100
+    source = Recording(silence(1.0, rate) + tone(1.0, rate) + silence(2.0, rate), rate)
+    audio = visually.listen_for_utterance(recognizer, source, timeout=3)
+    assert (audio.sample_rate, audio.sample_width) == (visually.VAD_SAMPLE_RATE, 2)
+    # The tone plus the pre-roll and trailing pad, none of the leading second of silence
+    expected = 1.0 + visually.VAD_PRE_ROLL + visually.VAD_TRAILING_PAD
+    assert seconds(audio) == pytest.approx(expected, abs=0.1)
+    # Ends on the short trailing pad, not the end_silence that closed the phrase
+    tail = audio.frame_data[-int(visually.VAD_TRAILING_PAD * visually.VAD_SAMPLE_RATE) * 2:]
+    assert visually.audioop.rms(tail, 2) < recognizer.energy_threshold
+
+
+def test_sixteen_khz_eight_bit_audio_is_widened(recognizer):
+    rate = visually.VAD_SAMPLE_RATE
+    source = Recording(tone(0.5, rate) + silence(1.0, rate), rate)
+    source.SAMPLE_WIDTH = 1
+    source.data = visually.audioop.lin2lin(source.data, 2, 1)
+    audio = visually.listen_for_utterance(recognizer, source, timeout=1)
+    assert audio.sample_width == 2
+    assert seconds(audio) == pytest.approx(0.5 + visually.VAD_TRAILING_PAD, abs=0.1)
+
+
+def test_clicks_do_not_start_a_phrase(recognizer):
+    rate = visually.VAD_SAMPLE_RATE
+    click = tone(visually.VAD_FRAME_MS / 1000, rate)
+    source = Recording(click + silence(0.5, rate) + click + silence(1.0, rate), rate)
+    with pytest.raises(sr.WaitTimeoutError):
+        visually.listen_for_utterance(recognizer, source, timeout=1)
+
+
+def test_phrase_time_limit_caps_continuous_speech(recognizer):
+    rate = visually.VAD_SAMPLE_RATE
+    source = Recording(tone(5.0, rate), rate)
+    audio = visually.listen_for_utterance(recognizer, source, timeout=1, phrase_time_limit=1.0)
+    assert seconds(audio) == pytest.approx(1.0, abs=0.05)
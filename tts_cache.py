@@ -0,0 +1,142 @@
+import hashlib
+import json
+import os
+import threading
+from content_store import BASE_DIR
+
+# Directory holding pre-synthesized audio, one file per text/voice/rate combination
+CACHE_DIR = os.environ.get("TTS_CACHE_DIR", os.path.join(BASE_DIR, "tts_cache"))
+# Upper bound on the total size of cached audio before the least recently played files are evicted
+MAX_CACHE_BYTES = int(os.environ.get("TTS_CACHE_MAX_BYTES", 200 * 1024 * 1024))
+MANIFEST_NAME = "manifest.json"
+
+
+def cache_key(text, voice, rate):
+    """
+    Content hash identifying the audio for text spoken with the given voice and rate.
+    """
+    digest = hashlib.sha256()
+    digest.update(f"{voice}\0{rate}\0{text}".encode("utf-8"))
+    return digest.hexdigest()
+
+
+class TTSCache:
+    """
+    Size-bounded on-disk cache of synthesized speech keyed by cache_key().
+    """
+
+    def __init__(self, voice, rate, extension=".wav", cache_dir=CACHE_DIR, max_bytes=MAX_CACHE_BYTES):
+        self.voice = voice
+        self.rate = rate
+        self.extension = extension
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+        self._total_bytes = sum(size for _, size, _ in self._entries())
+
+    def path_for(self, text):
+        return os.path.join(self.cache_dir, cache_key(text, self.voice, self.rate) + self.extension)
+
+    def lookup(self, text):
+        """
+        Return the cached audio path for text, or None on a miss.
+        """
+        path = self.path_for(text)
+        try:
+            os.utime(path)  # Mark as recently played for eviction
+        except OSError:
+            return None
+        return path
+
+    def store(self, text, render):
+        """
+        Render text with render(text, path) into the cache and return the final path.
+        """
+        path = self.path_for(text)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp{self.extension}"
+        render(text, tmp_path)
+        if not os.path.exists(tmp_path) or os.path.getsize(tmp_path) == 0:
+            raise RuntimeError(f"Synthesizer produced no audio for '{text[:40]}'")
+        with self._lock:
+            replaced = os.path.getsize(path) if os.path.exists(path) else 0
+            os.replace(tmp_path, path)
+            self._total_bytes += os.path.getsize(path) - replaced
+            if self._total_bytes > self.max_bytes:
+                self._evict(keep=path)
+        return path
+
+    def _entries(self):
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(self.extension) or ".tmp" in name:
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            yield path, stat.st_size, stat.st_mtime
+
+    def _evict(self, keep=None):
+        # Caller holds self._lock
+        for path, size, _ in sorted(self._entries(), key=lambda entry: entry[2]):
+            if self._total_bytes <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            try:
+                os.remove(path)
+                self._total_bytes -= size
+            except OSError:
+                pass
+        print(f"TTS cache evicted down to {self._total_bytes} bytes")
+
+    def sync(self, digest, texts):
+        """
+        Drop audio rendered for an older version of the content identified by digest.
+        """
+        manifest_path = os.path.join(self.cache_dir, MANIFEST_NAME)
+        try:
+            with open(manifest_path, "r") as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            manifest = {}
+        keys = sorted(cache_key(text, self.voice, self.rate) for text in texts)
+        if manifest.get("digest") == digest and manifest.get("keys") == keys:
+            return 0
+        stale = set(manifest.get("keys", [])) - set(keys)
+        removed = 0
+        with self._lock:
+            for key in stale:
+                path = os.path.join(self.cache_dir, key + self.extension)
+                try:
+                    self._total_bytes -= os.path.getsize(path)
+                    os.remove(path)
+                    removed += 1
+                except OSError:
+                    pass
+        with open(manifest_path, "w") as f:
+            json.dump({"digest": digest, "keys": keys}, f)
+        if removed:
+            print(f"TTS cache invalidated {removed} stale entries after content change")
+        return removed
+
+    def build(self, texts, render):
+        """
+        Pre-render every text that is not cached yet; returns the number rendered.
+        """
+        rendered = 0
+        for text in texts:
+            if self.lookup(text) is None:
+                self.store(text, render)
+                rendered += 1
+        return rendered
+
+
+if __name__ == "__main__":
+    # Offline build step: python tts_cache.py
+    import app
+    import visually
+    texts = visually.cacheable_texts() + app.voice_prompts()
+    count = visually.prerender(texts)
+    print(f"Pre-rendered {count} of {len(set(texts))} prompts into {CACHE_DIR}")
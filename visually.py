@@ -1,115 +1,1103 @@
 import speech_recognition as sr
-import pyttsx3
 import time
-import json
+import atexit
+import audioop
+import collections
+import itertools
 import os
-import queue
+import re
+import shutil
+import signal
+import subprocess
+import sys
 import threading
+import command_matcher
+import metrics
+import tts_cache
+from content_store import visual_catalog, VISUAL_CATALOG
+from debug_recorder import DebugAudioRecorder
 try:
-    from AppKit import NSSpeechSynthesizer  # macOS native TTS
+    from AppKit import NSSpeechSynthesizer, NSURL  # macOS native TTS
     use_nsspeech = True
 except ImportError:
     use_nsspeech = False
     print("NSSpeechSynthesizer not available, falling back to pyttsx3")
+try:
+    import webrtcvad  # Optional, more robust speech detection than the energy threshold
+    use_webrtcvad = True
+except ImportError:
+    use_webrtcvad = False
 
-# Load course data
-with open("/Users/prasannas/Desktop/vs/project R/visual.json", "r") as f:
-    course_data = json.load(f)
-print("Course data loaded successfully from /Users/prasannas/Desktop/vs/project R/visual.json")
+# Course data, indexed on disk and reloaded when visual.json changes
+course_data = visual_catalog()
+print(f"Course data loaded successfully from {VISUAL_CATALOG}")
 
-# Initialize speech recognition
-recognizer = sr.Recognizer()
-# Speech queue for thread-safe TTS
-speech_queue = queue.Queue()
-speech_thread = None
+# Pool of speech workers fed by one queue per session (see SpeechPool), started on first use
+speech_pool = None
+tts_init_lock = threading.Lock()
+# Guards SpeechHandle.player, whatever is producing an utterance's audio, for barge-in
+playback_lock = threading.Lock()
+# Per thread: the session speak_text queues for, and in a worker the utterance being spoken
+speech_context = threading.local()
+DEFAULT_SPEECH_SESSION = "default"
+# Playback workers. pyttsx3 hands every thread the same engine, so its workers share
+# one Voice and take turns only to render a cache miss or speak live (see Voice)
+SPEECH_WORKERS = int(os.environ.get("SPEECH_WORKERS", 4))
+SHARED_SYNTHESIZER = not use_nsspeech
+# Utterances one session may have waiting before the stalest is dropped
+SPEECH_QUEUE_LIMIT = int(os.environ.get("SPEECH_QUEUE_LIMIT", 8))
+# Utterance priorities, most urgent first: error and retry prompts, dialogue prompts, topic content
+PRIORITY_URGENT = 0
+PRIORITY_PROMPT = 1
+PRIORITY_CONTENT = 2
+# Coalescing key of error and retry prompts: a newer one replaces any still waiting
+RETRY_KEY = "retry"
+# Longest we wait for an utterance to finish before listening anyway
+SPEECH_WAIT_TIMEOUT = 120
 
-def init_tts():
+# Callbacks receiving (stage, seconds) for each timed step of the voice pipeline:
+# prompt, calibration, noise_floor, listen, recognize, first_audio and speak
+stage_listeners = []
+
+# Exported on /metrics, see metrics.py
+STAGE_SECONDS = metrics.histogram("voice_stage_seconds", "Duration of each voice pipeline stage.", ["stage"])
+SPEECH_QUEUE_DEPTH = metrics.gauge("speech_queue_depth", "Utterances waiting for a speech worker, over all sessions.",
+                                   function=lambda: speech_pool.depth() if speech_pool is not None else 0)
+SPEECH_WORKERS_BUSY = metrics.gauge("speech_workers_busy", "Speech workers speaking an utterance right now.",
+                                    function=lambda: speech_pool.busy_workers() if speech_pool is not None else 0)
+SPEECH_QUEUE_WAIT = metrics.histogram("speech_queue_wait_seconds", "Time from speak_text until a speech worker picks the utterance up.")
+SPEECH_UTTERANCES = metrics.counter("speech_utterances", "Utterances handled by the speech pool, by how they were played or why they were not.", ["outcome"])
+RECOGNITION_ATTEMPTS = metrics.counter("recognition_attempts", "Listen attempts in recognize_command, by outcome.", ["outcome"])
+RECOGNITION_CONFIDENCE = metrics.histogram("recognition_confidence", "Confidence of recognized commands.",
+                                           buckets=(0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 1.0))
+CAPTURE_BYTES = metrics.histogram("voice_capture_bytes", "Size of the audio sent to the recognizer per listen.",
+                                  buckets=(8000, 16000, 32000, 64000, 128000, 256000, 512000, 1024000))
+COMMAND_MATCHES = metrics.counter("command_matches", "Recognized utterances by how they matched a command.", ["state", "match"])
+ATTEMPTS_PER_COMMAND = metrics.histogram("recognition_attempts_per_command", "Listen attempts recognize_command needed before it got a command.",
+                                         buckets=(1, 2, 3, 4, 5))
+BACKEND_FAILURES = metrics.counter("recognizer_backend_failures", "Recognizer backend calls that returned nothing usable.", ["backend"])
+
+def record_stage(stage, seconds):
+    STAGE_SECONDS.observe(seconds, stage=stage)
+    for listener in stage_listeners:
+        try:
+            listener(stage, seconds)
+        except Exception as e:
+            print(f"Error in stage listener: {str(e)}")
+
+# Sentence ends, and clause breaks used only to split sentences longer than MAX_CHUNK_CHARS
+SENTENCE_BREAK = re.compile(r"(?<=[.!?;])\s+")
+CLAUSE_BREAK = re.compile(r"(?<=,)\s+")
+MAX_CHUNK_CHARS = 160
+
+def split_sentences(text, max_chars=MAX_CHUNK_CHARS):
     """
-    Initialize a thread to handle speech synthesis using NSSpeechSynthesizer or pyttsx3.
+    Split text into sentence-sized chunks, breaking long sentences at commas,
+    so the first chunk can play while the rest is still being synthesized.
     """
-    global speech_thread
-    def speech_worker():
-        if use_nsspeech:
-            synthesizer = NSSpeechSynthesizer.alloc().init()
-            synthesizer.setRate_(180)  # Normal speed (180 wpm)
-            synthesizer.setVolume_(1.0)  # Max volume
+    chunks = []
+    for sentence in SENTENCE_BREAK.split(text.strip()):
+        if len(sentence) <= max_chars:
+            pieces = [sentence]
         else:
-            synthesizer = pyttsx3.init()
-            synthesizer.setProperty('rate', 140)  # Slower for clarity
-            synthesizer.setProperty('volume', 1.0)  # Max volume
-        
-        while True:
+            pieces = []
+            for clause in CLAUSE_BREAK.split(sentence):
+                if pieces and len(pieces[-1]) + len(clause) + 1 <= max_chars:
+                    pieces[-1] += " " + clause
+                else:
+                    pieces.append(clause)
+            if len(pieces) > 1 and len(pieces[-1]) < max_chars // 4:
+                tail = pieces.pop()
+                pieces[-1] += " " + tail  # Don't end on a dangling fragment
+        chunks.extend(piece for piece in pieces if piece)
+    return chunks or [text]
+
+class SpeechHandle:
+    """
+    Completion handle for a queued utterance, signalled by the speech pool when
+    playback actually ends or the utterance is cancelled, dropped or replaced.
+    The text is spoken chunk by chunk; chunk_index is the chunk playing now and
+    chunks_done the number played to the end.
+    """
+    __slots__ = ("text", "post_delay", "priority", "session", "key", "sequence", "cancelled", "queued_at",
+                 "chunks", "chunk_index", "chunks_done", "stop_after_chunk", "player", "_done")
+
+    def __init__(self, text, post_delay=0.5, priority=PRIORITY_PROMPT, session=DEFAULT_SPEECH_SESSION, key=None):
+        self.text = text
+        self.post_delay = post_delay
+        self.priority = priority
+        self.session = session
+        self.key = text if key is None else key  # Waiting utterances with the same key coalesce
+        self.sequence = 0  # Arrival order, set by SpeechPool.submit
+        self.cancelled = False
+        self.queued_at = time.perf_counter()
+        self.chunks = split_sentences(text)
+        self.chunk_index = 0
+        self.chunks_done = 0
+        self.stop_after_chunk = False
+        self.player = None
+        self._done = threading.Event()
+
+    def done(self):
+        return self._done.is_set()
+
+    def wait(self, timeout=SPEECH_WAIT_TIMEOUT):
+        return self._done.wait(timeout)
+
+    def progress(self):
+        """
+        (chunks played to the end, total chunks).
+        """
+        return (self.chunks_done, len(self.chunks))
+
+    def cancel(self, immediate=True):
+        """
+        Stop speaking this utterance: right away, or once the current chunk
+        has finished if immediate is False.
+        """
+        if not immediate:
+            self.stop_after_chunk = True
+            return
+        self.cancelled = True
+        with playback_lock:
+            interrupt_playback(self)
+
+    def _finish(self):
+        self._done.set()
+
+# Speaking rate in words per minute for each synthesizer
+TTS_RATE = 180 if use_nsspeech else 140
+# Pre-synthesized audio cache, opened by the first speech worker once the voice is known
+audio_cache = None
+audio_cache_opened = False
+audio_cache_lock = threading.Lock()
+# Command-line player for cached audio files
+AUDIO_PLAYER = shutil.which("afplay") or shutil.which("aplay") or shutil.which("paplay")
+
+# Prompts spoken by recognize_command, pre-rendered by the TTS cache build step
+CALIBRATION_PROMPT = "Calibrating microphone. Please remain silent for two seconds."
+LISTENING_PROMPT = "Microphone is active. Please speak now."
+UNCLEAR_PROMPT = "I didn’t hear you clearly. Please speak louder and try again."
+SERVICE_ERROR_PROMPT = "I’m having trouble with the speech service. Please check your internet and try again."
+GENERIC_ERROR_PROMPT = "An error occurred. Please try again."
+GIVE_UP_PROMPT = "I couldn’t understand after several tries. Please restart the app."
+FIXED_PROMPTS = [CALIBRATION_PROMPT, LISTENING_PROMPT, UNCLEAR_PROMPT, SERVICE_ERROR_PROMPT,
+                 GENERIC_ERROR_PROMPT, GIVE_UP_PROMPT]
+
+def topic_speech(topic):
+    """
+    Text spoken for a topic: title, summary and example if present.
+    """
+    content = f"Topic: {topic['title']}. Summary: {topic['summary']}"
+    if "example" in topic:
+        content += f" Example: {topic['example']}"
+    return content
+
+def speech_chunks(texts):
+    """
+    The chunks the speech workers will actually synthesize for texts, i.e. the TTS cache keys.
+    """
+    return [chunk for text in texts for chunk in split_sentences(text)]
+
+def topic_texts():
+    return speech_chunks(topic_speech(topic) for topics in course_data.values() for topic in topics)
+
+def cacheable_texts():
+    return topic_texts() + speech_chunks(FIXED_PROMPTS)
+
+def create_synthesizer():
+    if use_nsspeech:
+        synthesizer = NSSpeechSynthesizer.alloc().init()
+        synthesizer.setRate_(TTS_RATE)  # Normal speed (180 wpm)
+        synthesizer.setVolume_(1.0)  # Max volume
+    else:
+        import pyttsx3  # Only loaded once something is actually spoken
+        synthesizer = pyttsx3.init()
+        synthesizer.setProperty('rate', TTS_RATE)  # Slower for clarity
+        synthesizer.setProperty('volume', 1.0)  # Max volume
+    return synthesizer
+
+class Voice:
+    """
+    A synthesizer and the lock serializing its use. Workers sharing a Voice
+    play cached files in parallel and hold the lock only while the
+    synthesizer itself is busy: rendering a cache miss or speaking live.
+    """
+    __slots__ = ("synthesizer", "lock")
+
+    def __init__(self, synthesizer):
+        self.synthesizer = synthesizer
+        self.lock = threading.Lock()
+
+def create_audio_cache(synthesizer):
+    """
+    Open the TTS cache for this synthesizer's voice and rate, or None if cached audio cannot be played.
+    """
+    if not AUDIO_PLAYER:
+        print("No audio player found, TTS cache disabled")
+        return None
+    voice = synthesizer.voice() if use_nsspeech else synthesizer.getProperty('voice')
+    extension = ".aiff" if sys.platform == "darwin" else ".wav"
+    cache = tts_cache.TTSCache(voice, TTS_RATE, extension=extension)
+    cache.sync(course_data.digest, topic_texts())
+    return cache
+
+def open_audio_cache(synthesizer):
+    """
+    Open the shared TTS cache with the first worker's synthesizer; later workers reuse it.
+    """
+    global audio_cache, audio_cache_opened
+    with audio_cache_lock:
+        if audio_cache_opened:
+            return
+        audio_cache_opened = True
+        try:
+            audio_cache = create_audio_cache(synthesizer)
+        except Exception as e:
+            print(f"TTS cache unavailable: {str(e)}")
+
+def render_to_file(synthesizer, text, path):
+    """
+    Synthesize text into an audio file instead of the speakers.
+    """
+    if use_nsspeech:
+        synthesizer.startSpeakingString_toURL_(text, NSURL.fileURLWithPath_(os.path.abspath(path)))
+        while synthesizer.isSpeaking():
+            time.sleep(0.05)
+    else:
+        synthesizer.save_to_file(text, path)
+        synthesizer.runAndWait()
+
+def set_player(player):
+    """
+    Record what produces audio for the utterance this worker is speaking, so it can be cut off.
+    """
+    utterance = getattr(speech_context, "utterance", None)
+    if utterance is None:
+        return
+    with playback_lock:
+        utterance.player = player
+        if player is not None and utterance.cancelled:
+            interrupt_playback(utterance)  # Cancelled while the player was starting
+
+def interrupt_playback(utterance):
+    """
+    Stop whatever is producing audio for utterance right now. Caller holds playback_lock.
+    """
+    player = utterance.player
+    if player is None:
+        return
+    try:
+        if isinstance(player, subprocess.Popen):
+            player.terminate()
+        elif use_nsspeech:
+            player.stopSpeaking()
+        else:
+            player.stop()
+    except Exception as e:
+        print(f"Could not interrupt playback: {str(e)}")
+
+def start_playback(path):
+    """
+    Start playing an audio file in the background and return the player process.
+    """
+    process = subprocess.Popen([AUDIO_PLAYER, path], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    set_player(process)
+    return process
+
+def finish_playback(process):
+    try:
+        returncode = process.wait()
+    finally:
+        set_player(None)
+    if returncode not in (0, -signal.SIGTERM):
+        raise subprocess.CalledProcessError(returncode, AUDIO_PLAYER)
+
+def play_audio_file(path):
+    finish_playback(start_playback(path))
+
+def speak_live(voice, text):
+    with voice.lock:
+        synthesizer = voice.synthesizer
+        set_player(synthesizer)
+        try:
+            if use_nsspeech:
+                synthesizer.startSpeakingString_(text)
+                while synthesizer.isSpeaking():
+                    time.sleep(0.1)
+            else:
+                synthesizer.say(text)
+                synthesizer.runAndWait()
+        finally:
+            set_player(None)
+
+def cached_audio(voice, text):
+    """
+    Return a cached audio file for text, rendering it on a miss; None if caching is unavailable.
+    """
+    if audio_cache is None:
+        return None
+    path = audio_cache.lookup(text)
+    if path is None:
+        with voice.lock:
+            path = audio_cache.lookup(text)  # Another worker may have rendered it while we waited
+            if path is not None:
+                return path
+            try:
+                path = audio_cache.store(text, lambda t, p: render_to_file(voice.synthesizer, t, p))
+                print(f"TTS cache miss, rendered '{text[:40]}'")
+            except Exception as e:
+                print(f"Could not render '{text[:40]}' to cache: {str(e)}")
+                return None
+    return path
+
+def prerender(texts):
+    """
+    Offline build step: render texts into the TTS cache ahead of time.
+    """
+    synthesizer = create_synthesizer()
+    cache = create_audio_cache(synthesizer)
+    if cache is None:
+        return 0
+    return cache.build(dict.fromkeys(speech_chunks(texts)), lambda t, p: render_to_file(synthesizer, t, p))
+
+def speak_chunks(voice, utterance):
+    """
+    Play utterance chunk by chunk from the TTS cache, rendering chunk N+1 while
+    chunk N plays; chunks that cannot be cached are spoken live. Returns how
+    the audio was produced: "cached", "live" or "mixed".
+    """
+    start_time = time.perf_counter()
+    first_audio = True
+    modes = set()
+    next_path = cached_audio(voice, utterance.chunks[0])
+    for index, chunk in enumerate(utterance.chunks):
+        if utterance.cancelled or (index and utterance.stop_after_chunk):
+            break
+        utterance.chunk_index = index
+        path = next_path
+        following = utterance.chunks[index + 1] if index + 1 < len(utterance.chunks) else None
+        process = None
+        if path is not None:
             try:
-                text, post_delay = speech_queue.get()
-                if text is None:
+                process = start_playback(path)
+            except OSError as e:
+                print(f"Could not start audio player: {str(e)}")
+        if first_audio:
+            record_stage("first_audio", time.perf_counter() - start_time)
+            first_audio = False
+        if process is None:
+            modes.add("live")
+            speak_live(voice, chunk)
+            if not utterance.cancelled:
+                utterance.chunks_done += 1
+            next_path = cached_audio(voice, following) if following and not utterance.stop_after_chunk else None
+            continue
+        modes.add("cached")
+        # The synthesizer is idle while the player runs, so render the next chunk now
+        if following and not (utterance.cancelled or utterance.stop_after_chunk):
+            next_path = cached_audio(voice, following)
+        try:
+            finish_playback(process)
+        except subprocess.CalledProcessError:
+            if not utterance.cancelled:
+                modes.add("live")
+                speak_live(voice, chunk)
+        if not utterance.cancelled:
+            utterance.chunks_done += 1
+    return "mixed" if len(modes) > 1 else (modes.pop() if modes else "cancelled")
+
+class SpeechPool:
+    """
+    Playback workers fed by one queue per session, each with its own Voice or,
+    with shared_synthesizer, all with one (see Voice). A session's utterances are spoken one at a time, most urgent first and in
+    arrival order within a priority, so they never overlap or reorder; other
+    sessions are spoken by other workers meanwhile. Each session queue holds
+    at most limit utterances: a waiting utterance with the same key as a new
+    one is replaced by it, and a full queue drops its least urgent, oldest
+    utterance. Dropped and replaced handles complete at once, so nobody waits
+    on speech that will never play.
+    """
+
+    def __init__(self, size=SPEECH_WORKERS, limit=SPEECH_QUEUE_LIMIT, shared_synthesizer=SHARED_SYNTHESIZER):
+        self.size = max(1, size)
+        self.limit = max(1, limit)
+        self.shared_synthesizer = shared_synthesizer
+        self._voice = None
+        self._voice_lock = threading.Lock()
+        self.condition = threading.Condition()
+        self.queues = {}  # session -> waiting utterances
+        self.busy = set()  # Sessions a worker is speaking for
+        self.ready_at = {}  # session -> when its next utterance may start, after post_delay
+        self.playing = set()
+        self.threads = []
+        self.closed = False
+        self._sequence = itertools.count()
+
+    def start(self):
+        for number in range(self.size):
+            thread = threading.Thread(target=self._work, name=f"speech-{number}", daemon=True)
+            thread.start()
+            self.threads.append(thread)
+
+    def submit(self, utterance):
+        with self.condition:
+            if self.closed:
+                self._discard(utterance, "cancelled")
+                return utterance
+            utterance.sequence = next(self._sequence)
+            pending = self.queues.setdefault(utterance.session, [])
+            for queued in pending:
+                if queued.key == utterance.key:
+                    # The newer copy takes the stale one's place in line
+                    pending.remove(queued)
+                    utterance.sequence = queued.sequence
+                    utterance.priority = min(utterance.priority, queued.priority)
+                    self._discard(queued, "superseded")
                     break
-                print(f"Speaking: '{text}'")
+            if len(pending) >= self.limit:
+                stalest = max(pending, key=lambda u: (u.priority, -u.sequence))
+                if stalest.priority < utterance.priority:
+                    self._discard(utterance, "dropped")
+                    return utterance
+                pending.remove(stalest)
+                self._discard(stalest, "dropped")
+            pending.append(utterance)
+            self.condition.notify()
+        return utterance
+
+    def _discard(self, utterance, outcome):
+        """
+        Complete a waiting utterance without speaking it. Caller holds the condition.
+        """
+        utterance.cancelled = True
+        utterance._finish()
+        SPEECH_UTTERANCES.inc(outcome=outcome)
+        if outcome == "dropped":
+            print(f"Speech queue for session {utterance.session} is full, dropped '{utterance.text[:40]}'")
+
+    def _take(self):
+        """
+        Block until some idle session has an utterance due; None once shut down.
+        """
+        with self.condition:
+            while not self.closed:
+                now = time.perf_counter()
+                best = None
+                wake = None
+                for session, pending in self.queues.items():
+                    if session in self.busy:
+                        continue
+                    ready = self.ready_at.get(session, 0)
+                    if ready > now:
+                        wake = ready if wake is None else min(wake, ready)
+                        continue
+                    head = min(pending, key=lambda u: (u.priority, u.sequence))
+                    if best is None or (head.priority, head.sequence) < (best.priority, best.sequence):
+                        best = head
+                if best is not None:
+                    pending = self.queues[best.session]
+                    pending.remove(best)
+                    if not pending:
+                        del self.queues[best.session]
+                    self.ready_at.pop(best.session, None)
+                    self.busy.add(best.session)
+                    self.playing.add(best)
+                    return best
+                self.condition.wait(None if wake is None else wake - now)
+            return None
+
+    def _release(self, utterance, spoken):
+        with self.condition:
+            self.playing.discard(utterance)
+            self.busy.discard(utterance.session)
+            if spoken and utterance.session in self.queues:
+                # Pause between consecutive utterances only; waiters are already released
+                self.ready_at[utterance.session] = time.perf_counter() + utterance.post_delay
+            self.condition.notify_all()
+
+    def _create_voice(self):
+        if not self.shared_synthesizer:
+            return Voice(synthesizer_factory())
+        with self._voice_lock:
+            if self._voice is None:
+                self._voice = Voice(synthesizer_factory())
+            return self._voice
+
+    def _work(self):
+        try:
+            voice = self._create_voice()
+        except Exception as e:
+            print(f"Could not start speech worker: {str(e)}")
+            return
+        open_audio_cache(voice.synthesizer)
+        while True:
+            utterance = self._take()
+            if utterance is None:
+                break
+            SPEECH_QUEUE_WAIT.observe(time.perf_counter() - utterance.queued_at)
+            speech_context.utterance = utterance
+            spoken = False
+            try:
+                if utterance.cancelled:
+                    SPEECH_UTTERANCES.inc(outcome="cancelled")
+                    continue
+                print(f"Speaking: '{utterance.text}'")
+                spoken = True
                 start_time = time.time()
-                if use_nsspeech:
-                    synthesizer.startSpeakingString_(text)
-                    while synthesizer.isSpeaking():
-                        time.sleep(0.1)
-                else:
-                    synthesizer.say(text)
-                    synthesizer.runAndWait()
+                outcome = speak_chunks(voice, utterance)
                 end_time = time.time()
-                print(f"Audio playback took {end_time - start_time:.2f} seconds")
-                time.sleep(post_delay)
-                speech_queue.task_done()
+                SPEECH_UTTERANCES.inc(outcome="interrupted" if utterance.cancelled else outcome)
+                print(f"Audio playback took {end_time - start_time:.2f} seconds{' (interrupted)' if utterance.cancelled else ''}")
+                record_stage("speak", end_time - start_time)
             except Exception as e:
-                print(f"Error in speech_worker: {str(e)}")
-    
-    speech_thread = threading.Thread(target=speech_worker, daemon=True)
-    speech_thread.start()
-    print(f"Text-to-speech engine initialized ({'NSSpeechSynthesizer' if use_nsspeech else 'pyttsx3'})")
+                print(f"Error in speech worker: {str(e)}")
+                SPEECH_UTTERANCES.inc(outcome="failed")
+            finally:
+                speech_context.utterance = None
+                utterance._finish()
+                self._release(utterance, spoken)
+
+    def cancel(self, session):
+        """
+        Drop everything waiting for session and cut off what it is playing.
+        """
+        with self.condition:
+            pending = self.queues.pop(session, [])
+            self.ready_at.pop(session, None)
+            for utterance in pending:
+                self._discard(utterance, "cancelled")
+            playing = [utterance for utterance in self.playing if utterance.session == session]
+            self.condition.notify_all()
+        for utterance in playing:
+            utterance.cancel()
+
+    def depth(self):
+        with self.condition:
+            return sum(len(pending) for pending in self.queues.values())
+
+    def busy_workers(self):
+        with self.condition:
+            return len(self.playing)
+
+    def _speaking(self, session):
+        # Caller holds the condition
+        if session is None:
+            return bool(self.playing or self.queues)
+        return session in self.queues or any(utterance.session == session for utterance in self.playing)
+
+    def speaking(self, session=None):
+        """
+        Whether anything (for session, if given) is playing or waiting to play.
+        """
+        with self.condition:
+            return self._speaking(session)
+
+    def wait_idle(self, session=None, timeout=None):
+        """
+        Block until nothing (for session, if given) is playing or waiting to
+        play; False if timeout seconds pass first.
+        """
+        with self.condition:
+            return self.condition.wait_for(lambda: self.closed or not self._speaking(session), timeout)
+
+    def shutdown(self, timeout=5.0):
+        """
+        Stop taking speech, complete everything waiting, cut off what is playing
+        and wait up to timeout seconds for the workers to exit.
+        """
+        with self.condition:
+            if self.closed:
+                return
+            self.closed = True
+            for pending in self.queues.values():
+                for utterance in pending:
+                    self._discard(utterance, "cancelled")
+            self.queues.clear()
+            self.ready_at.clear()
+            playing = list(self.playing)
+            self.condition.notify_all()
+        for utterance in playing:
+            utterance.cancel()
+        deadline = time.perf_counter() + timeout
+        for thread in self.threads:
+            thread.join(max(0, deadline - time.perf_counter()))
+        print("Speech workers stopped")
+
+def init_tts():
+    """
+    Start the pool of speech workers using NSSpeechSynthesizer or pyttsx3.
+    """
+    global speech_pool
+    speech_pool = SpeechPool()
+    speech_pool.start()
+    atexit.register(speech_pool.shutdown)
+    print(f"Text-to-speech engine initialized ({'NSSpeechSynthesizer' if use_nsspeech else 'pyttsx3'}, {speech_pool.size} workers"
+          f"{', one shared synthesizer' if speech_pool.shared_synthesizer else ''})")
 
-init_tts()
+def ensure_tts():
+    """
+    Start the speech workers on first use rather than at import.
+    """
+    with tts_init_lock:
+        if speech_pool is None:
+            init_tts()
+
+def shutdown_tts(timeout=5.0):
+    """
+    Stop the speech workers; the next speak_text starts a fresh pool.
+    """
+    global speech_pool
+    with tts_init_lock:
+        pool, speech_pool = speech_pool, None
+    if pool is not None:
+        pool.shutdown(timeout)
+
+def set_speech_session(session):
+    """
+    Queue this thread's speech for session (None for the default), e.g. one voice loop per learner.
+    """
+    speech_context.session = session
+
+def current_speech_session():
+    return getattr(speech_context, "session", None) or DEFAULT_SPEECH_SESSION
 
-def speak_text(text, post_delay=0.5):
+def speak_text(text, post_delay=0.5, priority=PRIORITY_PROMPT, key=None, session=None):
     """
-    Add text to the speech queue for thread-safe playback.
+    Queue text for this thread's speech session (or session) at the given priority.
+    Returns a SpeechHandle that completes when the utterance has been spoken,
+    or at once if it is dropped or replaced by a newer utterance with the same key.
     """
+    utterance = SpeechHandle(text, post_delay, priority, session or current_speech_session(), key)
+    ensure_tts()
     try:
-        speech_queue.put((text, post_delay))
-        # Wait briefly to ensure queue processing starts
-        time.sleep(0.1)
+        speech_pool.submit(utterance)
     except Exception as e:
         print(f"Error in speak_text: {str(e)}")
+        utterance._finish()
+    return utterance
+
+def cancel_speech(session=None):
+    """
+    Barge-in: drop every utterance queued for this thread's session (or session)
+    and cut off the one playing now.
+    """
+    pool = speech_pool
+    if pool is not None:
+        pool.cancel(session or current_speech_session())
+
+def speaking(session=None):
+    """
+    Whether any speech (for session, if given) is playing or waiting to play.
+    """
+    pool = speech_pool
+    return pool is not None and pool.speaking(session)
+
+def wait_for_speech(session=None, timeout=None):
+    """
+    Block until every utterance (for session, if given) has been spoken or
+    dropped; False if timeout seconds pass first.
+    """
+    pool = speech_pool
+    return pool is None or pool.wait_idle(session, timeout)
+
+# Closed vocabulary spoken to the voice flows in app.py, apart from course names (see command_vocabulary)
+COMMAND_VOCABULARY = ["repeat", "next", "previous", "search", "stop", "yes", "no"]
+
+def command_vocabulary():
+    """
+    COMMAND_VOCABULARY plus the course names in the visual catalog.
+    """
+    return [course.lower() for course in visual_catalog()] + COMMAND_VOCABULARY
+
+# Keyword spotting sensitivity (0-1). speech_recognition turns it into the Sphinx threshold 1e(100s - 110),
+# so despite its docstring higher values are stricter: on the debug_audio_*.wav captures 1.0 spots
+# only the spoken keywords, while 0.9 and below add a dozen or more false "no"s per capture
+KWS_SENSITIVITY = float(os.environ.get("KWS_SENSITIVITY", 1.0))
+
+class RecognizerBackend:
+    """
+    Turns captured audio into (transcript, confidence) alternatives, best first.
+    Raises sr.UnknownValueError when nothing was understood and sr.RequestError
+    when the engine itself is unavailable.
+    """
+    name = "base"
+
+    def recognize(self, recognizer, audio, vocabulary=None):
+        raise NotImplementedError
+
+class KeywordSpottingBackend(RecognizerBackend):
+    """
+    Offline PocketSphinx keyword spotting constrained to the command vocabulary.
+    Without a vocabulary it falls back to Sphinx's free-form decoding.
+    """
+    name = "sphinx"
+
+    def __init__(self, sensitivity=KWS_SENSITIVITY):
+        self.sensitivity = sensitivity
+
+    def recognize(self, recognizer, audio, vocabulary=None):
+        if not vocabulary:
+            transcript = recognizer.recognize_sphinx(audio).strip()
+            if not transcript:
+                raise sr.UnknownValueError("Nothing recognized")
+            return [(transcript, 0.0)]
+        keywords = [(word, self.sensitivity) for word in vocabulary]
+        spotted = recognizer.recognize_sphinx(audio, keyword_entries=keywords).split()
+        if not spotted:
+            raise sr.UnknownValueError("No keyword spotted")
+        # One hypothesis, every keyword in the order heard: an echo of "say yes or no" spots both
+        # words, and the command matcher then rejects it as ambiguous instead of picking one
+        return [(" ".join(spotted), 0.0)]
+
+class GoogleBackend(RecognizerBackend):
+    """
+    Cloud recognizer; needs network access, so it is only used when opted in.
+    """
+    name = "google"
+
+    def recognize(self, recognizer, audio, vocabulary=None):
+        result = recognizer.recognize_google(audio, show_all=True)
+        if isinstance(result, dict):
+            result = result.get('alternative', [])
+        if not result:
+            raise sr.UnknownValueError("No results returned")
+        if isinstance(result, str):
+            return [(result, 0.0)]
+        return [(alt.get('transcript', ''), alt.get('confidence', 0.0)) for alt in result]
+
+RECOGNIZER_BACKENDS = {
+    KeywordSpottingBackend.name: KeywordSpottingBackend,
+    GoogleBackend.name: GoogleBackend,
+}
+
+def load_backends(names=None):
+    """
+    Build the backend chain from a comma-separated list such as "sphinx,google".
+    Defaults to the RECOGNIZER_BACKENDS environment variable, then offline only.
+    """
+    names = names or os.environ.get("RECOGNIZER_BACKENDS", "sphinx")
+    return [RECOGNIZER_BACKENDS[name.strip()]() for name in names.split(",") if name.strip()]
+
+recognizer_backends = load_backends()
+# Captured audio is saved off the hot path, see debug_recorder.py for settings
+debug_recorder = DebugAudioRecorder()
+
+def recognize_audio(recognizer, audio, vocabulary=COMMAND_VOCABULARY, backends=None):
+    """
+    Try each backend in order and return the first non-empty list of alternatives.
+    """
+    error = sr.UnknownValueError("No recognizer backend configured")
+    for backend in backends or recognizer_backends:
+        try:
+            alternatives = backend.recognize(recognizer, audio, vocabulary)
+            print(f"{backend.name} recognized: {alternatives[:3]}")
+            return alternatives
+        except (sr.UnknownValueError, sr.RequestError) as e:
+            print(f"{backend.name} recognizer failed: {str(e) or type(e).__name__}")
+            BACKEND_FAILURES.inc(backend=backend.name)
+            error = e
+    raise error
+
+def transcribe_file(path, vocabulary=COMMAND_VOCABULARY, backends=None):
+    """
+    Run the recognizer chain on a recorded WAV, e.g. the debug_audio_*.wav captures.
+    """
+    recognizer = sr.Recognizer()
+    with sr.AudioFile(path) as source:
+        audio = recognizer.record(source)
+    try:
+        return recognize_audio(recognizer, audio, vocabulary, backends)
+    except sr.UnknownValueError:
+        return []
 
-def recognize_command(prompt, is_course_selection=False):
+# Voice activity detection: captures are cut to the utterance and resampled to this rate before recognition
+VAD_SAMPLE_RATE = 16000
+VAD_FRAME_MS = 30
+# Consecutive speech frames needed to start a phrase, so clicks and pops are ignored
+VAD_START_FRAMES = 3
+# Silence that ends a phrase, audio kept before its start, and silence kept after its end
+VAD_END_SILENCE = 0.5
+VAD_PRE_ROLL = 0.3
+VAD_TRAILING_PAD = 0.15
+VAD_AGGRESSIVENESS = int(os.environ.get("VAD_AGGRESSIVENESS", 2))
+
+class VoiceActivityDetector:
+    """
+    Frame-level speech detector on 16 kHz mono 16-bit audio: webrtcvad when it
+    is installed, otherwise RMS energy against the recognizer's threshold.
+    """
+
+    def __init__(self, frame_ms=VAD_FRAME_MS, aggressiveness=VAD_AGGRESSIVENESS):
+        self.frame_bytes = VAD_SAMPLE_RATE * frame_ms // 1000 * 2
+        self.frame_seconds = frame_ms / 1000
+        self.vad = webrtcvad.Vad(aggressiveness) if use_webrtcvad else None
+
+    def is_speech(self, frame, energy_threshold):
+        if self.vad is not None:
+            return self.vad.is_speech(frame, VAD_SAMPLE_RATE)
+        return audioop.rms(frame, 2) > energy_threshold
+
+class FrameReader:
+    """
+    Reads a capture source and yields fixed-size frames converted to 16 kHz mono 16-bit.
+    """
+
+    def __init__(self, source, frame_bytes):
+        self.source = source
+        self.frame_bytes = frame_bytes
+        self.buffer = b""
+        self.state = None
+
+    def convert(self, data):
+        source = self.source
+        if source.SAMPLE_WIDTH != 2:
+            data = audioop.lin2lin(data, source.SAMPLE_WIDTH, 2)
+        if source.SAMPLE_RATE != VAD_SAMPLE_RATE:
+            data, self.state = audioop.ratecv(data, 2, 1, source.SAMPLE_RATE, VAD_SAMPLE_RATE, self.state)
+        return data
+
+    def next_frame(self):
+        while len(self.buffer) < self.frame_bytes:
+            self.buffer += self.convert(self.source.stream.read(self.source.CHUNK))
+        frame, self.buffer = self.buffer[:self.frame_bytes], self.buffer[self.frame_bytes:]
+        return frame
+
+_voice_activity_detector = None
+
+def listen_for_utterance(recognizer, source, timeout=None, phrase_time_limit=None, end_silence=VAD_END_SILENCE):
+    """
+    Drop-in for recognizer.listen: wait for speech, stop as soon as it is
+    followed by end_silence seconds of quiet, and return only the utterance
+    (plus a little padding) as 16 kHz mono AudioData.
+    Raises sr.WaitTimeoutError if no speech starts within timeout seconds.
+    """
+    global _voice_activity_detector
+    if _voice_activity_detector is None:
+        _voice_activity_detector = VoiceActivityDetector()
+    detector = _voice_activity_detector
+    reader = FrameReader(source, detector.frame_bytes)
+    threshold = recognizer.energy_threshold
+    pre_roll = collections.deque(maxlen=max(1, int(VAD_PRE_ROLL / detector.frame_seconds)))
+    end_frames = max(1, int(end_silence / detector.frame_seconds))
+    pad_frames = int(VAD_TRAILING_PAD / detector.frame_seconds)
+
+    elapsed = 0.0
+    run = 0
+    while run < VAD_START_FRAMES:
+        if timeout and elapsed > timeout:
+            raise sr.WaitTimeoutError("listening timed out while waiting for phrase to start")
+        frame = reader.next_frame()
+        elapsed += detector.frame_seconds
+        pre_roll.append(frame)
+        run = run + 1 if detector.is_speech(frame, threshold) else 0
+
+    frames = list(pre_roll)
+    silent = 0
+    phrase_seconds = len(frames) * detector.frame_seconds
+    while silent < end_frames:
+        if phrase_time_limit and phrase_seconds >= phrase_time_limit:
+            break
+        frame = reader.next_frame()
+        frames.append(frame)
+        phrase_seconds += detector.frame_seconds
+        silent = 0 if detector.is_speech(frame, threshold) else silent + 1
+    if silent > pad_frames:
+        del frames[len(frames) - (silent - pad_frames):]
+    audio = sr.AudioData(b"".join(frames), VAD_SAMPLE_RATE, 2)
+    CAPTURE_BYTES.observe(len(audio.frame_data))
+    return audio
+
+class MicrophoneStream:
+    """
+    Microphone kept open across commands, with a running ambient noise-floor
+    estimate that is refreshed from a short sample before each listen and only
+    fully recalibrated when the floor drifts. session is the learner speech
+    session it listens for (None for the calling thread's), whose own speech
+    is not mistaken for ambient noise.
+    """
+
+    def __init__(self, device_index=None, calibration_seconds=2.0, sample_seconds=0.2,
+                 drift_ratio=2.0, drift_limit=3, smoothing=0.3, microphone=None, session=None):
+        # Any sr.AudioSource works as microphone, e.g. a replayed recording
+        self.microphone = microphone or sr.Microphone(device_index=device_index)
+        self.recognizer = sr.Recognizer()
+        self.recognizer.dynamic_energy_threshold = True
+        self.calibration_seconds = calibration_seconds
+        self.sample_seconds = sample_seconds
+        self.drift_ratio = drift_ratio
+        self.drift_limit = drift_limit
+        self.smoothing = smoothing
+        self.session = session
+        self.source = None
+        self.noise_floor = None
+        self.drift_count = 0
+        self.lock = threading.Lock()
+
+    def open(self):
+        """
+        Open the capture stream and run the one-time calibration.
+        """
+        if self.source is None:
+            self.source = self.microphone.__enter__()
+            print("Calibrating microphone... Please remain silent.")
+            speak_text(CALIBRATION_PROMPT, post_delay=0.5, session=self.session).wait()
+            self.calibrate()
+        return self.source
+
+    def close(self):
+        if self.source is not None:
+            self.microphone.__exit__(None, None, None)
+            self.source = None
+
+    def calibrate(self):
+        start_time = time.perf_counter()
+        self.recognizer.adjust_for_ambient_noise(self.source, duration=self.calibration_seconds)
+        record_stage("calibration", time.perf_counter() - start_time)
+        self.noise_floor = self.recognizer.energy_threshold / self.recognizer.dynamic_energy_ratio
+        self.drift_count = 0
+        print(f"Microphone calibrated, noise floor {self.noise_floor:.1f}")
+
+    def measure_energy(self):
+        source = self.source
+        frames = max(1, int(self.sample_seconds * source.SAMPLE_RATE / source.CHUNK))
+        buffer = b"".join(source.stream.read(source.CHUNK) for _ in range(frames))
+        return audioop.rms(buffer, source.SAMPLE_WIDTH)
+
+    def refresh(self):
+        """
+        Update the noise floor from a short ambient sample, recalibrating only
+        after several consecutive samples disagree with the current estimate.
+        """
+        if speaking(self.session or current_speech_session()):
+            return  # This learner's own prompts are not ambient noise
+        start_time = time.perf_counter()
+        energy = self.measure_energy()
+        record_stage("noise_floor", time.perf_counter() - start_time)
+        floor = max(self.noise_floor, 1.0)
+        if energy > floor * self.drift_ratio or energy < floor / self.drift_ratio:
+            self.drift_count += 1
+            if self.drift_count >= self.drift_limit:
+                print(f"Noise floor drifted ({floor:.1f} -> {energy:.1f}), recalibrating")
+                self.calibrate()
+            return
+        self.drift_count = 0
+        self.noise_floor = floor * (1 - self.smoothing) + energy * self.smoothing
+        self.recognizer.energy_threshold = self.noise_floor * self.recognizer.dynamic_energy_ratio
+
+    def __enter__(self):
+        self.lock.acquire()
+        try:
+            self.open()
+            self.refresh()
+        except Exception:
+            self.lock.release()
+            raise
+        return self.source
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.lock.release()
+        return False
+
+# Factories for the capture stream and synthesizer; the benchmark swaps in replayed audio and a timed fake
+microphone_factory = MicrophoneStream
+synthesizer_factory = create_synthesizer
+_default_microphone = None
+
+def default_microphone():
+    """
+    Process-wide microphone stream used when the caller does not own one.
+    """
+    global _default_microphone
+    if _default_microphone is None:
+        _default_microphone = microphone_factory()
+    return _default_microphone
+
+def match_command(alternatives, state, commands=None):
+    """
+    Best command for state in the recognizer alternatives, or None.
+    """
+    command, score = command_matcher.matcher_for(state, commands).match(alternatives)
+    exact = command is not None and any(command == transcript.lower().strip() for transcript, _ in alternatives)
+    COMMAND_MATCHES.inc(state=state, match="none" if command is None else "exact" if exact else "fuzzy")
+    print(f"Matched {alternatives[:3]} to {command!r} (score {score:.2f})")
+    return command
+
+def listen_for_barge_in(recognizer, source, utterance, vocabulary, phrase_limit, state=None, commands=None,
+                        cancel_event=None):
+    """
+    Listen while utterance is still playing; if a command is heard, cut the
+    speech off and return it. Returns "" once the utterance finishes.
+    """
+    while not utterance.done() and not (cancel_event is not None and cancel_event.is_set()):
+        try:
+            audio = listen_for_utterance(recognizer, source, timeout=1, phrase_time_limit=phrase_limit)
+            start_time = time.perf_counter()
+            alternatives = recognize_audio(recognizer, audio, vocabulary)
+            record_stage("recognize", time.perf_counter() - start_time)
+        except (sr.WaitTimeoutError, sr.UnknownValueError, sr.RequestError):
+            continue
+        if state is not None:
+            command = match_command(alternatives, state, commands)
+            if command:
+                print(f"Barge-in command: '{command}'")
+                RECOGNITION_ATTEMPTS.inc(outcome="barge_in")
+                ATTEMPTS_PER_COMMAND.observe(1)
+                cancel_speech()
+                return command
+            continue
+        for transcript, _ in alternatives:
+            if any(word in vocabulary for word in transcript.lower().split()):
+                print(f"Barge-in command: '{transcript}'")
+                RECOGNITION_ATTEMPTS.inc(outcome="barge_in")
+                cancel_speech()
+                return transcript
+    return ""
+
+def recognize_command(prompt, is_course_selection=False, microphone=None, vocabulary=COMMAND_VOCABULARY, barge_in=None,
+                      state=None, commands=None, cancel_event=None):
     """
     Recognize voice commands with improved reliability and debugging.
+    If barge_in is a SpeechHandle still playing, commands spoken over it interrupt it.
+    Once cancel_event is set, gives up with "" before the next attempt.
+    With a dialogue state ("navigation" or "yes_no", see command_matcher.py, or
+    any state along with its commands, such as "course" with the course names)
+    all recognizer alternatives are fuzzy-matched against that state's commands
+    and the matched command is returned instead of the raw transcript.
     """
-    with sr.Microphone() as source:
-        # Extended ambient noise calibration
-        print("Calibrating microphone... Please remain silent for 5 seconds.")
-        speak_text("Calibrating microphone. Please remain silent for five seconds.", post_delay=0.5)
-        time.sleep(3.0)  # Wait for calibration prompt to finish
-        recognizer.adjust_for_ambient_noise(source, duration=5.0)
-        recognizer.energy_threshold = 4  # Balanced sensitivity
-        recognizer.dynamic_energy_threshold = True
-        
+    if state is not None:
+        vocabulary = command_matcher.matcher_for(state, commands).vocabulary
+    microphone = microphone or default_microphone()
+    recognizer = microphone.recognizer
+    with microphone as source:
         phrase_limit = 7  # Extended for all commands
         max_attempts = 3
         attempt = 1
         
+        if barge_in is not None and vocabulary:
+            command = listen_for_barge_in(recognizer, source, barge_in, vocabulary, phrase_limit, state, commands,
+                                          cancel_event)
+            if command:
+                return command
+        
         while attempt <= max_attempts:
+            if cancel_event is not None and cancel_event.is_set():
+                print("Recognition cancelled")
+                RECOGNITION_ATTEMPTS.inc(outcome="cancelled")
+                break
+            audio = None
             try:
+                prompt_start = time.perf_counter()
                 speak_text(prompt, post_delay=0.5)
                 print(f"Listening for: '{prompt}' (Attempt {attempt}/{max_attempts})")
-                time.sleep(3.0)  # Ensure prompt is fully spoken
-                speak_text("Microphone is active. Please speak now.", post_delay=0.5)
-                time.sleep(1.0)  # Wait for mic prompt
+                # A session's prompts play in order, so the mic prompt finishing means the prompt has too
+                speak_text(LISTENING_PROMPT, post_delay=0.5).wait()
+                record_stage("prompt", time.perf_counter() - prompt_start)
                 start_time = time.time()
-                audio = recognizer.listen(source, timeout=20, phrase_time_limit=phrase_limit)
+                audio = listen_for_utterance(recognizer, source, timeout=20, phrase_time_limit=phrase_limit)
                 end_time = time.time()
+                record_stage("listen", end_time - start_time)
                 print(f"Microphone listen took {end_time - start_time:.2f} seconds")
-                
-                # Save audio for debugging
-                debug_file = f"debug_audio_{int(time.time())}.wav"
-                with open(debug_file, "wb") as f:
-                    f.write(audio.get_wav_data())
-                print(f"Saved audio to {debug_file} for debugging")
                 audio_duration = (end_time - start_time)
                 print(f"Audio duration: {audio_duration:.2f} seconds")
                 
@@ -121,39 +1109,53 @@ def recognize_command(prompt, is_course_selection=False):
                     print("Could not retrieve energy threshold")
                 
                 # Recognize speech
-                print("Sending audio to Google Speech Recognition API...")
-                command = recognizer.recognize_google(audio, show_all=True)
-                
-                if isinstance(command, list):
-                    if not command:
-                        print("Recognition failed: No results returned")
-                        raise sr.UnknownValueError("No results returned")
-                    best_result = command[0]
-                    recognized_text = best_result.get('transcript', '')
-                    confidence = best_result.get('confidence', 0.0)
-                    print(f"Recognized: '{recognized_text}' (Confidence: {confidence:.2f})")
-                    return recognized_text
-                else:
-                    print(f"Recognized: '{command}'")
-                    return command
+                recognize_start = time.perf_counter()
+                try:
+                    alternatives = recognize_audio(recognizer, audio, vocabulary)
+                finally:
+                    record_stage("recognize", time.perf_counter() - recognize_start)
+                recognized_text, confidence = alternatives[0]
+                if state is not None:
+                    recognized_text = match_command(alternatives, state, commands)
+                    if recognized_text is None:
+                        raise sr.UnknownValueError(f"No {state} command in {alternatives[:3]}")
+                    ATTEMPTS_PER_COMMAND.observe(attempt)
+                print(f"Recognized: '{recognized_text}' (Confidence: {confidence:.2f})")
+                RECOGNITION_ATTEMPTS.inc(outcome="recognized")
+                RECOGNITION_CONFIDENCE.observe(confidence)
+                debug_recorder.record(audio, recognized_text)
+                return recognized_text
             
             except sr.UnknownValueError as e:
                 print(f"Recognition failed: Could not understand audio. Error: {str(e)}")
-                speak_text("I didn’t hear you clearly. Please speak louder and try again.", post_delay=0.5)
+                debug_recorder.record(audio)
+                RECOGNITION_ATTEMPTS.inc(outcome="unclear")
+                speak_text(UNCLEAR_PROMPT, post_delay=0.5, priority=PRIORITY_URGENT, key=RETRY_KEY)
                 attempt += 1
             except sr.RequestError as e:
                 print(f"Speech recognition request failed: {str(e)}")
-                speak_text("I’m having trouble with the speech service. Please check your internet and try again.", post_delay=0.5)
+                RECOGNITION_ATTEMPTS.inc(outcome="service_error")
+                speak_text(SERVICE_ERROR_PROMPT, post_delay=0.5, priority=PRIORITY_URGENT, key=RETRY_KEY)
                 attempt += 1
-                time.sleep(attempt * 5)
+                if cancel_event is not None:
+                    cancel_event.wait(attempt * 5)
+                else:
+                    time.sleep(attempt * 5)
             except Exception as e:
                 print(f"Unexpected error in recognize_command: {str(e)}")
-                speak_text("An error occurred. Please try again.", post_delay=0.5)
+                RECOGNITION_ATTEMPTS.inc(outcome="error")
+                speak_text(GENERIC_ERROR_PROMPT, post_delay=0.5, priority=PRIORITY_URGENT, key=RETRY_KEY)
                 attempt += 1
             
             if attempt > max_attempts:
                 print(f"Max attempts ({max_attempts}) reached. Recognition failed.")
-                speak_text("I couldn’t understand after several tries. Please restart the app.", post_delay=0.5)
+                RECOGNITION_ATTEMPTS.inc(outcome="gave_up")
+                speak_text(GIVE_UP_PROMPT, post_delay=0.5, priority=PRIORITY_URGENT, key=RETRY_KEY)
                 break
         
-        return ""
\ No newline at end of file
+        return ""
+
+if __name__ == "__main__":
+    # python visually.py debug_audio_*.wav
+    for wav_path in sys.argv[1:]:
+        print(f"{wav_path}: {transcribe_file(wav_path, command_vocabulary())}")